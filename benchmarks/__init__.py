@@ -0,0 +1,16 @@
+"""
+FactGraph 離線效能基準（offline benchmarks）
+
+不需要 CKIP 模型、OpenAI、Neo4j 或 MongoDB：
+  - synthetic_kg   : 產生指定規模的 KG 表格（CSV）與對齊向量（npy）
+  - stub_embedder  : 以字元 bigram 雜湊產生向量、介面同 SentenceTransformer
+  - fake_openai    : 回傳固定抽取 / 判斷內容的 OpenAI 相容伺服器（可設延遲）
+  - fake_neo4j     : 記錄 session.run 呼叫的假 driver
+  - run            : 執行基準並輸出 JSON 結果
+  - compare        : 比較兩次結果
+  - import_budget  : 檢查冷啟動 import 時間與是否載入重型套件
+
+執行方式：
+  python -m benchmarks.run --sizes 10000,50000
+  python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
@@ -0,0 +1,65 @@
+"""
+比較兩次基準結果
+
+以 (name, size, params) 對齊兩份 JSON，列出 median 變化；
+變慢超過 --threshold 視為退步，加上 --fail 時以退出碼 1 結束（可用於 CI）。
+
+執行方式：
+  python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json --threshold 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# 不屬於比較鍵的結果欄位（每次執行都可能不同）
+_VOLATILE = {'calls', 'stage_seconds', 'p99_ms'}
+
+
+def _key(r: Dict[str, Any]) -> Tuple:
+    params = tuple(sorted((k, json.dumps(v)) for k, v in r.get('params', {}).items() if k not in _VOLATILE))
+    return r['name'], r['size'], params
+
+
+def _load(path: Path) -> Dict[Tuple, Dict[str, Any]]:
+    data = json.loads(path.read_text(encoding='utf-8'))
+    return {_key(r): r for r in data['results'] if 'error' not in r}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10, help='median 變慢比例門檻')
+    parser.add_argument('--fail', action='store_true', help='有退步時以退出碼 1 結束')
+    args = parser.parse_args()
+
+    base, cand = _load(Path(args.baseline)), _load(Path(args.candidate))
+    regressions = 0
+    print(f"{'benchmark':<44}{'base':>12}{'new':>12}{'Δ':>9}")
+    for key in sorted(base.keys() | cand.keys(), key=str):
+        name, size, params = key
+        label = f"{name}@{size}" + ''.join(f"[{json.loads(v)}]" for _, v in params)
+        if key not in base or key not in cand:
+            print(f"{label:<44}{'—' if key not in base else '':>12}{'—' if key not in cand else '':>12}")
+            continue
+        b, c = base[key]['stats']['median'], cand[key]['stats']['median']
+        delta = (c - b) / b if b else 0.0
+        flag = ''
+        if delta > args.threshold:
+            flag, regressions = '  ⚠️ slower', regressions + 1
+        elif delta < -args.threshold:
+            flag = '  🚀 faster'
+        print(f"{label:<44}{b * 1e3:>10.2f}ms{c * 1e3:>10.2f}ms{delta:>+8.1%}{flag}")
+
+    if regressions:
+        print(f'\n{regressions} 項變慢超過 {args.threshold:.0%}')
+        if args.fail:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Neo4j driver 替身
+
+只記錄 session.run 的次數與參數量，`single()` 回傳 rel_count=0，
+讓 Neo4jLoader.insert_data 走完完整的「檢查 → 建立關係」路徑。
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+
+class FakeResult:
+    def single(self) -> Dict[str, Any]:
+        return {'rel_count': 0}
+
+    def consume(self) -> None:
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+
+class FakeSession:
+    def __init__(self, driver: 'FakeDriver') -> None:
+        self._driver = driver
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None, **kwargs: Any) -> FakeResult:
+        self._driver.calls += 1
+        self._driver.rows += len((parameters or kwargs).get('rows', [None]))
+        if self._driver.latency:
+            time.sleep(self._driver.latency)
+        return FakeResult()
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+    def __enter__(self) -> 'FakeSession':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+class FakeDriver:
+    """
+    Args:
+        latency: 每次 session.run 模擬的往返時間（秒）
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.rows = 0
+
+    def session(self, **_) -> FakeSession:
+        return FakeSession(self)
+
+    def close(self) -> None:
+        return None
@@ -0,0 +1,265 @@
+"""
+新聞網站 fixture 伺服器（爬蟲測試與基準用）
+
+模擬 PTS 的頁面結構：
+  - /category/1?page=N  列表頁，每頁 per_page 則 `<h2><a href="/article/<id>">`
+  - /article/<id>       文章頁（layout="pts"：h1.article-title、time、div.news-info、div.post-article；
+                        layout="cts"：div.artical-titlebar h1、div.titlebar-top time、div.artical-content）
+文章頁帶 ETag / Last-Modified，收到相符的 If-None-Match / If-Modified-Since 時回 304。
+
+  - latency：每次回應前等待的秒數（模擬網路延遲）
+  - fail_every：每 N 個文章請求回一次 503（附 Retry-After: 0），驗證重試
+  - js_only_every：每 N 篇文章只回傳未渲染的空殼（內容需 JS 載入），驗證瀏覽器備援；
+    `article_html(aid, layout)` 即為「瀏覽器渲染後」的完整頁面
+  - requests / not_modified / max_inflight / timestamps：統計與禮貌限制驗證
+
+`FakeDriver` 以 HTTP 取頁並模擬瀏覽器啟動 / 渲染時間，供 `BrowserPool` 測試與基準使用。
+
+執行方式（獨立啟動）：
+  python -m benchmarks.fake_news_site --port 8766 --latency 0.1
+  python -m src.knowledge_base_operation.news_crawler.pts_async --base-url http://127.0.0.1:8766 --rate 0
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+LAST_MODIFIED = 'Tue, 01 Jul 2025 08:00:00 GMT'
+_ARTICLE = re.compile(r'^/article/(\d+)$')
+
+
+def article_html(aid: int, layout: str = 'pts', paragraphs: int = 12) -> str:
+    body = ''.join(f'<p>第 {aid} 則新聞的第 {i} 段，相關單位今日說明事件經過與後續處理方式。</p>'
+                   for i in range(paragraphs))
+    if layout == 'cts':
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>華視新聞</title></head><body>'
+            f'<div class="artical-titlebar"><h1>測試新聞標題 {aid}</h1>'
+            '<div class="titlebar-top"><time>2025/07/01 12:00</time></div></div>'
+            f'<div class="artical-content">{body}</div>'
+            '</body></html>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>公視新聞網</title></head><body>'
+        '<nav>' + ''.join(f'<a href="/category/{c}">分類{c}</a>' for c in range(1, 30)) + '</nav>'
+        f'<h1 class="article-title">測試新聞標題 {aid}</h1>'
+        '<time>2025/07/01 12:00</time>'
+        '<div class="news-info">公視新聞 | 政治</div>'
+        f'<div class="post-article text-align-left">{body}</div>'
+        '<footer>' + '<div class="related"><a href="/x">相關新聞</a></div>' * 40 + '</footer>'
+        '</body></html>'
+    )
+
+
+def shell_html() -> str:
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"></head>'
+            '<body><div id="app"></div><script src="/bundle.js"></script></body></html>')
+
+
+def list_html(ids: List[int]) -> str:
+    items = ''.join(f'<div class="item"><h2><a href="/article/{i}">測試新聞標題 {i}</a></h2></div>' for i in ids)
+    return f'<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>{items}</body></html>'
+
+
+class FakeDriver:
+    """Selenium driver 替身：get() 以 HTTP 取頁（js_only 頁面回傳渲染後的完整頁面），並等待 render 秒。"""
+
+    def __init__(self, startup: float = 0.0, render: float = 0.0, layout: str = 'pts') -> None:
+        time.sleep(startup)
+        self.render = render
+        self.layout = layout
+        self.page_source = ''
+        self.pages = 0
+        self.closed = False
+
+    def get(self, url: str) -> None:
+        if url == 'about:blank':
+            self.page_source = ''
+            return
+        with urllib.request.urlopen(url, timeout=10) as res:
+            html = res.read().decode('utf-8')
+        m = _ARTICLE.match(urlsplit(url).path)
+        if m and 'id="app"' in html:  # 空殼 → 模擬 JS 渲染結果
+            html = article_html(int(m.group(1)), self.layout)
+        time.sleep(self.render)
+        self.page_source = html
+        self.pages += 1
+
+    def delete_all_cookies(self) -> None:
+        pass
+
+    def execute_script(self, *_args):
+        return None
+
+    def quit(self) -> None:
+        self.closed = True
+
+
+class FakeNewsSite:
+    """
+    在背景執行緒啟動 fixture 伺服器；可作為 context manager 使用。
+
+    Args:
+        pages / per_page: 列表頁數與每頁文章數
+        latency: 每次回應前的等待秒數
+        fail_every: 每 N 個文章請求回一次 503；0 表示不失敗
+        layout: 文章頁版型（pts / cts）
+        js_only_every: 文章 id 可被 N 整除時只回傳空殼；0 表示皆為完整頁面
+    """
+
+    def __init__(self, pages: int = 2, per_page: int = 20, latency: float = 0.0, fail_every: int = 0,
+                 host: str = '127.0.0.1', port: int = 0, layout: str = 'pts', js_only_every: int = 0) -> None:
+        self.layout = layout
+        self.js_only_every = js_only_every
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.max_inflight = 0
+        self.timestamps: List[float] = []
+        self._inflight = 0
+        self._article_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests = self.not_modified = self.failed = self.max_inflight = 0
+            self.timestamps = []
+
+    def max_rate(self, window: float = 1.0) -> int:
+        """任一 window 秒內收到的最多請求數。"""
+        ts = sorted(self.timestamps)
+        best, lo = 0, 0
+        for hi, t in enumerate(ts):
+            while t - ts[lo] >= window:
+                lo += 1
+            best = max(best, hi - lo + 1)
+        return best
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *_):  # 靜音
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                    site.timestamps.append(time.monotonic())
+                    site._inflight += 1
+                    site.max_inflight = max(site.max_inflight, site._inflight)
+                try:
+                    if site.latency:
+                        time.sleep(site.latency)
+                    self._route()
+                finally:
+                    with site._lock:
+                        site._inflight -= 1
+
+            def _route(self):
+                url = urlsplit(self.path)
+                if url.path.startswith('/category/'):
+                    page = int(parse_qs(url.query).get('page', ['1'])[0])
+                    if not 1 <= page <= site.pages:
+                        self._send(200, list_html([]))
+                        return
+                    start = (page - 1) * site.per_page
+                    self._send(200, list_html(list(range(start, start + site.per_page))))
+                    return
+                m = _ARTICLE.match(url.path)
+                if not m:
+                    self._send(404, 'not found')
+                    return
+                aid = int(m.group(1))
+                with site._lock:
+                    site._article_requests += 1
+                    fail = site.fail_every and site._article_requests % site.fail_every == 0
+                if fail:
+                    with site._lock:
+                        site.failed += 1
+                    self._send(503, 'busy', {'Retry-After': '0'})
+                    return
+                etag = f'"a{aid}-v1"'
+                if (self.headers.get('If-None-Match') == etag
+                        or self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+                    with site._lock:
+                        site.not_modified += 1
+                    self._send(304, '', {'ETag': etag})
+                    return
+                html = (shell_html() if site.js_only_every and aid % site.js_only_every == 0
+                        else article_html(aid, site.layout))
+                self._send(200, html, {'ETag': etag, 'Last-Modified': LAST_MODIFIED})
+
+            def _send(self, status: int, text: str, headers: dict | None = None) -> None:
+                data = text.encode('utf-8')
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                if status != 304:
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(data)
+
+        return Handler
+
+    def start(self) -> 'FakeNewsSite':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeNewsSite':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fake news site (PTS / CTS layouts)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--fail-every', type=int, default=0)
+    parser.add_argument('--layout', choices=('pts', 'cts'), default='pts')
+    parser.add_argument('--js-only-every', type=int, default=0)
+    args = parser.parse_args()
+
+    site = FakeNewsSite(args.pages, args.per_page, args.latency, args.fail_every, args.host, args.port,
+                        args.layout, args.js_only_every)
+    print(f'🧪 fake news site → {site.base_url}')
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+OpenAI 相容的假伺服器（/v1/chat/completions）
+
+  - system prompt 含 "JSON"（兩個抽取 prompt）→ 回傳抽取結果 JSON，
+    同時帶 verifier 用的 entities / relations 與 answerer 用的 triples
+  - 其他 → 回傳固定的判斷文字
+  - 支援 stream=True（SSE，含 stream_options.include_usage 的 usage chunk）
+  - latency：每次回應前等待的秒數；chunk_delay：串流每個 chunk 間隔
+  - requests / models：收到的請求數與各 model 的請求數（驗證各階段路由）
+
+執行方式（獨立啟動，搭配 OPENAI_BASE_URL=http://127.0.0.1:8765/v1）：
+  python -m benchmarks.fake_openai --port 8765 --latency 0.5 --triples benchmarks/.work/kg-10000/sample-triples.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+JUDGE_TEXT = (
+    '【查核結論】部分正確\n'
+    '1. 新聞中的人物與職稱與比對知識一致。\n'
+    '2. 事件日期與比對知識相差一日，需再確認。\n'
+)
+
+
+def extraction_payload(triples: List[Dict[str, str]]) -> Dict[str, Any]:
+    names = list(dict.fromkeys([t['head'] for t in triples] + [t['tail'] for t in triples]))
+    ids = {n: f'e{i}' for i, n in enumerate(names, 1)}
+    return {
+        'entities': [{'id': ids[n], 'name': n, 'type': '人物'} for n in names],
+        'relations': [{'source': ids[t['head']], 'target': ids[t['tail']], 'relation': t['relation'],
+                       'evidence': f"{t['head']}{t['relation']}{t['tail']}。"}
+                      for t in triples],
+        'triples': [{'subject': t['head'], 'relation': t['relation'], 'object': t['tail']} for t in triples],
+    }
+
+
+class FakeOpenAI:
+    """
+    在背景執行緒啟動假伺服器；可作為 context manager 使用。
+
+    Args:
+        triples: 抽取結果的候選三元組（通常取自合成 KG，才會有檢索命中）
+        per_request: 每次抽取回傳的三元組數
+        latency: 每次回應前的等待秒數
+        chunk_delay: 串流 chunk 間隔秒數
+    """
+
+    def __init__(self, triples: List[Dict[str, str]], per_request: int = 8, latency: float = 0.0,
+                 chunk_delay: float = 0.0, host: str = '127.0.0.1', port: int = 0, seed: int = 0) -> None:
+        self.triples = triples
+        self.per_request = per_request
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.models: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def _content(self, body: Dict[str, Any]) -> str:
+        system = next((m.get('content', '') for m in body.get('messages', []) if m.get('role') == 'system'), '')
+        if 'JSON' not in system:
+            return JUDGE_TEXT
+        with self._lock:
+            picks = self._rng.sample(self.triples, min(self.per_request, len(self.triples)))
+        return json.dumps(extraction_payload(picks), ensure_ascii=False)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *_):  # 靜音
+                pass
+
+            def do_POST(self):
+                if not self.path.endswith('/chat/completions'):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                with fake._lock:
+                    fake.requests += 1
+                    fake.models[body.get('model', '')] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                content = fake._content(body)
+                usage = {'prompt_tokens': sum(len(m.get('content', '')) for m in body.get('messages', [])),
+                         'completion_tokens': len(content)}
+                usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+                if body.get('stream'):
+                    self._stream(body, content, usage)
+                else:
+                    self._json({
+                        'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': int(time.time()),
+                        'model': body.get('model', 'fake'),
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': content}}],
+                        'usage': usage,
+                    })
+
+            def _json(self, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body: Dict[str, Any], content: str, usage: Dict[str, int]) -> None:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                base = {'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk',
+                        'created': int(time.time()), 'model': body.get('model', 'fake')}
+                for i in range(0, len(content), 32):
+                    self._event({**base, 'choices': [{'index': 0, 'delta': {'content': content[i:i + 32]},
+                                                      'finish_reason': None}]})
+                    if fake.chunk_delay:
+                        time.sleep(fake.chunk_delay)
+                self._event({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+                if (body.get('stream_options') or {}).get('include_usage'):
+                    self._event({**base, 'choices': [], 'usage': usage})
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, payload: Dict[str, Any]) -> None:
+                self.wfile.write(b'data: ' + json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n\n')
+
+        return Handler
+
+    def start(self) -> 'FakeOpenAI':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeOpenAI':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fake OpenAI chat.completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--chunk-delay', type=float, default=0.0)
+    parser.add_argument('--triples', default=None, help='sample-triples.json（synthetic_kg 產生）')
+    args = parser.parse_args()
+
+    triples = json.loads(Path(args.triples).read_text(encoding='utf-8')) if args.triples else [
+        {'head': '實體000000', 'relation': '擔任', 'tail': '實體000001'}]
+    server = FakeOpenAI(triples, latency=args.latency, chunk_delay=args.chunk_delay,
+                        host=args.host, port=args.port)
+    print(f'🧪 fake OpenAI → {server.base_url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
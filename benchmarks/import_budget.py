@@ -0,0 +1,99 @@
+"""
+冷啟動 import 預算檢查
+
+以乾淨子程序執行 `python -X importtime -c "import <module>"`，統計：
+  - 累計 import 時間（importtime 最上層模組的 cumulative μs 加總）
+  - 是否載入了不該在 import 階段出現的重型套件（torch、pandas、openai …）
+
+任一模組超出 --budget-ms 或載入禁用套件時以退出碼 1 結束，可放進 CI。
+重型套件未安裝時不影響檢查：只要 import 階段沒有碰到它們就會通過。
+
+執行方式：
+  python -m benchmarks.import_budget --budget-ms 400
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODULES = [
+    'src.config',
+    'src.common.tracing',
+    'src.qa.verifier.pipeline',
+    'src.qa.answerer.pipeline',
+    'src.web.routers.health',
+]
+
+FORBIDDEN = ['torch', 'sentence_transformers', 'transformers', 'pandas', 'openai', 'neo4j', 'pymongo']
+
+_PROBE = (
+    'import importlib, json, sys; importlib.import_module({mod!r}); '
+    'print(json.dumps(sorted(m for m in {forbidden!r} if m in sys.modules)))'
+)
+
+
+def _parse_importtime(stderr: str) -> float:
+    """importtime 輸出中最上層（縮排最少）模組的 cumulative μs 加總，換算為毫秒。"""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # 巢狀 import 以每層兩個空白縮排，最上層只有分隔符後的一個空白
+        if len(name) - len(name.lstrip(' ')) == 1:
+            total += int(cumulative)
+    return total / 1e3
+
+
+def probe(module: str) -> Dict[str, Any]:
+    env = {**os.environ, 'PROJECT_ROOT': os.environ.get('PROJECT_ROOT', str(ROOT))}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(mod=module, forbidden=FORBIDDEN)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {'module': module, 'error': proc.stderr.strip().splitlines()[-1] if proc.stderr else 'failed'}
+    return {
+        'module': module,
+        'import_ms': _parse_importtime(proc.stderr),
+        'heavy': json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check cold-import time and heavy imports')
+    parser.add_argument('--budget-ms', type=float, default=500.0, help='單一模組累計 import 時間上限')
+    parser.add_argument('--modules', default=','.join(MODULES))
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = [probe(m) for m in args.modules.split(',') if m]
+    failed = 0
+    for r in results:
+        if 'error' in r:
+            failed += 1
+            if not args.json:
+                print(f"❌ {r['module']:<32} {r['error']}")
+            continue
+        over = r['import_ms'] > args.budget_ms
+        failed += bool(over or r['heavy'])
+        if not args.json:
+            flag = '❌' if over or r['heavy'] else '✅'
+            heavy = f"  heavy={','.join(r['heavy'])}" if r['heavy'] else ''
+            print(f"{flag} {r['module']:<32} {r['import_ms']:>8.1f}ms{heavy}")
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,711 @@
+"""
+離線效能基準主程式
+
+每個 KG 規模在獨立子行程執行（verifier 的 KG 快照於行程內快取，需乾淨的行程），
+子行程以合成 KG 目錄作為 PROJECT_ROOT，並把 OpenAI / Neo4j 換成本地替身：
+
+  build_block       kg_nl.build_block 逐條組句
+  cosine_search     verifier 檢索（prefilter / postfilter / hybrid）
+  hybrid_search     近似名稱查詢（head 加上頭銜、tail 加上後綴）：prefilter 與 hybrid（n-gram BM25 候選 +
+                    向量重排）相對於原名稱查詢結果的召回率，與每個查詢實際計算相似度的列數
+  search_by_triples answerer 檢索（即時組句 / 預先計算敘述庫）
+  deduplicate       verifier 語意去重（stub embedder）
+  dedupe            answerer 語意去重（stub embedder）
+  insert_data       Neo4jLoader.insert_data（fake driver）
+  process_single    verifier 單篇端到端（fake OpenAI + stub embedder）；
+                    另測 extract 階段路由到 local 後端（第二個 fake 伺服器模擬 LM Studio）
+  embed_batcher     並行小批 encode：直接呼叫 vs EmbedBatcher 合併（模擬 padded forward 成本）
+  crawl_pts         PTS 爬蟲對本地 fixture 網站：同步逐篇 vs asyncio（相同每秒請求上限），
+                    另測第二次執行的條件式 GET（304；沒有取得文章，吞吐量以 requests/s 計）
+  etl_freshness     ETL orchestrator：文章放入佇列 → 抽取（fake OpenAI）→ 入庫（fake Neo4j）→
+                    增量向量化（stub embedder）→ 發佈快照版本；量測吞吐與每篇新鮮度延遲
+  browser_pool      BrowserPool 以 1 / 4 個 FakeDriver（模擬啟動與渲染時間）渲染文章頁，
+                    每個 driver 各自限速並定期重開
+  kg_shards         KG_SHARDS 分片檢索：合成 --shard-rows × --shard-dim 向量（預設 500 萬 × 768），
+                    以 1 / 2 / 4 / 8 個 worker 行程掃描並 heap 合併，與單行程分塊掃描比較吞吐並核對結果
+  kg_hot_reload     verifier 檢索持續進行時發佈兩個新 KG 快照版本：量測換版前後 / 載入期間的查詢延遲，
+                    並檢查每個請求（pin_kg）自始至終使用同一版本、舊版本於請求結束後釋放
+
+結果寫入 benchmarks/results/<時間>_<commit>.json，可用 benchmarks.compare 比較。
+
+執行方式：
+  python -m benchmarks.run                                  # 預設 10k 列
+  python -m benchmarks.run --sizes 10000,100000 --repeat 7
+  python -m benchmarks.run --only cosine_search,search_by_triples --llm-latency 0.2
+  python -m benchmarks.run --only kg_shards --shard-rows 5000000 --shard-workers 1,2,4,8
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.stub_embedder import StubEmbedder
+from benchmarks.synthetic_kg import KG_CSV, KG_LINES, generate_kg
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+WORK_DIR = REPO_ROOT / 'benchmarks' / '.work'
+RESULTS_DIR = REPO_ROOT / 'benchmarks' / 'results'
+
+BENCHES = ['build_block', 'cosine_search', 'hybrid_search', 'search_by_triples', 'deduplicate', 'dedupe',
+           'insert_data', 'process_single', 'embed_batcher', 'crawl_pts',
+           'browser_pool', 'etl_freshness', 'kg_hot_reload', 'kg_shards']
+
+
+# ─────────────────────────── 量測工具 ───────────────────────────
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """重複執行 fn，回傳每次耗時（秒）的統計值。"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        'min': times[0],
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'p95': times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        'repeat': repeat,
+    }
+
+
+def _result(name: str, ctx: Dict[str, Any], stats: Dict[str, float], items: int, unit: str,
+            **params: Any) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'size': ctx['size'],
+        'params': params,
+        'stats': stats,
+        'throughput': {'value': items / stats['median'] if stats['median'] else None, 'unit': unit},
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    """抑制 pipeline 的 print / tqdm 輸出。"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def _install_stub(stub: StubEmbedder) -> None:
+    """以 stub 取代 verifier 的 CKIP 模型（embed_text 於呼叫時才查找 get_embedder）。"""
+    from src.qa.verifier.core import embeddings
+    embeddings.get_embedder = lambda: stub
+
+
+def _hit_lines(ctx: Dict[str, Any], limit: int) -> List[str]:
+    """取樣三元組的檢索結果敘述句，作為去重的輸入。"""
+    from src.qa.verifier.kg.search import cosine_search, kg_row_lines
+    lines: List[str] = []
+    for tp, q in zip(ctx['triples'], ctx['q_vecs']):
+        lines.extend(kg_row_lines(cosine_search(tp, q)))
+        if len(lines) >= limit:
+            break
+    return lines[:limit]
+
+
+# ─────────────────────────── 各項基準 ───────────────────────────
+def bench_build_block(ctx):
+    from src.qa.tools import kg_nl as knl
+    from src.qa.tools.kg_lines import KGLineStore
+
+    store = KGLineStore(ctx['ws'] / KG_LINES)
+    rows = np.random.default_rng(0).choice(len(store), size=min(500, len(store)), replace=False)
+    items = [store.detail(r) for r in rows]
+    stats = measure(lambda: [knl.build_block([tri], {tuple(tri.values()): det}) for tri, det in items],
+                    ctx['repeat'])
+    return [_result('build_block', ctx, stats, len(items), 'lines/s')]
+
+
+def bench_cosine_search(ctx):
+    from src.qa.verifier.kg import search
+
+    out = []
+    for mode in ('prefilter', 'hybrid', 'postfilter'):
+        search.KG_FILTER_MODE = mode
+        stats = measure(lambda: [search.cosine_search(tp, q) for tp, q in zip(ctx['triples'], ctx['q_vecs'])],
+                        ctx['repeat'])
+        out.append(_result('cosine_search', ctx, stats, len(ctx['triples']), 'queries/s', mode=mode))
+    return out
+
+
+def bench_hybrid_search(ctx):
+    from src.qa.verifier.kg import search
+    from src.qa.verifier.kg.loader import get_kg
+
+    kg, stub = get_kg(), ctx['stub']
+    if kg.lexical is None:
+        raise RuntimeError('n-gram 索引不存在（以目前版本重新產生合成 KG）')
+    near = [{**tp, 'head': f"前市長{tp['head']}", 'tail': f"{tp['tail']}公司"} for tp in ctx['triples']]
+    q_near = stub.encode([f"{t['head']} {t['relation']} {t['tail']}" for t in near])
+    q_near /= np.linalg.norm(q_near, axis=1, keepdims=True)
+    prev, search.KG_FILTER_MODE = search.KG_FILTER_MODE, 'prefilter'
+    truth = [set(search.cosine_search(tp, q)) for tp, q in zip(ctx['triples'], ctx['q_vecs'])]
+
+    out = []
+    for mode in ('prefilter', 'hybrid'):
+        search.KG_FILTER_MODE = mode
+        found = [set(search.cosine_search(tp, q)) for tp, q in zip(near, q_near)]
+        scored = [len(kg.index.candidates(tp['head'], tp['tail'])) if mode == 'prefilter' else
+                  len(np.union1d(kg.index.candidates(tp['head'], tp['tail']),
+                                 kg.lexical.search([tp['head'], tp['tail']], search.LEXICAL_CANDIDATES)[0]))
+                  for tp in near]
+        stats = measure(lambda: [search.cosine_search(tp, q) for tp, q in zip(near, q_near)], ctx['repeat'])
+        recall = sum(len(f & t) for f, t in zip(found, truth)) / max(sum(len(t) for t in truth), 1)
+        out.append(_result('hybrid_search', ctx, stats, len(near), 'queries/s', mode=mode,
+                           recall=round(recall, 3), rows_scored_mean=round(float(np.mean(scored)), 1),
+                           kg_rows=len(kg)))
+    search.KG_FILTER_MODE = prev
+    return out
+
+
+def bench_search_by_triples(ctx):
+    from src.qa.answerer.kg.loader import load_kg_df, load_kg_vectors
+    from src.qa.answerer.kg.search import search_by_triples
+    from src.qa.tools import kg_nl as knl
+    from src.qa.tools.kg_lines import load_line_store
+
+    ws = ctx['ws']
+    _, vecs_norm = load_kg_vectors(ws / 'data/processed/knowledge-graph/kg-triplet.emb.npy')
+    df, hp, rp, tp_col = load_kg_df(ws / KG_CSV)
+    store = load_line_store(ws / KG_LINES, len(df), source=ws / KG_CSV)
+    q_map = {(t['head'], t['relation'], t['tail']): q for t, q in zip(ctx['triples'], ctx['q_vecs'])}
+    batch = ctx['triples'][:10]
+
+    out = []
+    for variant, line_store in (('verbalize', None), ('line_store', store)):
+        def run():
+            return search_by_triples(batch, embed_fn=lambda t: q_map[tuple(t.values())],
+                                     kg_vecs_norm=vecs_norm, kg_df=df, build_block_fn=knl.build_block,
+                                     hp_col=hp, rp_col=rp, tp_col=tp_col, line_store=line_store)
+        stats = measure(run, ctx['repeat'])
+        out.append(_result('search_by_triples', ctx, stats, len(batch), 'triples/s', variant=variant))
+    return out
+
+
+def bench_deduplicate(ctx):
+    _install_stub(ctx['stub'])
+    from src.qa.verifier.core.dedup import deduplicate
+
+    lines = _hit_lines(ctx, 300)
+    stats = measure(lambda: deduplicate(lines), ctx['repeat'])
+    return [_result('deduplicate', ctx, stats, len(lines), 'lines/s', lines=len(lines))]
+
+
+def bench_dedupe(ctx):
+    from src.qa.answerer.core.embedding import dedupe, embed_text
+
+    lines = _hit_lines(ctx, 300)
+    stub = ctx['stub']
+    stats = measure(lambda: dedupe(lines, embed_fn=lambda ln: embed_text(stub, ln), threshold=0.80),
+                    ctx['repeat'])
+    return [_result('dedupe', ctx, stats, len(lines), 'lines/s', lines=len(lines))]
+
+
+def bench_insert_data(ctx):
+    from benchmarks.fake_neo4j import FakeDriver
+    from src.knowledge_base_operation.knowledge_graph.neo4j_loader import Neo4jLoader
+
+    triples = ctx['triples']
+    names = list(dict.fromkeys([t['head'] for t in triples] + [t['tail'] for t in triples]))
+    nodes = [{'id': f'e{i}', 'name': n, 'type': '人物', 'alias': n[-3:]} for i, n in enumerate(names)]
+    rels = [{'source_name': t['head'], 'target_name': t['tail'], 'relation': t['relation'],
+             'evidence': f"{t['head']}{t['relation']}{t['tail']}", 'doc_id': f'doc{i}', 'date': '2025-07-01'}
+            for i, t in enumerate(triples)]
+
+    loader = object.__new__(Neo4jLoader)  # 略過 __init__ 的真實連線
+    loader.database = None
+    out = []
+    for rtt in (0.0, ctx['neo4j_latency']):
+        loader.driver = FakeDriver(latency=rtt)
+        with _quiet():
+            stats = measure(lambda: loader.insert_data(nodes, rels), ctx['repeat'])
+        out.append(_result('insert_data', ctx, stats, len(rels), 'relations/s',
+                           nodes=len(nodes), rtt=rtt, calls=loader.driver.calls // (ctx['repeat'] + 1)))
+    return out
+
+
+def bench_process_single(ctx):
+    _install_stub(ctx['stub'])
+    from src.common import tracing
+    from src.qa.verifier.pipeline import _process_single
+
+    texts = [
+        '新聞日期：2025-07-01。' + '；'.join(f"{t['head']}{t['relation']}{t['tail']}" for t in ctx['triples'][i:i + 8])
+        for i in range(0, len(ctx['triples']), 8)
+    ][:ctx['docs']]
+    counter = iter(range(10 ** 9))
+
+    def run():
+        for text in texts:
+            _process_single(f'bench-{next(counter)}', text)
+
+    out = []
+    # routing=local-extract：抽取走 local 後端（LM_STUDIO_CONFIG.endpoint），判斷仍走 openai
+    for routing, backend in (('openai', 'openai'), ('local-extract', 'local')):
+        os.environ['LLM_BACKEND_EXTRACT'] = backend
+        servers = ctx['servers']
+        before = len(tracing.finished())
+        requests_before = {name: srv.requests for name, srv in servers.items()}
+        with _quiet():
+            stats = measure(run, ctx['repeat'], warmup=1)
+        traces = tracing.finished()[before:]
+        stages: Dict[str, float] = {}
+        for tr in traces:
+            for name, v in tr['stages'].items():
+                stages[name] = stages.get(name, 0.0) + v['seconds'] / len(traces)
+        calls = {name: srv.requests - requests_before[name] for name, srv in servers.items()}
+        out.append(_result('process_single', ctx, stats, len(texts), 'docs/s', docs=len(texts),
+                           llm_latency=ctx['llm_latency'], routing=routing, stage_seconds=stages,
+                           calls=calls))
+    os.environ.pop('LLM_BACKEND_EXTRACT', None)
+    return out
+
+
+def bench_embed_batcher(ctx):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.qa.tools.embed_batcher import EmbedBatcher
+
+    # 每次 forward 固定 3ms + 每 padded token 2μs；模型一次只跑一個 forward
+    model = StubEmbedder(call_overhead=0.003, token_cost=2e-6)
+    rng = np.random.default_rng(0)
+    pool = [f"{t['head']} {t['relation']} {t['tail']}" for t in ctx['triples']]
+    calls = [[pool[j] * int(rng.integers(1, 4)) for j in rng.integers(0, len(pool), rng.integers(1, 6))]
+             for _ in range(ctx['clients'] * 20)]
+
+    out = []
+    for variant in ('direct', 'batched'):
+        encoder = EmbedBatcher(model, max_wait_ms=2.0) if variant == 'batched' else model
+        latencies: List[float] = []
+
+        def one(texts):
+            t0 = time.perf_counter()
+            encoder.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+            latencies.append(time.perf_counter() - t0)
+
+        def run():
+            with ThreadPoolExecutor(ctx['clients']) as ex:
+                list(ex.map(one, calls))
+
+        stats = measure(run, ctx['repeat'])
+        if variant == 'batched':
+            encoder.close()
+        latencies.sort()
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        out.append(_result('embed_batcher', ctx, stats, len(calls), 'calls/s', variant=variant,
+                           clients=ctx['clients'], p99_ms=round(p99 * 1e3, 2)))
+    return out
+
+
+def bench_crawl_pts(ctx):
+    import asyncio
+
+    import requests
+
+    from benchmarks.fake_news_site import FakeNewsSite
+    from src.knowledge_base_operation.news_crawler import pts, pts_async
+
+    # 禮貌上限 20 req/s、每次回應 100ms；同步版對應 scrape_pts 的逐篇抓取 + 固定間隔
+    rate, latency = 20.0, 0.1
+    site = FakeNewsSite(pages=1, per_page=20, latency=latency).start()
+
+    def run_sync():
+        session = requests.Session()
+        items = []
+        for url in pts.extract_links(pts.fetch_html(f'{site.base_url}/category/1?page=1', session), site.base_url):
+            item = pts.parse_article(url, session)
+            if item:
+                items.append(item)
+            time.sleep(1 / rate)
+        assert len(items) == site.per_page
+        returned.append(len(items))
+
+    def run_async(validators):
+        items = asyncio.run(pts_async.crawl(1, site.base_url, rate=rate, burst=1, validators=validators))
+        assert validators.data and (len(items) == site.per_page or not items)
+        returned.append(len(items))
+
+    returned: List[int] = []  # 每次執行實際取得的文章數
+    out = []
+    try:
+        for variant in ('sync', 'async', 'async-revisit'):
+            revisit = pts_async.ValidatorCache()
+            if variant == 'async-revisit':
+                run_async(revisit)  # 先抓一次取得 ETag
+            fn = run_sync if variant == 'sync' else (lambda: run_async(
+                revisit if variant == 'async-revisit' else pts_async.ValidatorCache()))
+            site.reset_stats()
+            returned.clear()
+            with _quiet():
+                stats = measure(fn, ctx['repeat'], warmup=0)
+            articles, requests_per_run = returned[-1], site.requests // len(returned)
+            # revisit 全部回 304、沒有解析任何文章：改以每次執行的請求數計算吞吐量
+            items, unit = (articles, 'articles/s') if articles else (requests_per_run, 'requests/s')
+            out.append(_result('crawl_pts', ctx, stats, items, unit, variant=variant, articles=articles,
+                               requests=requests_per_run, rate_limit=rate, latency=latency,
+                               max_inflight=site.max_inflight, max_req_per_s=site.max_rate(),
+                               not_modified=site.not_modified))
+    finally:
+        site.stop()
+    return out
+
+
+def bench_browser_pool(ctx):
+    from benchmarks.fake_news_site import FakeDriver, FakeNewsSite
+    from src.knowledge_base_operation.news_crawler import pts
+    from src.knowledge_base_operation.news_crawler.browser_pool import BrowserPool
+
+    # 每頁渲染 200ms、driver 啟動 300ms；每個 driver 每秒最多 4 頁、每 8 頁重開
+    pages, render, startup, rate, restart_after = 24, 0.2, 0.3, 4.0, 8
+    site = FakeNewsSite(pages=1, per_page=pages, js_only_every=3).start()
+    urls = [f'{site.base_url}/article/{i}' for i in range(pages)]
+
+    def render_page(driver, url):
+        driver.get(url)
+        return pts.parse_article_html(driver.page_source, url)
+
+    out = []
+    try:
+        for size in (1, 4):
+            last = {}
+
+            def run():
+                with BrowserPool(lambda: FakeDriver(startup, render), size=size, rate=rate,
+                                 restart_after=restart_after) as pool:
+                    items = list(pool.map(render_page, urls))
+                assert all(items) and len(items) == pages
+                last['stats'] = pool.stats
+
+            site.reset_stats()
+            with _quiet():
+                stats = measure(run, ctx['repeat'], warmup=0)
+            out.append(_result('browser_pool', ctx, stats, pages, 'pages/s', workers=size,
+                               rate_per_worker=rate, restart_after=restart_after,
+                               restarts=last['stats'].restarts, started=last['stats'].started))
+    finally:
+        site.stop()
+    return out
+
+
+def bench_etl_freshness(ctx):
+    import shutil
+
+    from benchmarks.fake_neo4j import FakeDriver
+    from src.knowledge_base_operation.knowledge_graph.neo4j_loader import Neo4jLoader
+    from src.knowledge_base_operation.orchestrator.pipeline import Orchestrator
+    from src.knowledge_base_operation.orchestrator.work_queue import SqliteQueue
+    from src.qa.preliminary_work.embed_kg_incremental import update_embeddings
+    from src.qa.tools.kg_table import read_kg_table
+
+    stub, ws = ctx['stub'], ctx['ws']
+    docs = ctx['docs']
+    encode = lambda texts: stub.encode(list(texts))  # noqa: E731
+    loader = object.__new__(Neo4jLoader)  # 略過 __init__ 的真實連線
+    loader.database = None
+    loader.driver = FakeDriver(latency=ctx['neo4j_latency'])
+    counter = iter(range(10 ** 9))
+
+    out = []
+    for workers in (1, 4):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            table = tmp / 'kg.csv'
+            shutil.copy(ws / KG_CSV, table)
+            paths = dict(table_path=table, store_dir=tmp / 'emb-store', out_npy=tmp / 'kg.emb.npy',
+                         lines_dir=tmp / 'kg-lines', snapshots_dir=tmp / 'snapshots')
+            with _quiet():  # 既有 KG 先全量編碼一次（不計時）
+                update_embeddings(read_kg_table(table), table, encode, paths['store_dir'], paths['out_npy'],
+                                  paths['lines_dir'])
+            queue = SqliteQueue(tmp / 'queue.sqlite3')
+            orch = Orchestrator(queue, loader=loader, encode=encode, extract_workers=workers, **paths)
+
+            def run():
+                queue.put_many('extract', [{'key': f'bench:{next(counter)}', 'date': '2025-07-01',
+                                            'title': '測試新聞', 'content': '內容', 'origin': time.time()}
+                                           for _ in range(docs)])
+                orch.run(until_idle=True, poll=0.02)
+
+            with _quiet():
+                stats = measure(run, ctx['repeat'], warmup=0)
+            lat = sorted(queue.freshness(docs * ctx['repeat']))
+            out.append(_result('etl_freshness', ctx, stats, docs, 'articles/s', extract_workers=workers,
+                               docs=docs, llm_latency=ctx['llm_latency'],
+                               freshness_p50=round(statistics.median(lat), 3),
+                               freshness_max=round(lat[-1], 3), processed=orch.processed,
+                               kg_rows=len(read_kg_table(table))))
+            queue.close()
+    return out
+
+
+def bench_kg_hot_reload(ctx):
+    import gc
+    import shutil
+    import threading
+
+    from benchmarks.synthetic_kg import KG_NPY
+    from src.qa.tools.kg_versions import publish_version
+    from src.qa.verifier.kg.loader import get_kg, kg_manager, pin_kg
+    from src.qa.verifier.kg.search import cosine_search, kg_row_lines
+
+    ws, pairs = ctx['ws'], list(zip(ctx['triples'], ctx['q_vecs']))
+    manager = kg_manager()
+    publish = lambda: publish_version(manager.snapshots_dir, ws / KG_NPY, ws / KG_CSV, ws / KG_LINES)  # noqa: E731
+    with _quiet():
+        manager.current()
+    samples: List[tuple] = []  # (開始時間, 耗時, 是否全程同一版本)
+    stop = threading.Event()
+
+    def client(i: int) -> None:
+        while not stop.is_set():
+            tp, q = pairs[i % len(pairs)]
+            i += 1
+            t0 = time.perf_counter()
+            with pin_kg() as snap:
+                kg_row_lines(cosine_search(tp, q))
+                kg_row_lines(cosine_search(tp, q))
+                same = get_kg() is snap
+            samples.append((t0, time.perf_counter() - t0, same))
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(4)]
+    reloads = []
+    with _quiet():
+        for t in clients:
+            t.start()
+        time.sleep(0.5)
+        for _ in range(2):  # 服務中換版兩次
+            publish()
+            t0 = time.perf_counter()
+            manager.refresh()
+            reloads.append((t0, time.perf_counter()))
+            time.sleep(0.5)
+        stop.set()
+        for t in clients:
+            t.join()
+    gc.collect()
+    status = manager.status()
+    shutil.rmtree(manager.snapshots_dir, ignore_errors=True)
+
+    def pct(window):
+        lat = sorted(d for t0, d, _ in samples if window(t0))
+        return {'n': len(lat), 'p50_ms': round(lat[len(lat) // 2] * 1e3, 2) if lat else None,
+                'p99_ms': round(lat[int(len(lat) * 0.99)] * 1e3, 2) if lat else None}
+
+    in_reload = lambda t: any(a <= t <= b for a, b in reloads)  # noqa: E731
+    durations = sorted(d for _, d, _ in samples)
+    stats = {'min': durations[0], 'median': statistics.median(durations), 'mean': statistics.fmean(durations),
+             'p95': durations[int(0.95 * (len(durations) - 1))], 'repeat': len(durations)}
+    return [_result('kg_hot_reload', ctx, stats, 1, 'requests/s', clients=len(clients),
+                    steady=pct(lambda t: not in_reload(t)), during_reload=pct(in_reload),
+                    reload_seconds=[round(b - a, 3) for a, b in reloads],
+                    mixed_version_requests=sum(not same for *_, same in samples),
+                    version=status['version'], reloads=status['reloads'],
+                    retired_alive=status['retired_alive'])]
+
+
+def _synthetic_vectors(rows: int, dim: int, seed: int = 0, chunk: int = 1 << 16) -> Path:
+    """合成正規化 float32 向量檔（分塊寫入，不需整份放進記憶體）；已存在時沿用。"""
+    path = WORK_DIR / f'vecs-{rows}x{dim}-s{seed}.norm.npy'
+    if path.is_file():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(rows, dim))
+    rng = np.random.default_rng(seed)
+    for a in range(0, rows, chunk):
+        block = rng.standard_normal((min(chunk, rows - a), dim), dtype=np.float32)
+        out[a:a + chunk] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    out.flush()
+    del out
+    os.replace(tmp, path)
+    return path
+
+
+def bench_kg_shards(ctx):
+    from src.qa.tools.kg_shards import ShardedSearcher, scan_topk
+
+    rows, dim, top_k, sim_th = ctx['shard_rows'], ctx['shard_dim'], 100, 0.8
+    path = _synthetic_vectors(rows, dim)
+    vecs = np.load(path, mmap_mode='r')
+    # 查詢為既有列加上雜訊：每個查詢都有高於門檻的命中
+    rng = np.random.default_rng(1)
+    picks = np.sort(rng.choice(rows, size=16, replace=False))
+    q = np.asarray(vecs[picks]) + rng.standard_normal((16, dim), dtype=np.float32) * (0.3 / np.sqrt(dim))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+    base = scan_topk(vecs, q, top_k, sim_th)
+    stats = measure(lambda: scan_topk(vecs, q, top_k, sim_th), ctx['repeat'])
+    out = [_result('kg_shards', ctx, stats, len(q), 'queries/s', workers=0, rows=rows, dim=dim)]
+    for workers in ctx['shard_workers']:
+        with ShardedSearcher(path, workers) as searcher:
+            hits = searcher.topk_many(q, top_k, sim_th)
+            exact = all(np.array_equal(np.sort(a[0]), np.sort(b[0])) for a, b in zip(hits, base))
+            stats = measure(lambda: searcher.topk_many(q, top_k, sim_th), ctx['repeat'])
+            single = measure(lambda: searcher.topk(q[0], top_k, sim_th), ctx['repeat'])
+        out.append(_result('kg_shards', ctx, stats, len(q), 'queries/s', workers=workers, rows=rows, dim=dim,
+                           single_query_ms=round(single['median'] * 1e3, 2), exact=exact))
+    for r in out:
+        r['size'] = rows
+    return out
+
+
+BENCH_FUNCS: Dict[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = {
+    name: globals()[f'bench_{name}'] for name in BENCHES
+}
+
+
+# ─────────────────────────── 子行程 ───────────────────────────
+def _worker(args: argparse.Namespace) -> None:
+    from benchmarks.fake_openai import FakeOpenAI
+
+    ws = Path(args.ws)
+    triples = json.loads((ws / 'sample-triples.json').read_text(encoding='utf-8'))[:args.queries]
+    server = FakeOpenAI(triples, latency=args.llm_latency).start()
+    local_server = FakeOpenAI(triples, latency=args.llm_latency).start()
+
+    # 需在 import 專案模組前設定
+    os.environ.update({
+        'PROJECT_ROOT': str(ws),
+        'KG_TABLE_PATH': str(ws / KG_CSV),
+        'KG_BACKEND': 'snapshot',
+        'GPT_API': 'sk-bench',
+        'GPT_MODEL': 'bench-model',
+        'OPENAI_BASE_URL': server.base_url,
+        'MODEL_CONFIG_endpoint': local_server.base_url,
+        'MODEL_ID': 'bench-local-model',
+        'NEO4J_URI': 'bolt://127.0.0.1:7687',
+        'NEO4J_USER': 'bench',
+        'NEO4J_PASSWORD': 'bench',
+        'MONGODB_URI': 'mongodb://127.0.0.1:27017',
+    })
+
+    stub = StubEmbedder()
+    q_vecs = stub.encode([f"{t['head']} {t['relation']} {t['tail']}" for t in triples])
+    q_vecs /= np.linalg.norm(q_vecs, axis=1, keepdims=True)
+    ctx = {'ws': ws, 'size': args.size, 'repeat': args.repeat, 'triples': triples, 'q_vecs': q_vecs,
+           'stub': stub, 'docs': args.docs, 'llm_latency': args.llm_latency,
+           'neo4j_latency': args.neo4j_latency, 'clients': args.clients,
+           'shard_rows': args.shard_rows, 'shard_dim': args.shard_dim,
+           'shard_workers': [int(w) for w in args.shard_workers.split(',')],
+           'servers': {'openai': server, 'local': local_server}}
+
+    results = []
+    try:
+        for name in args.only:
+            t0 = time.perf_counter()
+            try:
+                results.extend(BENCH_FUNCS[name](ctx))
+                print(f'  ✔ {name} ({time.perf_counter() - t0:.1f}s)', file=sys.__stderr__)
+            except Exception as exc:  # 缺依賴或執行失敗：記錄後繼續其他項目
+                results.append({'name': name, 'size': args.size, 'error': f'{type(exc).__name__}: {exc}'})
+                print(f'  ✘ {name}: {exc}', file=sys.__stderr__)
+    finally:
+        server.stop()
+        local_server.stop()
+    Path(args.worker_out).write_text(json.dumps(results, ensure_ascii=False), encoding='utf-8')
+
+
+# ─────────────────────────── 主程式 ───────────────────────────
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'benchmark':<34}{'size':>10}{'median':>12}{'throughput':>22}")
+    for r in results:
+        label = r['name'] + ''.join(f"[{v}]" for k, v in r.get('params', {}).items()
+                                    if k in ('mode', 'variant', 'rtt', 'routing', 'workers'))
+        if 'error' in r:
+            print(f"{label:<34}{r['size']:>10,}  ERROR {r['error']}")
+            continue
+        tp = r['throughput']
+        print(f"{label:<34}{r['size']:>10,}{r['stats']['median'] * 1e3:>10.2f}ms"
+              f"{tp['value']:>14,.1f} {tp['unit']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='FactGraph offline benchmarks')
+    parser.add_argument('--sizes', default='10000', help='KG 列數，逗號分隔')
+    parser.add_argument('--only', default=','.join(BENCHES), help='只執行指定項目，逗號分隔')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=50, help='檢索基準使用的三元組數')
+    parser.add_argument('--docs', type=int, default=3, help='process_single / etl_freshness 每輪處理的新聞數')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='fake OpenAI 每次回應延遲（秒）')
+    parser.add_argument('--neo4j-latency', type=float, default=0.001, help='fake driver 每次 run 延遲（秒）')
+    parser.add_argument('--clients', type=int, default=16, help='embed_batcher 並行呼叫的執行緒數')
+    parser.add_argument('--shard-rows', type=int, default=5_000_000, help='kg_shards 合成向量列數')
+    parser.add_argument('--shard-dim', type=int, default=768, help='kg_shards 合成向量維度')
+    parser.add_argument('--shard-workers', default='1,2,4,8', help='kg_shards worker 數，逗號分隔')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='結果 JSON 路徑（預設 benchmarks/results/）')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--ws', help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.only = [b for b in args.only.split(',') if b]
+    unknown = set(args.only) - set(BENCHES)
+    if unknown:
+        parser.error(f'未知的基準項目：{sorted(unknown)}')
+
+    if args.worker:
+        _worker(args)
+        return
+
+    results: List[Dict[str, Any]] = []
+    for size in (int(s) for s in args.sizes.split(',')):
+        ws = generate_kg(WORK_DIR / f'kg-{size}-s{args.seed}', size, seed=args.seed)
+        print(f'▶ size={size:,}  ({ws})')
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as fp:
+            worker_out = fp.name
+        cmd = [sys.executable, '-m', 'benchmarks.run', '--worker', '--ws', str(ws), '--size', str(size),
+               '--worker-out', worker_out, '--only', ','.join(args.only), '--repeat', str(args.repeat),
+               '--queries', str(args.queries), '--docs', str(args.docs),
+               '--llm-latency', str(args.llm_latency), '--neo4j-latency', str(args.neo4j_latency),
+               '--clients', str(args.clients), '--shard-rows', str(args.shard_rows),
+               '--shard-dim', str(args.shard_dim), '--shard-workers', args.shard_workers]
+        subprocess.run(cmd, cwd=REPO_ROOT, check=True)
+        results.extend(json.loads(Path(worker_out).read_text(encoding='utf-8')))
+        os.unlink(worker_out)
+
+    payload = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'args': {k: v for k, v in vars(args).items() if k not in ('worker', 'ws', 'size', 'worker_out')},
+        },
+        'results': results,
+    }
+    out = Path(args.out) if args.out else \
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}_{payload['meta']['git_commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+    _print_table(results)
+    print(f'\n✅ 結果：{out}')
+
+
+if __name__ == '__main__':
+    main()
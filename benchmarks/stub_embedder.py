@@ -0,0 +1,66 @@
+"""
+SentenceTransformer 替身
+
+以字元 bigram 雜湊到固定亂數表再加總，產生可重現的向量：
+相同字串向量相同、共享字元越多相似度越高，足以讓檢索與去重走到真實分支。
+"""
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from typing import List, Sequence
+
+import numpy as np
+
+DIM = 768
+
+
+class StubEmbedder:
+    """
+    與 SentenceTransformer.encode 相容的假模型。
+
+    Args:
+        dim: 向量維度（CKIP bert-base-chinese 為 768）
+        table_size: bigram 雜湊桶數
+        latency: 每句模擬的推論時間（秒），預設 0
+        seed: 亂數表種子
+        call_overhead: 每次 encode 呼叫的固定成本（秒），模擬 forward pass 啟動開銷
+        token_cost: 每個 padded token（句數 × 最長句長度）的成本（秒）
+    """
+
+    def __init__(self, dim: int = DIM, table_size: int = 1 << 14, latency: float = 0.0, seed: int = 0,
+                 call_overhead: float = 0.0, token_cost: float = 0.0) -> None:
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.latency = latency
+        self.call_overhead = call_overhead
+        self.token_cost = token_cost
+        # 模擬單一模型同時只能跑一個 forward pass
+        self._lock = threading.Lock()
+        self._table = rng.standard_normal((table_size, dim)).astype(np.float32)
+        self._size = table_size
+
+    def _ids(self, text: str) -> List[int]:
+        grams = [text[i:i + 2] for i in range(max(len(text) - 1, 1))]
+        return [zlib.crc32(g.encode('utf-8')) % self._size for g in grams]
+
+    def encode(self, sentences: str | Sequence[str], convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, normalize_embeddings: bool = False, **_) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            out[i] = self._table[self._ids(text)].sum(axis=0)
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        if self.latency:
+            time.sleep(self.latency * len(texts))
+        if self.call_overhead or self.token_cost:
+            padded = len(texts) * max((len(t) for t in texts), default=0)
+            with self._lock:
+                time.sleep(self.call_overhead + self.token_cost * padded)
+        return out[0] if single else out
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
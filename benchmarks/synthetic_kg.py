@@ -0,0 +1,124 @@
+"""
+合成 KG 產生器
+
+依指定列數產生與 APOC 匯出相同欄位的 KG 表格與對齊向量，目錄結構與專案一致，
+可直接作為 PROJECT_ROOT 使用：
+
+    <root>/data/raw/knowledge-graph/neo4j-kg-raw-graph.csv
+    <root>/data/processed/knowledge-graph/kg-triplet.emb.npy
+    <root>/data/processed/knowledge-graph/kg-lines/      （預先計算敘述庫）
+    <root>/sample-triples.json                          （fake_openai 抽取結果的來源）
+    <root>/src → 專案 src（prompt 檔案路徑依 PROJECT_ROOT 推得）
+
+實體熱門度採 Zipf 分佈，模擬少數熱門實體佔多數邊的情況。
+
+執行方式：
+  python -m benchmarks.synthetic_kg --rows 100000 --out benchmarks/.work/kg-100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stub_embedder import StubEmbedder
+from src.qa.tools.kg_lines import build_line_store, load_line_store
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+KG_CSV = Path('data/raw/knowledge-graph/neo4j-kg-raw-graph.csv')
+KG_NPY = Path('data/processed/knowledge-graph/kg-triplet.emb.npy')
+KG_LINES = Path('data/processed/knowledge-graph/kg-lines')
+
+RELATIONS = [
+    '擔任', '隸屬', '出席', '宣布', '批評', '支持', '會見', '參與', '提出', '調查',
+    '起訴', '發表', '訪問', '合作', '投資', '簽署', '否認', '回應', '提名', '任命',
+]
+ENTITY_TYPES = ['人物', '組織', '地點', '事件', '政策']
+
+
+def _entity_name(i: int) -> str:
+    return f'實體{i:06d}'
+
+
+def generate_kg(root: Path, rows: int, entities: int | None = None, seed: int = 0,
+                embedder: StubEmbedder | None = None, sample: int = 200) -> Path:
+    """產生合成 KG 至 root，回傳 root。已存在且列數相同時直接沿用（敘述庫格式過期時只重建敘述庫）。"""
+    root = Path(root)
+    meta_path = root / 'synthetic.json'
+    if meta_path.is_file() and json.loads(meta_path.read_text())['rows'] == rows:
+        if load_line_store(root / KG_LINES, rows, source=root / KG_CSV) is None:
+            build_line_store(pd.read_csv(root / KG_CSV), root / KG_LINES, source=root / KG_CSV)
+        return root
+
+    entities = entities or max(rows // 5, 10)
+    rng = np.random.default_rng(seed)
+    heads = np.minimum(rng.zipf(1.3, rows), entities) - 1
+    tails = (heads + 1 + np.minimum(rng.zipf(1.3, rows), entities - 1)) % entities
+    rels = rng.integers(0, len(RELATIONS), rows)
+    days = rng.integers(1, 366, rows)
+
+    def props(i: int) -> str:
+        return json.dumps({'id': f'e{i}', 'name': _entity_name(i),
+                           'type': ENTITY_TYPES[i % len(ENTITY_TYPES)]}, ensure_ascii=False)
+
+    entity_props = [props(i) for i in range(entities)]
+    head_names = [_entity_name(i) for i in heads]
+    tail_names = [_entity_name(i) for i in tails]
+    relations = [RELATIONS[r] for r in rels]
+    dates = pd.to_datetime('2025-01-01') + pd.to_timedelta(days - 1, unit='D')
+    df = pd.DataFrame({
+        'head': head_names,
+        'relation': relations,
+        'tail': tail_names,
+        'head_props': [entity_props[i] for i in heads],
+        'rel_props': [
+            json.dumps({'evidence': f'{h}{r}{t}的相關報導', 'date': d.strftime('%Y-%m-%d'),
+                        'doc_id': f'doc{k}'}, ensure_ascii=False)
+            for k, (h, r, t, d) in enumerate(zip(head_names, relations, tail_names, dates))
+        ],
+        'tail_props': [entity_props[i] for i in tails],
+    })
+
+    t0 = time.perf_counter()
+    (root / KG_CSV).parent.mkdir(parents=True, exist_ok=True)
+    (root / KG_NPY).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(root / KG_CSV, index=False)
+
+    embedder = embedder or StubEmbedder()
+    sentences = (df['head'] + ' ' + df['relation'] + ' ' + df['tail']).tolist()
+    np.save(root / KG_NPY, embedder.encode(sentences))
+    build_line_store(df, root / KG_LINES, source=root / KG_CSV)
+
+    picks = rng.choice(rows, size=min(sample, rows), replace=False)
+    triples = [{'head': head_names[i], 'relation': relations[i], 'tail': tail_names[i]} for i in picks]
+    (root / 'sample-triples.json').write_text(json.dumps(triples, ensure_ascii=False), encoding='utf-8')
+
+    src_link = root / 'src'
+    if not src_link.exists():
+        os.symlink(REPO_ROOT / 'src', src_link, target_is_directory=True)
+
+    meta_path.write_text(json.dumps({'rows': rows, 'entities': entities, 'seed': seed,
+                                     'build_seconds': round(time.perf_counter() - t0, 3)}))
+    return root
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate a synthetic KG (CSV + npy)')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--entities', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+
+    out = Path(args.out or f'benchmarks/.work/kg-{args.rows}')
+    generate_kg(out, args.rows, args.entities, args.seed)
+    print(f'✅ {out}（{args.rows:,} 列）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 後端與各階段路由
+
+抽取與判斷原本都固定打 OpenAI；此模組讓每個階段各自選擇後端，
+任何 OpenAI 相容伺服器（LM Studio、llama.cpp server、vLLM …）都可作為 local 後端：
+  - openai : OpenAI 雲端（GPT_API / GPT_MODEL，OPENAI_BASE_URL 可覆寫位址）
+  - local  : 沿用 src.config.LM_STUDIO_CONFIG（endpoint、model_id 與 top_k / min_p / repeat_penalty）
+
+階段（stage）：
+  - extract    : QA 三元組抽取（verifier / answerer）
+  - judge      : QA 最終判斷（verifier / answerer）
+  - kg_extract : KG 建置時的新聞實體關係抽取
+
+設定（環境變數，呼叫時讀取）：
+  LLM_BACKEND=openai|local          所有階段的預設後端
+  LLM_BACKEND_<STAGE>=openai|local  單一階段覆寫，例如 LLM_BACKEND_EXTRACT=local
+  LLM_MODEL_<STAGE>=<model>         單一階段指定模型
+  LOCAL_LLM_API_KEY                 local 伺服器需要 key 時設定（預設 lm-studio）
+  LOCAL_LLM_JSON_MODE=1             local 伺服器支援 response_format=json_object 時開啟
+
+提供：
+  - `for_stage(stage)` : 取得該階段的 `StageLLM`（`.chat(messages, **kwargs)`）
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from .llm_client import LLMClient, get_llm
+
+__all__ = ['STAGES', 'BACKENDS', 'StageLLM', 'for_stage']
+
+STAGES = ('extract', 'judge', 'kg_extract')
+BACKENDS = ('openai', 'local')
+
+# LM Studio / llama.cpp 的額外取樣參數（不在 OpenAI schema 內，以 extra_body 傳遞）
+_LOCAL_SAMPLING = ('top_k', 'min_p', 'repeat_penalty')
+
+
+@dataclass
+class StageLLM:
+    """某一階段的 LLM：client、模型與該後端固定附帶的參數。"""
+
+    stage: str
+    backend: str
+    client: LLMClient
+    model: str | None
+    extra_body: Dict[str, Any] = field(default_factory=dict)
+    json_mode: bool = True
+
+    def chat(self, messages, **kwargs: Any) -> str:
+        """kwargs 同 `LLMClient.chat`；model 以階段設定優先，呼叫端的 model 作為 openai 後端的預設值。"""
+        model = self.model or kwargs.get('model')
+        if not model:
+            raise RuntimeError(f'LLM 階段 {self.stage} 未設定模型（LLM_MODEL_{self.stage.upper()}）')
+        kwargs['model'] = model
+        if not self.json_mode:
+            kwargs.pop('response_format', None)
+        if self.extra_body:
+            kwargs['extra_body'] = {**self.extra_body, **kwargs.get('extra_body', {})}
+        return self.client.chat(messages, **kwargs)
+
+
+def _local_base_url(endpoint: str) -> str:
+    # LM_STUDIO_CONFIG.endpoint 可能是完整的 /v1/chat/completions
+    return endpoint.rstrip('/').removesuffix('/chat/completions')
+
+
+def for_stage(stage: str, api_key: str | None = None) -> StageLLM:
+    """
+    依環境變數決定 stage 的後端。api_key 僅用於 openai 後端（預設讀取 GPT_API）。
+    client 由 `get_llm` 依 (api_key, base_url) 共用，因此同一後端的各階段共享連線池與限流。
+    """
+    if stage not in STAGES:
+        raise ValueError(f'未知的 LLM 階段：{stage}（可用：{", ".join(STAGES)}）')
+    key = stage.upper()
+    backend = os.getenv(f'LLM_BACKEND_{key}', os.getenv('LLM_BACKEND', 'openai')).lower()
+    model = os.getenv(f'LLM_MODEL_{key}') or None
+
+    if backend == 'openai':
+        api_key = api_key or os.getenv('GPT_API')
+        if not api_key:
+            raise RuntimeError('環境變數 GPT_API 尚未設定')
+        return StageLLM(stage, backend, get_llm(api_key), model)
+
+    if backend == 'local':
+        from ..config import LM_STUDIO_CONFIG
+
+        endpoint = LM_STUDIO_CONFIG.get('endpoint')
+        if not endpoint:
+            raise RuntimeError('local 後端需要環境變數 MODEL_CONFIG_endpoint（OpenAI 相容伺服器位址）')
+        client = get_llm(os.getenv('LOCAL_LLM_API_KEY', 'lm-studio'), _local_base_url(endpoint))
+        extra = {k: LM_STUDIO_CONFIG[k] for k in _LOCAL_SAMPLING if LM_STUDIO_CONFIG.get(k) is not None}
+        return StageLLM(stage, backend, client, model or LM_STUDIO_CONFIG.get('model_id') or 'local-model',
+                        extra_body=extra, json_mode=os.getenv('LOCAL_LLM_JSON_MODE', '0') == '1')
+
+    raise ValueError(f'未知的 LLM 後端：{backend}（可用：{", ".join(BACKENDS)}）')
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共用 LLM client（async 核心 + 同步介面）
+
+所有 OpenAI 相容 API 呼叫（verifier 抽取 / 判斷、answerer GPTClient、KG 建置抽取）
+都經過此模組，避免各自建立 client 並無限重試：
+  - 連線池：每組 (api_key, base_url) 共用一個 AsyncOpenAI 與 httpx 連線池
+  - 併發上限：全域 semaphore（LLM_MAX_CONCURRENCY）
+  - TPM 限流：以 token bucket 預扣「估計 prompt tokens + max_tokens」，
+    回應後依實際 usage 退還差額（LLM_TPM，0 表示不限）
+  - 重試：單次呼叫最多 LLM_MAX_RETRIES 次，指數退避 + full jitter（串流已送出 delta 後不重試）；
+    另有全域重試預算（重試數不超過近 60 秒請求數 × LLM_RETRY_BUDGET），
+    API 大量限流時不會所有請求一起重試造成 thundering herd
+  - 尊重 Retry-After / retry-after-ms 標頭
+  - 每次嘗試的總時限（deadline，含串流讀取）
+
+提供：
+  - `get_llm(api_key, base_url)` : 取得共用 client
+  - `LLMClient.chat(...)`        : 同步呼叫（於背景 event loop 執行，保留呼叫端的 tracing context）
+  - `LLMClient.achat(...)`       : async 呼叫
+  - `LLMError`                   : 不可重試的錯誤或重試用盡
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+from . import tracing
+
+__all__ = ['LLMClient', 'LLMError', 'get_llm']
+
+MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+TPM_LIMIT = int(os.getenv('LLM_TPM', '0'))
+MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+RETRY_BUDGET = float(os.getenv('LLM_RETRY_BUDGET', '0.2'))
+DEADLINE = float(os.getenv('LLM_TIMEOUT', '180'))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+Messages = List[Dict[str, str]]
+
+
+class LLMError(RuntimeError):
+    """LLM 呼叫失敗（不可重試的錯誤、重試次數或全域重試預算用盡）。"""
+
+
+# ──────────────────────────── 背景 event loop ────────────────────────────
+class _LoopThread:
+    """所有 LLM 呼叫共用的 event loop（daemon 執行緒），讓同步呼叫端也能共享連線池與限流器。"""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='llm-client', daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """在背景 loop 執行 coro；task 沿用呼叫端 contextvars（tracing 的 usage 才會記到正確的 trace）。"""
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+
+        def _start() -> None:
+            task = self.loop.create_task(coro)
+
+            def _done(t: asyncio.Task) -> None:
+                if t.cancelled():
+                    fut.cancel()
+                elif t.exception() is not None:
+                    fut.set_exception(t.exception())
+                else:
+                    fut.set_result(t.result())
+
+            task.add_done_callback(_done)
+
+        self.loop.call_soon_threadsafe(_start, context=contextvars.copy_context())
+        return fut
+
+
+@lru_cache(maxsize=1)
+def _loop_thread() -> _LoopThread:
+    return _LoopThread()
+
+
+# ──────────────────────────── 限流與重試預算 ────────────────────────────
+class _TokenBucket:
+    """每分鐘 token 額度；acquire 不足時等待補充。僅在背景 loop 內使用。"""
+
+    def __init__(self, tpm: int) -> None:
+        self.capacity = float(tpm)
+        self.tokens = float(tpm)
+        self.rate = tpm / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, n: float) -> None:
+        n = min(n, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            await asyncio.sleep((n - self.tokens) / self.rate)
+
+    def refund(self, n: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + n)
+
+
+class _RetryBudget:
+    """近 window 秒內的重試數不得超過請求數 × ratio（至少允許 min_retries 次）。"""
+
+    def __init__(self, ratio: float, window: float = 60.0, min_retries: int = 3) -> None:
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_retries
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+
+    def _trim(self, q: deque, now: float) -> None:
+        while q and now - q[0] > self.window:
+            q.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._trim(self._requests, now)
+        self._trim(self._retries, now)
+        if len(self._retries) >= max(self.min_retries, self.ratio * len(self._requests)):
+            return False
+        self._retries.append(now)
+        return True
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """由回應標頭取得建議等待秒數（retry-after-ms、retry-after 秒數或 HTTP 日期）。"""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    ms = headers.get('retry-after-ms')
+    if ms:
+        try:
+            return float(ms) / 1e3
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def _retryable(exc: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+    if isinstance(exc, (RateLimitError, APIConnectionError, APITimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def _estimate_tokens(messages: Messages, max_tokens: int | None) -> int:
+    # 中文約一字一 token，英文更少；以字元數保守估計
+    return sum(len(m.get('content') or '') for m in messages) + (max_tokens or 1024)
+
+
+# ──────────────────────────── Client ────────────────────────────
+class LLMClient:
+    """
+    共用的 OpenAI 相容 client。
+
+    Args:
+        api_key: API key（本地伺服器可為任意字串）
+        base_url: API 位址；None 時由 SDK 讀取 OPENAI_BASE_URL
+        max_concurrency: 同時進行的請求上限
+        tpm: 每分鐘 token 上限，0 表示不限
+        max_retries: 單次呼叫的最多重試次數
+    """
+
+    def __init__(self, api_key: str | None, base_url: str | None = None,
+                 max_concurrency: int = MAX_CONCURRENCY, tpm: int = TPM_LIMIT,
+                 max_retries: int = MAX_RETRIES) -> None:
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._tpm = tpm
+        self._client = None
+        self._sem: asyncio.Semaphore | None = None
+        self._bucket: _TokenBucket | None = None
+        self._budget = _RetryBudget(RETRY_BUDGET)
+
+    def _ensure(self) -> None:
+        """於背景 loop 內第一次使用時建立 AsyncOpenAI、連線池與限流器。"""
+        if self._client is not None:
+            return
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        http_client = DefaultAsyncHttpxClient(limits=httpx.Limits(
+            max_connections=self.max_concurrency * 2,
+            max_keepalive_connections=self.max_concurrency,
+        ))
+        # SDK 內建重試關閉，統一由本模組控制
+        self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                   max_retries=0, http_client=http_client)
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = _TokenBucket(self._tpm) if self._tpm > 0 else None
+
+    async def _attempt(self, messages: Messages, stream: bool,
+                       on_delta: Optional[Callable[[str], None]], kwargs: Dict[str, Any]) -> tuple[str, Any]:
+        if stream:
+            resp = await self._client.chat.completions.create(
+                messages=messages, stream=True, stream_options={'include_usage': True}, **kwargs)
+            chunks: List[str] = []
+            usage = None
+            async for ch in resp:
+                usage = ch.usage or usage  # 最後一個 chunk 只帶 usage，沒有 choices
+                if not ch.choices:
+                    continue
+                delta = ch.choices[0].delta.content
+                if delta:
+                    if on_delta:
+                        on_delta(delta)
+                    chunks.append(delta)
+            return ''.join(chunks), usage
+        resp = await self._client.chat.completions.create(messages=messages, **kwargs)
+        return resp.choices[0].message.content or '', resp.usage
+
+    async def _run(self, messages: Messages, stream: bool, on_delta: Optional[Callable[[str], None]],
+                   deadline: float, kwargs: Dict[str, Any]) -> str:
+        self._ensure()
+        estimate = _estimate_tokens(messages, kwargs.get('max_tokens'))
+        self._budget.record_request()
+        delivered = False
+
+        def emit(delta: str) -> None:
+            nonlocal delivered
+            delivered = True
+            on_delta(delta)
+
+        for attempt in range(self.max_retries + 1):
+            if self._bucket:
+                await self._bucket.acquire(estimate)
+            try:
+                async with self._sem:
+                    text, usage = await asyncio.wait_for(
+                        self._attempt(messages, stream, emit if on_delta else None, kwargs), timeout=deadline)
+            except Exception as exc:
+                if self._bucket:
+                    self._bucket.refund(estimate)
+                if not _retryable(exc):
+                    raise LLMError(f'LLM 呼叫失敗：{exc}') from exc
+                if delivered:
+                    # 已送出的 delta 無法收回，重試會讓呼叫端（echo 輸出、TripleStream）收到重複內容
+                    raise LLMError(f'LLM 串流中斷（已輸出部分內容，不重試）：{exc}') from exc
+                if attempt == self.max_retries:
+                    raise LLMError(f'LLM 重試 {self.max_retries} 次仍失敗：{exc}') from exc
+                if not self._budget.try_spend():
+                    raise LLMError(f'LLM 全域重試預算用盡：{exc}') from exc
+                wait = _retry_after(exc)
+                if wait is None:
+                    wait = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                tracing.count('llm_retries')
+                print(f'[WARN] LLM 呼叫失敗（{type(exc).__name__}），{wait:.1f}s 後重試 '
+                      f'({attempt + 1}/{self.max_retries})')
+                await asyncio.sleep(wait)
+                continue
+            tracing.record_usage(usage)
+            if self._bucket and usage is not None:
+                self._bucket.refund(max(0, estimate - (getattr(usage, 'total_tokens', 0) or 0)))
+            return text.strip()
+        raise AssertionError('unreachable')
+
+    async def achat(self, messages: Messages, *, stream: bool = False,
+                    on_delta: Optional[Callable[[str], None]] = None,
+                    deadline: float = DEADLINE, **kwargs: Any) -> str:
+        """
+        async 聊天補全，回傳完整文字（已 strip）。
+        kwargs 直接傳給 `chat.completions.create`（model、temperature、response_format、timeout…）；
+        deadline 為單次嘗試（含串流讀取）的總時限秒數。
+        """
+        return await asyncio.wrap_future(
+            _loop_thread().submit(self._run(messages, stream, on_delta, deadline, kwargs)))
+
+    def chat(self, messages: Messages, *, stream: bool = False,
+             on_delta: Optional[Callable[[str], None]] = None,
+             deadline: float = DEADLINE, **kwargs: Any) -> str:
+        """同步版 `achat`（供 pipeline 等同步程式碼使用）。"""
+        return _loop_thread().submit(self._run(messages, stream, on_delta, deadline, kwargs)).result()
+
+
+@lru_cache(maxsize=None)
+def get_llm(api_key: str | None = None, base_url: str | None = None) -> LLMClient:
+    """同一組 (api_key, base_url) 共用一個 client（連線池、併發與 TPM 限流皆共享）。"""
+    return LLMClient(api_key or os.getenv('GPT_API'), base_url)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+輕量追蹤與計量模組（QA pipelines 共用）
+
+提供：
+  - `trace(pipeline, request_id)` : 一次請求的追蹤範圍（context manager）
+  - `span(name, **attrs)`         : 階段計時（load / embed / extract_round_N / search /
+                                    dedup / verbalize / context / judge / write）
+  - `count(name, n)`              : 計數（命中數、token 數…）
+  - `record_usage(usage)`         : 累加 OpenAI usage 的 prompt / completion tokens
+  - `finished()`                  : 本行程已完成的 trace（dict）列表
+  - `dump(path)`                  : CLI 模式輸出 JSON trace 檔
+  - `ingest_trace_file(path)`     : 讀回 CLI 子行程輸出的 trace 檔並計入 metrics
+  - `render_metrics()`            : Prometheus 文字格式（/metrics）
+  - `profiled(name, engine)`      : 選用的 cProfile / pyinstrument 分析
+
+未在 `trace()` 範圍內呼叫 `span` / `count` 時不做任何記錄，模組可安全地在任何地方使用。
+prometheus_client 為選用依賴；未安裝時以內建的簡易計量輸出同格式文字。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+__all__ = [
+    'Trace', 'trace', 'span', 'count', 'record_usage', 'current',
+    'finished', 'dump', 'ingest_trace_file', 'render_metrics', 'profiled',
+]
+
+PROFILE_DIR = Path(os.getenv('FACTGRAPH_PROFILE_DIR', 'logs/profiles'))
+
+
+# ──────────────────────────── Trace ────────────────────────────
+class Trace:
+    """單次請求的 span 與計數紀錄。"""
+
+    def __init__(self, pipeline: str, request_id: str | None = None) -> None:
+        self.pipeline = pipeline
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.status = 'ok'
+        self.duration = 0.0
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                'name': name,
+                'start': round(start - self._t0, 6),
+                'duration': round(time.perf_counter() - start, 6),
+                **({'attrs': attrs} if attrs else {}),
+            })
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] += n
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        """同名 span 的總時間與次數。"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            t = totals.setdefault(s['name'], {'seconds': 0.0, 'calls': 0})
+            t['seconds'] = round(t['seconds'] + s['duration'], 6)
+            t['calls'] += 1
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pipeline': self.pipeline,
+            'request_id': self.request_id,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 6),
+            'status': self.status,
+            'stages': self.stage_totals(),
+            'counters': dict(self.counters),
+            'spans': self.spans,
+        }
+
+
+_current: ContextVar[Trace | None] = ContextVar('factgraph_trace', default=None)
+_finished: List[Dict[str, Any]] = []
+_finished_lock = threading.Lock()
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def trace(pipeline: str, request_id: str | None = None, *, verbose: bool = True) -> Iterator[Trace]:
+    """
+    開啟一次請求的追蹤；離開時（含例外與 sys.exit）記錄狀態、
+    計入 metrics，並保留至 `dump()` 輸出。
+    """
+    tr = Trace(pipeline, request_id)
+    token = _current.set(tr)
+    try:
+        yield tr
+    except BaseException:
+        tr.status = 'error'
+        raise
+    finally:
+        tr.duration = time.perf_counter() - tr._t0
+        _current.reset(token)
+        data = tr.to_dict()
+        _record_metrics(data)
+        with _finished_lock:
+            _finished.append(data)
+        if verbose:
+            stages = '  '.join(f"{k} {v['seconds']:.2f}s" for k, v in data['stages'].items())
+            print(f'⏱️ [{pipeline}] {tr.request_id} 共 {tr.duration:.1f}s｜{stages}')
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    """在目前的 trace 中計時一個階段；沒有 trace 時不記錄。"""
+    tr = _current.get()
+    if tr is None:
+        yield
+        return
+    with tr.span(name, **attrs):
+        yield
+
+
+def count(name: str, n: float = 1) -> None:
+    tr = _current.get()
+    if tr is not None:
+        tr.count(name, n)
+
+
+def record_usage(usage: Any) -> None:
+    """累加 OpenAI 回應的 usage（非串流 resp.usage 或串流最後一個 chunk 的 usage）。"""
+    if usage is None:
+        return
+    count('prompt_tokens', getattr(usage, 'prompt_tokens', 0) or 0)
+    count('completion_tokens', getattr(usage, 'completion_tokens', 0) or 0)
+    # prompt prefix cache 命中的 token 數（OpenAI 於 prompt_tokens_details.cached_tokens 回報）
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = getattr(details, 'cached_tokens', 0) if details is not None else 0
+    if cached:
+        count('cached_prompt_tokens', cached)
+
+
+def finished() -> List[Dict[str, Any]]:
+    with _finished_lock:
+        return list(_finished)
+
+
+def dump(path: Path | str) -> None:
+    """把本行程已完成的 trace 寫成 JSON（{"traces": [...]}）。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {'traces': finished()}
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def ingest_trace_file(path: Path | str) -> List[Dict[str, Any]]:
+    """讀回子行程輸出的 trace 檔並計入本行程 metrics；檔案不存在回傳空列表。"""
+    path = Path(path)
+    if not path.is_file():
+        return []
+    traces = json.loads(path.read_text(encoding='utf-8')).get('traces', [])
+    for data in traces:
+        _record_metrics(data)
+    return traces
+
+
+# ──────────────────────────── Metrics ────────────────────────────
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+    _STAGE_SECONDS = Histogram(
+        'factgraph_stage_seconds', 'Time spent per pipeline stage',
+        ['pipeline', 'stage'],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    )
+    _REQUEST_SECONDS = Histogram(
+        'factgraph_request_seconds', 'End-to-end pipeline time', ['pipeline', 'status'],
+        buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+    )
+    _EVENTS = Counter('factgraph_events_total', 'Pipeline counters (hits, tokens…)', ['pipeline', 'name'])
+except ImportError:  # 選用依賴
+    generate_latest = None
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+_fallback_lock = threading.Lock()
+_fb_stage: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+_fb_request: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+_fb_events: Dict[Tuple[str, str], float] = defaultdict(float)
+
+
+def _record_metrics(data: Dict[str, Any]) -> None:
+    pipeline = data.get('pipeline', 'unknown')
+    if generate_latest is not None:
+        for s in data.get('spans', []):
+            _STAGE_SECONDS.labels(pipeline, s['name']).observe(s['duration'])
+        _REQUEST_SECONDS.labels(pipeline, data.get('status', 'ok')).observe(data.get('duration', 0.0))
+        for name, n in data.get('counters', {}).items():
+            _EVENTS.labels(pipeline, name).inc(n)
+        return
+
+    with _fallback_lock:
+        for s in data.get('spans', []):
+            acc = _fb_stage[(pipeline, s['name'])]
+            acc[0] += 1
+            acc[1] += s['duration']
+        acc = _fb_request[(pipeline, data.get('status', 'ok'))]
+        acc[0] += 1
+        acc[1] += data.get('duration', 0.0)
+        for name, n in data.get('counters', {}).items():
+            _fb_events[(pipeline, name)] += n
+
+
+def _render_fallback() -> bytes:
+    out: List[str] = []
+    with _fallback_lock:
+        for metric, table, label in (('factgraph_stage_seconds', _fb_stage, 'stage'),
+                                     ('factgraph_request_seconds', _fb_request, 'status')):
+            out.append(f'# TYPE {metric} summary')
+            for (pipeline, key), (n, total) in sorted(table.items()):
+                labels = f'pipeline="{pipeline}",{label}="{key}"'
+                out.append(f'{metric}_count{{{labels}}} {n}')
+                out.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+        out.append('# TYPE factgraph_events_total counter')
+        for (pipeline, name), n in sorted(_fb_events.items()):
+            out.append(f'factgraph_events_total{{pipeline="{pipeline}",name="{name}"}} {n}')
+    return ('\n'.join(out) + '\n').encode('utf-8')
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """回傳 (body, content_type)，供 /metrics 端點使用。"""
+    if generate_latest is not None:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    return _render_fallback(), CONTENT_TYPE_LATEST
+
+
+# ──────────────────────────── Profiling ────────────────────────────
+@contextmanager
+def profiled(name: str, engine: str | None = None) -> Iterator[Path | None]:
+    """
+    選用的效能分析。engine 為 None 時讀取環境變數 FACTGRAPH_PROFILE；
+    空值則不分析。輸出至 logs/profiles/<name>-<時間>.prof（cProfile）
+    或 .html（pyinstrument）。
+    """
+    engine = (engine if engine is not None else os.getenv('FACTGRAPH_PROFILE', '')).lower()
+    if not engine:
+        yield None
+        return
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = PROFILE_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+    if engine == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        out = stem.with_suffix('.html')
+        profiler.start()
+        try:
+            yield out
+        finally:
+            profiler.stop()
+            out.write_text(profiler.output_html(), encoding='utf-8')
+            print(f'🧪 profile → {out}')
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    out = stem.with_suffix('.prof')
+    profiler.enable()
+    try:
+        yield out
+    finally:
+        profiler.disable()
+        profiler.dump_stats(out)
+        print(f'🧪 profile → {out}（python -m pstats {out}）')
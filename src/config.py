@@ -1,16 +1,17 @@
 """
 Configuration and Connection Module
 
-此模組負責讀取 .env 設定，設定 Neo4j、LM Studio API 及 MongoDB 連線資訊，
-並建立相應的資料庫連線。模組內也包含測試連線的函式，但僅在直接執行時運行，
-避免在跨檔案 import 時執行測試程式碼。
+此模組負責讀取 .env 設定，設定 Neo4j、LM Studio API 及 MongoDB 連線資訊。
+連線（`get_driver()` / `get_mongo_client()`）與必要環境變數檢查都延後到第一次使用，
+import 本模組不會連線、也不會因缺少環境變數而失敗；
+舊有的 `driver` / `mongo_client` 屬性仍可使用（首次存取時建立）。
+模組內也包含測試連線的函式，但僅在直接執行時運行。
 """
 
 import os
+from functools import lru_cache
 
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
-from pymongo import MongoClient
 
 # 載入環境變數
 load_dotenv()
@@ -22,7 +23,8 @@ NEO4J_CONFIG = {
     "uri": os.getenv("NEO4J_URI"),
     "user": os.getenv("NEO4J_USER"),
     "password": os.getenv("NEO4J_PASSWORD"),
-    "database": os.getenv("NEO4J_DATABASE", "neo4j")  # 預設為 neo4j
+    "database": os.getenv("NEO4J_DATABASE", "neo4j"),  # 預設為 neo4j
+    "pool_size": int(os.getenv("NEO4J_POOL_SIZE", "20")),  # 連線池上限（檢索與 ETL 共用同一個 driver）
 }
 
 # --------------------------
@@ -39,30 +41,48 @@ LM_STUDIO_CONFIG = {
     "repeat_penalty": 1.1,  # 避免重複產生相同詞彙
 }
 
-print(f"Loadded Database: {NEO4J_CONFIG['database']}")
-
-if not LM_STUDIO_CONFIG["endpoint"]:
-    raise ValueError("❌ 未正確讀取 .env 中的 MODEL_CONFIG_endpoint，請檢查 .env 設定！")
-
 # --------------------------
 # MongoDB 配置
 # --------------------------
 MONGODB_URI = os.getenv("MONGODB_URI")
-if not MONGODB_URI:
-    raise ValueError("❌ 未正確讀取 .env 中的 MONGODB_URI，請檢查 .env 設定！")
 
-# 建立 Neo4j 與 MongoDB 連線
-driver = GraphDatabase.driver(
-    NEO4J_CONFIG["uri"],
-    auth=(NEO4J_CONFIG["user"], NEO4J_CONFIG["password"])
-)
-mongo_client = MongoClient(MONGODB_URI)
+
+@lru_cache(maxsize=1)
+def get_driver():
+    """建立（並快取）Neo4j driver。"""
+    from neo4j import GraphDatabase
+    print(f"Loadded Database: {NEO4J_CONFIG['database']}")
+    return GraphDatabase.driver(
+        NEO4J_CONFIG["uri"],
+        auth=(NEO4J_CONFIG["user"], NEO4J_CONFIG["password"]),
+        max_connection_pool_size=NEO4J_CONFIG["pool_size"],
+        connection_acquisition_timeout=10,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_mongo_client():
+    """建立（並快取）MongoDB client；缺少 MONGODB_URI 時拋出 ValueError。"""
+    if not MONGODB_URI:
+        raise ValueError("❌ 未正確讀取 .env 中的 MONGODB_URI，請檢查 .env 設定！")
+    from pymongo import MongoClient
+    return MongoClient(MONGODB_URI)
+
+
+_LAZY_ATTRS = {"driver": get_driver, "mongo_client": get_mongo_client}
+
+
+def __getattr__(name: str):
+    """相容舊用法：`from src.config import driver, mongo_client` 於首次存取時才連線。"""
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def test_connections() -> None:
     """測試連線至 Neo4j 與 MongoDB"""
     # 測試 Neo4j 連線（⚠️ 必須指定 database 才會切換）
-    with driver.session(database=NEO4J_CONFIG["database"]) as session:
+    with get_driver().session(database=NEO4J_CONFIG["database"]) as session:
         # 顯示資料庫名稱
         db_result = session.run("CALL db.info() YIELD name RETURN name")
         db_name = db_result.single()["name"]
@@ -75,7 +95,7 @@ def test_connections() -> None:
 
     # 測試 MongoDB 連線
     try:
-        server_info = mongo_client.server_info()
+        server_info = get_mongo_client().server_info()
         print(f"成功連線至 MongoDB，版本為: {server_info['version']}")
     except Exception as e:
         raise ConnectionError(f"❌ 無法連線至 MongoDB: {e}")
@@ -1,7 +1,7 @@
 """
 Extraction Module (GPT 版本)
 
-本模組透過 OpenAI 官方 SDK 抽取新聞文本中的實體與關係，
+本模組透過共用 LLM client（src.common.llm_client）抽取新聞文本中的實體與關係，
 包含：
   - 預設 prompt 檔案讀取
   - 呼叫 GPT API
@@ -11,6 +11,7 @@ Extraction Module (GPT 版本)
 設定方式：
   - 環境變數 GPT_API 儲存 API Key
   - 環境變數 GPT_MODEL 儲存模型名稱，預設 gpt-4o
+  - 環境變數 LLM_BACKEND_KG_EXTRACT=local 改用 LM Studio 等本地 OpenAI 相容伺服器
 """
 
 from __future__ import annotations
@@ -19,27 +20,26 @@ import json
 import os
 import re
 import sys
+from functools import lru_cache
+from pathlib import Path
 from typing import Any, Dict, Optional
 
-import openai
-
 from src.common.gadget import LOGGER
+from src.common.llm_backends import for_stage
+from src.common.llm_client import LLMError
 
 # 讀取環境變數
 GPT_API_KEY: str | None = os.getenv('GPT_API')
 GPT_MODEL: str = os.getenv('GPT_MODEL', 'gpt-4o')
-
-if not GPT_API_KEY:
-    LOGGER.critical('找不到 GPT_API 環境變數，請確認 .env 設定！')
-    sys.exit(1)
-openai.api_key = GPT_API_KEY
+# GPT_API 於呼叫時由 llm_backends 檢查（kg_extract 階段改用 local 後端時不需要）
 
 # 參數設定
 DEFAULT_TEMPERATURE: float = 0.2
 MAX_TOKENS: int = 4096
-DEFAULT_PROMPT_FILE: str = 'src/knowledge_graph/prompts/extraction-prompt.txt'
+DEFAULT_PROMPT_FILE: str = str(Path(__file__).resolve().parent / 'prompts' / 'extraction-prompt.txt')
 
 
+@lru_cache(maxsize=4)
 def get_default_prompt(prompt_file: str = DEFAULT_PROMPT_FILE) -> str:
     """讀取並回傳預設 prompt 內容。
 
@@ -75,19 +75,16 @@ def call_gpt_api(text: str) -> Optional[str]:
     ]
 
     try:
-        response = openai.chat.completions.create(
+        return for_stage('kg_extract', GPT_API_KEY).chat(
+            messages,
             model=GPT_MODEL,
-            messages=messages,
             temperature=DEFAULT_TEMPERATURE,
             max_tokens=MAX_TOKENS,
             response_format={'type': 'json_object'}
         )
-    except openai.OpenAIError as exc:
+    except LLMError as exc:
         LOGGER.error('API 呼叫失敗: %s', exc)
         return None
-
-    try:
-        return response.choices[0].message.content  # type: ignore
     except (AttributeError, IndexError) as exc:
         LOGGER.error('解析 API 回應失敗: %s', exc)
         return None
@@ -0,0 +1,233 @@
+"""
+Selenium 瀏覽器池（有上限的多個 headless driver）
+==============================================
+
+CTS 依序處理三個分類、CNA 在同一個 driver 逐頁開啟文章，單一 Chrome 成為瓶頸，
+且長時間執行時 Chrome 記憶體持續成長。`BrowserPool` 管理最多 `size` 個 driver：
+
+  - driver 於第一次取用時才啟動（只開實際用得到的數量）
+  - 每個 worker（driver）各自一個 token bucket 限速；整體上限約為 size × rate 頁/秒
+  - 每個 driver 開啟 `restart_after` 頁後關閉（下次借出時重開），限制記憶體成長；
+    發生 WebDriver 例外時也重開，不讓壞掉的 driver 回到池中
+  - `stats` 記錄頁數、重啟次數、吞吐量與 driver 行程樹的峰值 RSS（有 psutil 時使用，否則讀 /proc）
+
+driver 非執行緒安全：同一時間只會借給一個執行緒。
+
+用法：
+    with BrowserPool(build_driver, size=3) as pool:
+        for slug, links in pool.map(collect_links, CATEGORIES):   # fn(driver, item)
+            ...
+        html = pool.page_source(url)                             # 可作為 HybridFetcher 的 browser_html
+    print(pool.stats.summary())
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from src.knowledge_base_operation.news_crawler.hybrid_fetch import RateLimiter, browser_page_source
+
+try:
+    import psutil
+except ImportError:  # 非必要依賴；Linux 改讀 /proc
+    psutil = None
+
+# ──────────────────────────────
+# 參數／常數
+# ──────────────────────────────
+POOL_SIZE: int = int(os.getenv("CRAWL_BROWSERS", "3"))
+RATE_PER_WORKER: float = float(os.getenv("CRAWL_BROWSER_RATE", "0.3"))  # 每個 driver 每秒頁數
+RESTART_AFTER: int = int(os.getenv("CRAWL_BROWSER_RESTART_AFTER", "50"))  # 每個 driver 開幾頁後重開
+PAGE_WAIT: float = 1.5
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _tree_rss(pid: int) -> Optional[int]:
+    """pid 及其所有子行程（Chrome renderer / GPU…）的 RSS 總和（bytes）；無法取得時回傳 None。"""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc, *proc.children(recursive=True)]
+        except psutil.Error:
+            return None
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    proc_root = Path("/proc")
+    if not proc_root.is_dir():
+        return None
+    children: dict = {}
+    rss: dict = {}
+    for d in proc_root.iterdir():
+        if not d.name.isdigit():
+            continue
+        try:
+            fields = (d / "stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(d.name))  # fields[1] = ppid
+        rss[int(d.name)] = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")  # fields[21] = rss（頁）
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        total += rss.get(p, 0)
+        stack.extend(children.get(p, ()))
+    return total
+
+
+def _driver_pid(driver: Any) -> Optional[int]:
+    """chromedriver 行程 pid（Chrome 為其子行程）。"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+@dataclass
+class PoolStats:
+    size: int = 0
+    started: int = 0
+    restarts: int = 0
+    pages: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    peak_rss: int = 0  # 所有 driver 同時的 RSS 總和峰值（bytes）
+
+    def summary(self) -> str:
+        rate = self.pages / self.seconds if self.seconds else 0.0
+        mem = f"{self.peak_rss / 2 ** 20:,.0f} MB" if self.peak_rss else "-"
+        return (f"瀏覽器上限 {self.size} 個（啟動 {self.started} 次）、頁面 {self.pages} 頁"
+                f"（{rate:.2f} 頁/秒）、重啟 {self.restarts} 次、錯誤 {self.errors} 次、峰值記憶體 {mem}")
+
+
+class _Slot:
+    """池中的一個 worker：driver + 自己的限速器 + 已開頁數。"""
+
+    def __init__(self, rate: float) -> None:
+        self.driver: Any = None
+        self.pages = 0
+        self.limiter = RateLimiter(rate)
+        self.rss = 0
+
+
+class BrowserPool:
+    """
+    Args:
+        factory: 建立 driver 的函式（例如 `cts.build_driver`）
+        size: driver 數上限
+        rate: 每個 driver 每秒頁數；<= 0 表示不限速
+        restart_after: 每個 driver 開啟此頁數後重開；<= 0 表示不重開
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = POOL_SIZE, rate: float = RATE_PER_WORKER,
+                 restart_after: int = RESTART_AFTER) -> None:
+        self.factory = factory
+        self.size = max(1, size)
+        self.restart_after = restart_after
+        self.stats = PoolStats(size=self.size)
+        self._slots: List[_Slot] = [_Slot(rate) for _ in range(self.size)]
+        self._idle: "queue.Queue[_Slot]" = queue.Queue()
+        for slot in self._slots:
+            self._idle.put(slot)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._t0 = time.perf_counter()
+
+    # ── driver 生命週期 ──
+    def _start(self, slot: _Slot) -> None:
+        slot.driver = self.factory()
+        slot.pages = 0
+        with self._lock:
+            self.stats.started += 1
+
+    def _quit(self, slot: _Slot) -> None:
+        if slot.driver is None:
+            return
+        try:
+            slot.driver.quit()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        slot.driver = None
+        slot.rss = 0
+
+    def _sample_memory(self, slot: _Slot) -> None:
+        pid = _driver_pid(slot.driver)
+        rss = _tree_rss(pid) if pid else None
+        if rss is None:
+            return
+        with self._lock:
+            slot.rss = rss
+            self.stats.peak_rss = max(self.stats.peak_rss, sum(s.rss for s in self._slots))
+
+    @contextmanager
+    def browser(self) -> Iterator[Any]:
+        """借出一個 driver（已等待該 worker 的限速）；離開時計一頁，必要時重開。"""
+        if self._closed:
+            raise RuntimeError("BrowserPool 已關閉")
+        slot = self._idle.get()
+        try:
+            if slot.driver is None:
+                self._start(slot)
+            slot.limiter.wait()
+            try:
+                yield slot.driver
+            except Exception:
+                with self._lock:
+                    self.stats.errors += 1
+                self._quit(slot)  # 壞掉的 driver 不再重用，下次借出時重開
+                raise
+            slot.pages += 1
+            with self._lock:
+                self.stats.pages += 1
+            self._sample_memory(slot)
+            if 0 < self.restart_after <= slot.pages:
+                self._quit(slot)  # 下次借出時才重開
+                with self._lock:
+                    self.stats.restarts += 1
+        finally:
+            self.stats.seconds = time.perf_counter() - self._t0
+            self._idle.put(slot)
+
+    def page_source(self, url: str, wait: float = PAGE_WAIT) -> str:
+        """以池中任一 driver 開啟 url 並回傳渲染後 HTML（執行緒安全）。"""
+        with self.browser() as driver:
+            return browser_page_source(driver, url, wait)
+
+    def map(self, fn: Callable[[Any, T], R], items: Iterable[T]) -> Iterator[R]:
+        """以 size 個執行緒平行執行 fn(driver, item)，依輸入順序回傳結果。"""
+
+        def run(item: T) -> R:
+            with self.browser() as driver:
+                return fn(driver, item)
+
+        with ThreadPoolExecutor(self.size, thread_name_prefix="browser") as pool:
+            yield from pool.map(run, list(items))
+
+    # ── 關閉 ──
+    def close(self) -> None:
+        self._closed = True
+        for slot in self._slots:
+            self._quit(slot)
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+CNA (中央社) 主題爬蟲
+
+主題頁以無限捲動換頁（網址隨捲動改變），仍以 Selenium 收集網址；
+文章頁以 `HybridFetcher` 併發 HTTP 抓取並以 BeautifulSoup 解析，解析失敗的文章才借用
+`BrowserPool` 的瀏覽器（多個 headless driver 平行備援，各自限速並定期重開）。
+先前執行已收錄的網址與近似內容由共用的 `Frontier` 略過；
+文章解析完即附加寫入 OUT_PATH（JSONL，CRAWL_SINK=jsonl,mongo 時同時 upsert 至 MongoDB）。
+"""
 
-import json
 import random
 import re
 import time
@@ -12,90 +20,101 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+from src.knowledge_base_operation.news_crawler.browser_pool import BrowserPool
+from src.knowledge_base_operation.news_crawler.frontier import Frontier
+from src.knowledge_base_operation.news_crawler.hybrid_fetch import (
+    HybridFetcher,
+    make_soup,
+)
+from src.knowledge_base_operation.news_crawler.sink import open_sink
+
 # ---------- 0. 參數 ----------
 # TOPIC_URL  = "https://www.cna.com.tw/news/asoc/202504080379.aspx?topic=4623"
 TOPIC_URL = "https://www.cna.com.tw/news/aloc/202507310106.aspx"
 TARGET_NUM = 300
-OUT_PATH = Path("data/raw/news/cna") / "cna_sample.json"
+OUT_PATH = Path("data/raw/news/cna") / "cna_sample.jsonl"
+HTTP_WORKERS = 4  # 文章 HTTP 併發數
+HTTP_RATE = 0.5  # 文章 HTTP 每秒請求數
+BROWSERS = 3  # 瀏覽器池上限（文章備援）
+BROWSER_RATE = 0.3  # 每個瀏覽器每秒頁數
+BROWSER_RESTART_AFTER = 40  # 每個瀏覽器開啟幾頁後重開
 
-# ---------- 1. Selenium 基本設定 ----------
-opt = webdriver.ChromeOptions()
-opt.add_argument(
-    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/124.0.0.0 Safari/537.36"
-)
-opt.add_experimental_option("excludeSwitches", ["enable-automation"])
-opt.add_experimental_option("useAutomationExtension", False)
-
-# ── 改用官方 .deb 版 Chrome 的 headless 啟動 ──
-opt.add_argument("--headless=new")
-opt.add_argument("--no-sandbox")
-opt.add_argument("--disable-dev-shm-usage")
-opt.add_argument("--disable-gpu")
-# binary 位置改成官方安裝路徑
-opt.binary_location = "/usr/bin/google-chrome-stable"
-
-# ---------- 1-1. chromedriver 來源 ----------
-# webdriver-manager 會自動下載對應版本的 driver
-service = Service(ChromeDriverManager().install())
-
-driver = webdriver.Chrome(service=service, options=opt)
-driver.execute_cdp_cmd(
-    "Page.addScriptToEvaluateOnNewDocument",
-    {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"},
-)
-wait = WebDriverWait(driver, 20)
-
-# ---------- 2. 開啟主題頁並等待初始載入 ----------
-driver.get(TOPIC_URL)
-time.sleep(1 + random.uniform(0.5, 1.0))
-body = driver.find_element(By.TAG_NAME, "body")
-
-# ---------- 3. 收集動態變化的網址 ----------
-urls, seen = [], set()
-current_url = driver.execute_script("return window.location.href")
-urls.append(current_url)
-seen.add(current_url)
-last_update_time = time.time()
-
-while len(urls) < TARGET_NUM:
-    body.send_keys(Keys.PAGE_DOWN)
-    time.sleep(random.uniform(0.3, 0.5))
-
-    new_url = driver.execute_script("return window.location.href")
-    if new_url != current_url and new_url not in seen:
-        urls.append(new_url)
-        seen.add(new_url)
-        current_url = new_url
-        last_update_time = time.time()
-        print("⇢ 新網址", new_url)
-
-    if time.time() - last_update_time >= 10:
-        print("⚠️ 10 秒內無新網址，停止滾動。")
-        break
-
-print(f"共收集 {len(urls)} 筆連結")
-
-# ---------- 4. 逐篇進入詳細頁抓取資料 ----------
-records = []
 re_date = re.compile(r"/news/[^/]+/(\d{12})\.aspx")
 
-for url in urls:
-    driver.get(url)
+
+# ---------- 1. Selenium 基本設定 ----------
+def build_driver() -> webdriver.Chrome:
+    opt = webdriver.ChromeOptions()
+    opt.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    )
+    opt.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opt.add_experimental_option("useAutomationExtension", False)
+
+    # ── 改用官方 .deb 版 Chrome 的 headless 啟動 ──
+    opt.add_argument("--headless=new")
+    opt.add_argument("--no-sandbox")
+    opt.add_argument("--disable-dev-shm-usage")
+    opt.add_argument("--disable-gpu")
+    # binary 位置改成官方安裝路徑
+    opt.binary_location = "/usr/bin/google-chrome-stable"
+
+    # ---------- 1-1. chromedriver 來源 ----------
+    # webdriver-manager 會自動下載對應版本的 driver
+    service = Service(ChromeDriverManager().install())
+
+    driver = webdriver.Chrome(service=service, options=opt)
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument",
+        {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"},
+    )
+    return driver
+
+
+# ---------- 2~3. 開啟主題頁，收集動態變化的網址 ----------
+def collect_urls(driver: webdriver.Chrome, topic_url: str = TOPIC_URL, target_num: int = TARGET_NUM) -> list:
+    driver.get(topic_url)
     time.sleep(1 + random.uniform(0.5, 1.0))
+    body = driver.find_element(By.TAG_NAME, "body")
+
+    urls, seen = [], set()
+    current_url = driver.execute_script("return window.location.href")
+    urls.append(current_url)
+    seen.add(current_url)
+    last_update_time = time.time()
+
+    while len(urls) < target_num:
+        body.send_keys(Keys.PAGE_DOWN)
+        time.sleep(random.uniform(0.3, 0.5))
+
+        new_url = driver.execute_script("return window.location.href")
+        if new_url != current_url and new_url not in seen:
+            urls.append(new_url)
+            seen.add(new_url)
+            current_url = new_url
+            last_update_time = time.time()
+            print("⇢ 新網址", new_url)
+
+        if time.time() - last_update_time >= 10:
+            print("⚠️ 10 秒內無新網址，停止滾動。")
+            break
+
+    print(f"共收集 {len(urls)} 筆連結")
+    return urls
+
+
+# ---------- 4. 詳細頁解析 ----------
+def parse_article_html(html: str, url: str) -> dict:
+    """由文章 HTML 解析欄位；標題或內文缺失時拋出 ValueError（交由瀏覽器備援）。"""
+    soup = make_soup(html)
 
     # 4-1 標題
-    try:
-        title = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "h1 span"))
-        ).text.strip()
-    except Exception:
-        title = "標題未取得"
+    title_tag = soup.select_one("h1 span")
+    title = title_tag.get_text(strip=True) if title_tag else ""
 
     # 4-2 日期（URL → YYYY-MM-DD）
     m = re_date.search(url)
@@ -105,31 +124,64 @@ for url in urls:
     )
 
     # 4-3 分類（breadcrumb 第 2 個 <a>）
-    cat_elems = driver.find_elements(By.CSS_SELECTOR, ".breadcrumb a")
-    category = cat_elems[1].text.strip() if len(cat_elems) > 1 else ""
+    cat_elems = soup.select(".breadcrumb a")
+    category = cat_elems[1].get_text(strip=True) if len(cat_elems) > 1 else ""
 
     # 4-4 內文；去掉版權宣告
-    paras = driver.find_elements(By.CSS_SELECTOR, "#article-body p, div.paragraph p")
+    paras = soup.select("#article-body p, div.paragraph p")
     content = "\n".join(
-        p.text.strip()
+        p.get_text(strip=True)
         for p in paras
-        if p.text.strip() and "本網站之文字" not in p.text
+        if p.get_text(strip=True) and "本網站之文字" not in p.get_text()
     )
+    if not title or not content:
+        raise ValueError("無法擷取標題或內文")
 
     # 4-5 組裝
-    records.append({
+    return {
         "date": date,
         "publisher": "CNA",
         "category": category,
         "title": title,
         "content": content,
         "label": True,
-    })
+    }
 
-# ---------- 5. 輸出 JSON 檔 ----------
-OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-with OUT_PATH.open("w", encoding="utf-8") as f:
-    json.dump(records, f, ensure_ascii=False, indent=2)
 
-print(f"✅ 完成 {len(records)} 篇，輸出 → {OUT_PATH.resolve()}")
-driver.quit()
+def main() -> None:
+    pool = BrowserPool(build_driver, size=BROWSERS, rate=BROWSER_RATE, restart_after=BROWSER_RESTART_AFTER)
+    frontier = Frontier()
+    sink = open_sink(OUT_PATH)
+    try:
+        with pool.browser() as driver:  # 主題頁捲動只能在同一個分頁依序進行
+            all_urls = collect_urls(driver)
+        urls = frontier.filter_new(all_urls)
+        print(f"略過先前已收錄 {len(all_urls) - len(urls)} 筆")
+
+        fetcher = HybridFetcher(
+            parse_article_html,
+            browser_html=lambda u: pool.page_source(u, 1.5),
+            workers=HTTP_WORKERS,
+            rate=HTTP_RATE,
+            browser_workers=pool.size,
+        )
+        for url, item in fetcher.fetch_all(urls):
+            if not item:
+                print(f"⚠️ 解析失敗 → {url}")
+            elif frontier.add_article(url, item["title"], item["content"], "cna"):
+                sink.write({**item, "url": url})
+                frontier.mark_seen(url, "cna")  # 寫入成功後才確認，失敗的網址下次重新抓取
+            else:
+                print(f"↪︎ 內容與已收錄文章近似，跳過 → {url}")
+        print(f"📊 {fetcher.stats.summary()}")
+    finally:
+        pool.close()
+        frontier.close()
+        sink.close()
+
+    print(f"✅ 完成，輸出：{sink.summary()}")
+    print(f"🧭 瀏覽器池：{pool.stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
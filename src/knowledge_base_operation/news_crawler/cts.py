@@ -2,9 +2,9 @@
 CTS (華視) Topic Crawler
 =======================
 
-抓取分類（政治、國際、社會）最新新聞，輸出 JSON：
+抓取分類（政治、國際、社會）最新新聞，解析完即逐篇寫出（JSONL，每行一篇；
+CRAWL_SINK=jsonl,mongo 時同時 upsert 至 MongoDB）：
 
-[
     {
         "date": "YYYY-MM-DD",
         "publisher": "CTS",
@@ -12,22 +12,22 @@ CTS (華視) Topic Crawler
         "title": "標題",
         "content": "內文…",
         "label": true
-    },
-    ...
-]
+    }
 
 輸出路徑：
-    FactGraph/data/raw/news/cts_<timestamp>.json
+    FactGraph/data/raw/news/cts_<timestamp>.jsonl
     timestamp = yyyymmddHHMM (Asia/Taipei)
+
+分類頁需無限捲動，仍以 Selenium 取得連結：各分類由 `BrowserPool` 的多個 headless driver
+平行處理；文章頁以 `HybridFetcher` 併發 HTTP 抓取，解析失敗的文章才借用池中的瀏覽器。
 """
 
 from __future__ import annotations
 
-import json
-import random
 import time
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urljoin
 from zoneinfo import ZoneInfo
 
 from bs4 import BeautifulSoup
@@ -36,6 +36,14 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+from src.knowledge_base_operation.news_crawler.browser_pool import BrowserPool
+from src.knowledge_base_operation.news_crawler.frontier import Frontier
+from src.knowledge_base_operation.news_crawler.hybrid_fetch import (
+    HybridFetcher,
+    make_soup,
+)
+from src.knowledge_base_operation.news_crawler.sink import open_sink
+
 # ──────────────────────────────
 # 常數／設定
 # ──────────────────────────────
@@ -49,8 +57,12 @@ CATEGORIES = {
 }
 SCROLL_COUNT: int = 3  # 每一分類往下滾動次數
 WAIT_BETWEEN_SCROLL: float = 3  # 每次滾動後等待秒數
-RANDOM_WAIT_MIN: float = 1.5  # 進內文隨機等待下限
-RANDOM_WAIT_MAX: float = 5.0  # 進內文隨機等待上限
+RANDOM_WAIT_MIN: float = 1.5  # 瀏覽器備援進內文的等待下限（另加 0–1 秒隨機）
+HTTP_WORKERS: int = 4  # 文章 HTTP 併發數
+HTTP_RATE: float = 0.5  # 文章 HTTP 每秒請求數
+BROWSERS: int = len(CATEGORIES)  # 瀏覽器池上限（每個分類一個）
+BROWSER_RATE: float = 0.3  # 每個瀏覽器每秒頁數
+BROWSER_RESTART_AFTER: int = 30  # 每個瀏覽器開啟幾頁後重開
 USER_AGENT: str = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -108,12 +120,28 @@ def scroll_page(driver: webdriver.Chrome, times: int = 1) -> None:
         time.sleep(WAIT_BETWEEN_SCROLL)
 
 
-def parse_article(driver: webdriver.Chrome, url: str, category_tw: str) -> dict:
-    """Open `url` and return structured article data."""
+def collect_links(driver: webdriver.Chrome, slug: str) -> list[str] | None:
+    """開啟分類頁、滾動載入後回傳文章連結；找不到清單容器時回傳 None。"""
+    url = f"{BASE_URL}{slug}/index.html"
+    print(f"\n📄 處理分類頁：{url}")
     driver.get(url)
-    time.sleep(random.uniform(RANDOM_WAIT_MIN, RANDOM_WAIT_MAX))
+    time.sleep(5)  # 等主要內容載入
+
+    print("🔄 滾動頁面載入更多內容…")
+    scroll_page(driver, SCROLL_COUNT)
 
     soup = BeautifulSoup(driver.page_source, "html.parser")
+    link_container = soup.select_one(
+        "div.newslist-container.flexbox.one_row_style"
+    )
+    if not link_container:
+        return None
+    return [urljoin(BASE_URL, a["href"]) for a in link_container.select("a")]
+
+
+def parse_article_html(html: str, category_tw: str) -> dict:
+    """Parse article HTML (from HTTP or the browser); raise ValueError when the layout is missing."""
+    soup = make_soup(html)
 
     # 標題
     title_tag = soup.select_one("div.artical-titlebar h1")
@@ -123,6 +151,8 @@ def parse_article(driver: webdriver.Chrome, url: str, category_tw: str) -> dict:
 
     # 時間 → YYYY-MM-DD
     time_tag = soup.select_one("div.titlebar-top time")
+    if not time_tag:
+        raise ValueError("無法擷取時間")
     raw_dt = datetime.strptime(time_tag.text.strip(), "%Y/%m/%d %H:%M")
     date_str = raw_dt.strftime("%Y-%m-%d")
 
@@ -154,65 +184,62 @@ def parse_article(driver: webdriver.Chrome, url: str, category_tw: str) -> dict:
 # 主流程
 # ──────────────────────────────
 def main() -> None:
-    """Crawl all categories and export to a timestamped JSON."""
+    """Crawl all categories and stream articles to a timestamped JSONL (and MongoDB when enabled)."""
     start_time = datetime.now(TPE_TZ)
     print("開始時間:", start_time.strftime("%Y-%m-%d %H:%M:%S"))
 
-    driver = build_driver(headless=True)
-    articles: list[dict] = []
+    pool = BrowserPool(build_driver, size=BROWSERS, rate=BROWSER_RATE, restart_after=BROWSER_RESTART_AFTER)
+    frontier = Frontier()  # 跨執行去重：已收錄網址不抓取、近似內容不輸出
+    output_path = OUTPUT_DIR / f"cts_{start_time.strftime('%Y%m%d%H%M')}.jsonl"
+    sink = open_sink(output_path)
     seen_titles: set[str] = set()  # 當次執行內去重
 
     try:
-        for slug, category_tw in CATEGORIES.items():
-            url = f"{BASE_URL}{slug}/index.html"
-            print(f"\n📄 處理分類頁：{url}")
-            driver.get(url)
-            time.sleep(5)  # 等主要內容載入
-
-            print("🔄 滾動頁面載入更多內容…")
-            scroll_page(driver, SCROLL_COUNT)
-
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            link_container = soup.select_one(
-                "div.newslist-container.flexbox.one_row_style"
-            )
-            if not link_container:
-                print("⚠️ 找不到新聞清單容器，跳過此分類")
+        # 各分類頁平行滾動收集連結（每個分類借用池中一個 driver）
+        category_links = pool.map(collect_links, CATEGORIES)
+        for (slug, category_tw), all_links in zip(CATEGORIES.items(), category_links):
+            if all_links is None:
+                print(f"⚠️ {slug} 找不到新聞清單容器，跳過此分類")
                 continue
 
-            news_links = [a["href"] for a in link_container.select("a")]
-            print(f"📑 共 {len(news_links)} 筆連結")
+            news_links = frontier.filter_new(all_links)
+            print(f"📑 {category_tw}：共 {len(all_links)} 筆連結（{len(all_links) - len(news_links)} 筆先前已收錄）")
 
-            for idx, article_url in enumerate(news_links, 1):
+            fetcher = HybridFetcher(
+                lambda html, _url, cat=category_tw: parse_article_html(html, cat),
+                browser_html=lambda u: pool.page_source(u, RANDOM_WAIT_MIN),
+                workers=HTTP_WORKERS,
+                rate=HTTP_RATE,
+                headers={"User-Agent": USER_AGENT, "Accept-Language": "zh-TW,zh;q=0.9"},
+                browser_workers=pool.size,
+            )
+            for idx, (article_url, article) in enumerate(fetcher.fetch_all(news_links), 1):
                 print(f"  ➡️ ({idx}/{len(news_links)}) {article_url}")
-                try:
-                    article = parse_article(driver, article_url, category_tw)
-                    if article["title"] in seen_titles:
-                        print("   ↪︎ 重複標題，跳過")
-                        continue
-                    articles.append(article)
-                    seen_titles.add(article["title"])
-                except Exception as exc:  # pylint: disable=broad-except
-                    print(f"   ⚠️ 解析失敗：{exc}")
-                finally:
-                    driver.delete_all_cookies()
-                    driver.get("about:blank")
-                    time.sleep(random.uniform(RANDOM_WAIT_MIN, RANDOM_WAIT_MAX))
+                if not article:
+                    print("   ⚠️ 解析失敗")
+                    continue
+                if article["title"] in seen_titles:
+                    print("   ↪︎ 重複標題，跳過")
+                    continue
+                if not frontier.add_article(article_url, article["title"], article["content"], "cts"):
+                    print("   ↪︎ 內容與已收錄文章近似，跳過")
+                    continue
+                article["url"] = article_url
+                sink.write(article)
+                frontier.mark_seen(article_url, "cts")  # 寫入成功後才確認，失敗的網址下次重新抓取
+                seen_titles.add(article["title"])
+            print(f"📊 {fetcher.stats.summary()}")
 
     finally:
-        driver.quit()
-
-    # 輸出
-    ts = start_time.strftime("%Y%m%d%H%M")
-    output_path = OUTPUT_DIR / f"cts_{ts}.json"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as fp:
-        json.dump(articles, fp, ensure_ascii=False, indent=2)
+        pool.close()
+        frontier.close()
+        sink.close()
 
     end_time = datetime.now(TPE_TZ)
     elapsed = (end_time - start_time).total_seconds()
     print("\n✅ 完成！")
-    print("輸出檔案：", output_path.resolve())
+    print("輸出：", sink.summary())
+    print("瀏覽器池：", pool.stats.summary())
     print("結束時間:", end_time.strftime("%Y-%m-%d %H:%M:%S"))
     print(f"程式耗時: {elapsed:.1f} 秒")
 
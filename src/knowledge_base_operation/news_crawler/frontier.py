@@ -0,0 +1,258 @@
+"""
+跨執行的爬取 frontier 與去重庫（SQLite）
+=====================================
+
+各爬蟲原本只在單次執行內去重（CTS `seen_titles`、PTS `seen_ids`、CNA `seen`），
+重複執行會重新下載、重新輸出同一批文章，下游 ETL 也會再抽取一次。
+`Frontier` 以一個 SQLite 檔在所有爬蟲與各次執行間共用：
+
+  - URL 正規化：scheme / host 小寫、去預設 port、fragment 與追蹤參數（utm_*、fbclid…），
+    query 參數排序、去尾端斜線；抓取前以 `filter_new` 略過已收錄的網址
+  - 內容指紋：標題 + 內文的 64-bit simhash（字元 3-gram），存入前以 `add_article`
+    檢查漢明距離 <= `max_distance` 的近似重複（轉載、改標題、微幅修訂）
+  - 新文章先標記為 pending，sink 寫入成功後爬蟲再 `mark_seen` 為 stored；
+    寫入失敗或中途當掉的網址 `filter_new` 不會略過，下次執行重新抓取
+    指紋切成 4 段 16-bit 建索引，距離 <= 3 時至少一段完全相同，查詢只比對候選
+
+路徑：環境變數 CRAWL_FRONTIER_PATH（預設 FactGraph/data/raw/news/frontier.sqlite3）
+
+執行方式（查看統計）：
+    python -m src.knowledge_base_operation.news_crawler.frontier
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PATH = Path(os.getenv("CRAWL_FRONTIER_PATH", "FactGraph/data/raw/news/frontier.sqlite3"))
+MAX_DISTANCE: int = 3
+SHINGLE: int = 3
+
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|yclid|mc_cid|mc_eid)$", re.I)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_WS = re.compile(r"\s+")
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url        TEXT PRIMARY KEY,
+    publisher  TEXT,
+    status     TEXT,
+    first_seen REAL,
+    last_seen  REAL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id        INTEGER PRIMARY KEY,
+    simhash   INTEGER NOT NULL,
+    b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER,
+    url       TEXT,
+    publisher TEXT,
+    title     TEXT,
+    created   REAL
+);
+CREATE INDEX IF NOT EXISTS fp_b0 ON fingerprints(b0);
+CREATE INDEX IF NOT EXISTS fp_b1 ON fingerprints(b1);
+CREATE INDEX IF NOT EXISTS fp_b2 ON fingerprints(b2);
+CREATE INDEX IF NOT EXISTS fp_b3 ON fingerprints(b3);
+"""
+
+
+# ──────────────────────────────
+# URL 正規化
+# ──────────────────────────────
+def canonicalize_url(url: str) -> str:
+    """同一篇文章的不同寫法（大小寫、port、追蹤參數、參數順序、fragment）對應到同一字串。"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+# ──────────────────────────────
+# simhash
+# ──────────────────────────────
+def simhash(text: str, bits: int = 64) -> int:
+    """字元 SHINGLE-gram（去空白）加權 simhash；空字串回傳 0。"""
+    text = _WS.sub("", text)
+    grams = Counter(text[i:i + SHINGLE] for i in range(max(1, len(text) - SHINGLE + 1))) if text else Counter()
+    weights = [0] * bits
+    for gram, n in grams.items():
+        h = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += n if h >> i & 1 else -n
+    return sum(1 << i for i, w in enumerate(weights) if w > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _signed(v: int) -> int:
+    """SQLite INTEGER 為有號 64-bit。"""
+    return v - (1 << 64) if v >= 1 << 63 else v
+
+
+def _unsigned(v: int) -> int:
+    return v + (1 << 64) if v < 0 else v
+
+
+def _bands(h: int) -> List[int]:
+    return [(h >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+
+
+# ──────────────────────────────
+# Frontier
+# ──────────────────────────────
+class Frontier:
+    """
+    共用的爬取紀錄；可跨執行緒使用（HybridFetcher 的抓取執行緒）。
+
+    Args:
+        path: SQLite 檔路徑；":memory:" 可用於測試
+        max_distance: simhash 漢明距離門檻（<= 3，超過時 4 段索引無法保證找到）
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, max_distance: int = MAX_DISTANCE) -> None:
+        if max_distance > _BANDS - 1:
+            raise ValueError(f"max_distance 最大為 {_BANDS - 1}")
+        self.path = path
+        self.max_distance = max_distance
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "Frontier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── URL ──
+    def seen(self, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM urls WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        return row is not None
+
+    def filter_new(self, urls: Iterable[str]) -> List[str]:
+        """回傳尚未收錄的網址（保留原字串與順序，同一批內的重複也去除）。"""
+        out, batch = [], {}
+        for url in urls:
+            batch.setdefault(canonicalize_url(url), url)
+        keys = list(batch)
+        known: set = set()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT url FROM urls WHERE status != 'pending' AND url IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                known.update(r[0] for r in rows)
+        for key, url in batch.items():
+            if key not in known:
+                out.append(url)
+        return out
+
+    def mark_seen(self, url: str, publisher: str = "", status: str = "stored") -> None:
+        now = time.time()
+        with self._lock:
+            self._mark(canonicalize_url(url), publisher, status, now)
+
+    def _mark(self, key: str, publisher: str, status: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT INTO urls(url, publisher, status, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET status = excluded.status, last_seen = excluded.last_seen",
+            (key, publisher, status, now, now))
+
+    # ── 內容 ──
+    def _near(self, h: int) -> Optional[str]:
+        bands = _bands(h)
+        rows = self._conn.execute(
+            "SELECT simhash, url FROM fingerprints WHERE b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?", bands).fetchall()
+        for other, url in rows:
+            if hamming(h, _unsigned(other)) <= self.max_distance:
+                return url
+        return None
+
+    def near_duplicate(self, text: str) -> Optional[str]:
+        """若已有近似內容，回傳其（正規化）網址。"""
+        with self._lock:
+            return self._near(simhash(text))
+
+    def add_article(self, url: str, title: str, content: str, publisher: str = "") -> bool:
+        """
+        記錄一篇已解析的文章：內容為新則存入指紋、網址標記為 pending 並回傳 True
+        （寫入 sink 後呼叫 `mark_seen` 確認）；近似重複則回傳 False（網址標記為 duplicate，下次不再抓取）。
+        同一網址先前未確認的指紋會被取代，重新抓取時不會與自己比對成重複。
+        """
+        key = canonicalize_url(url)
+        h = simhash(f"{title}\n{content}")
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM fingerprints WHERE url = ?", (key,))
+                dup = self._near(h)
+                if dup is None:
+                    self._conn.execute(
+                        "INSERT INTO fingerprints(simhash, b0, b1, b2, b3, url, publisher, title, created) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (_signed(h), *_bands(h), key, publisher, title, now))
+                self._mark(key, publisher, "pending" if dup is None else "duplicate", now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dup is None
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_status = dict(self._conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+            by_pub = dict(self._conn.execute(
+                "SELECT publisher, COUNT(*) FROM fingerprints GROUP BY publisher").fetchall())
+        return {"urls": by_status, "articles": by_pub}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="爬取 frontier 統計")
+    parser.add_argument("--path", type=Path, default=DEFAULT_PATH)
+    args = parser.parse_args()
+    if not args.path.is_file():
+        print(f"⚠️ 找不到 frontier：{args.path}")
+        return
+    with Frontier(args.path) as frontier:
+        stats = frontier.stats()
+    print(f"🗂️ {args.path}")
+    for status, n in stats["urls"].items():
+        print(f"  網址 {status:<10}{n:>8,}")
+    for publisher, n in stats["articles"].items():
+        print(f"  文章 {publisher or '-':<10}{n:>8,}")
+
+
+if __name__ == "__main__":
+    main()
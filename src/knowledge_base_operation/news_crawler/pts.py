@@ -3,8 +3,8 @@ PTS (公視) 文章爬蟲
 ===================
 
 爬取分類頁 (/category/1) 前 `MAX_PAGES` 頁的所有文章。
-輸出一支 JSON 檔：
-    FactGraph/data/raw/news/pts_<timestamp>.json
+文章解析完即寫入（`sink.open_sink`，CRAWL_SINK=jsonl,mongo）：
+    FactGraph/data/raw/news/pts_<timestamp>.jsonl
     timestamp = yyyymmddHHMM (Asia/Taipei)
 
 每則文章字段：
@@ -13,7 +13,6 @@ PTS (公視) 文章爬蟲
 
 from __future__ import annotations
 
-import json
 import re
 import time
 from datetime import datetime
@@ -23,7 +22,9 @@ from typing import List, Optional
 from zoneinfo import ZoneInfo
 
 import requests
-from bs4 import BeautifulSoup
+from src.knowledge_base_operation.news_crawler.frontier import Frontier
+from src.knowledge_base_operation.news_crawler.hybrid_fetch import make_soup
+from src.knowledge_base_operation.news_crawler.sink import open_sink
 
 # ──────────────────────────────
 # 參數／常數
@@ -108,8 +109,12 @@ def parse_article(url: str, session: requests.Session) -> Optional[dict]:
     html = fetch_html(url, session)
     if not html:
         return None
+    return parse_article_html(html, url)
 
-    soup = BeautifulSoup(html, "html.parser")
+
+def parse_article_html(html: str, url: str) -> Optional[dict]:
+    """由文章 HTML 解析欄位（純函式，可於 process pool 執行）。失敗回傳 None。"""
+    soup = make_soup(html)
 
     # 標題
     title_tag = soup.select_one("h1.article-title") or soup.select_one("h1")
@@ -154,16 +159,16 @@ def parse_article(url: str, session: requests.Session) -> Optional[dict]:
 # ──────────────────────────────
 # 搜尋頁解析
 # ──────────────────────────────
-def extract_links(html: str) -> List[str]:
+def extract_links(html: str, base_url: str = BASE_URL) -> List[str]:
     """從列表頁拿出所有文章連結。"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     anchors = soup.select('h2 a[href*="/article/"]')
     links: list[str] = []
     for a in anchors:
         href = a.get("href", "")
         if href.startswith("/article/"):
-            links.append(BASE_URL + href)
-        elif href.startswith("https://news.pts.org.tw/article/"):
+            links.append(base_url + href)
+        elif href.startswith(f"{base_url}/article/"):
             links.append(href)
     return links
 
@@ -171,51 +176,52 @@ def extract_links(html: str) -> List[str]:
 # ──────────────────────────────
 # 主流程
 # ──────────────────────────────
-def scrape_pts(max_pages: int = MAX_PAGES) -> None:
-    """PTS 爬蟲入口。"""
+def scrape_pts(max_pages: int = MAX_PAGES, frontier: Optional[Frontier] = None) -> None:
+    """PTS 爬蟲入口；frontier 預設使用共用的跨執行去重庫。"""
     start = datetime.now(TPE_TZ)
     print("開始時間:", start.strftime("%Y-%m-%d %H:%M:%S"))
 
     session = requests.Session()
-    results: list[dict] = []
+    frontier = frontier or Frontier()
+    sink = open_sink(OUTPUT_DIR / f"pts_{start.strftime('%Y%m%d%H%M')}.jsonl")
     seen_ids: set[str] = set()
 
-    for page in range(1, max_pages + 1):
-        print(f"\n🔍 解析第 {page} 頁")
-        list_html = fetch_html(SEARCH_URL.format(page), session)
-        if not list_html:
-            break
-
-        links = extract_links(list_html)
-        print(f"✅ 找到 {len(links)} 則連結")
-
-        for idx, article_url in enumerate(links, 1):
-            print(f"  ➡️ ({idx}/{len(links)}) {article_url}")
-            item = parse_article(article_url, session)
-            if not item:
-                continue
-            if item["id"] in seen_ids:
-                print("   ↪︎ 重複，跳過")
-                continue
-            # 若需關鍵字過濾，可在此判斷
-            # if KEYWORD not in item["content"]:
-            #     continue
-            results.append(item)
-            seen_ids.add(item["id"])
-            time.sleep(2)  # 禮貌延遲
-
-    # ── 輸出 JSON ─────────────────
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    ts = start.strftime("%Y%m%d%H%M")
-    out_path = OUTPUT_DIR / f"pts_{ts}.json"
-
-    with out_path.open("w", encoding="utf-8") as fp:
-        json.dump(results, fp, ensure_ascii=False, indent=2)
+    try:
+        for page in range(1, max_pages + 1):
+            print(f"\n🔍 解析第 {page} 頁")
+            list_html = fetch_html(SEARCH_URL.format(page), session)
+            if not list_html:
+                break
+
+            links = extract_links(list_html)
+            new_links = frontier.filter_new(links)
+            print(f"✅ 找到 {len(links)} 則連結（{len(links) - len(new_links)} 則先前已收錄）")
+            links = new_links
+
+            for idx, article_url in enumerate(links, 1):
+                print(f"  ➡️ ({idx}/{len(links)}) {article_url}")
+                item = parse_article(article_url, session)
+                if not item:
+                    continue
+                if item["id"] in seen_ids:
+                    print("   ↪︎ 重複，跳過")
+                    continue
+                if not frontier.add_article(article_url, item["title"], item["content"], "pts"):
+                    print("   ↪︎ 內容與已收錄文章近似，跳過")
+                    continue
+                # 若需關鍵字過濾，可在此判斷
+                # if KEYWORD not in item["content"]:
+                #     continue
+                sink.write(item)  # 解析完即寫出，中斷時不會遺失已抓取的文章
+                frontier.mark_seen(article_url, "pts")  # 寫入成功後才確認，失敗的網址下次重新抓取
+                seen_ids.add(item["id"])
+                time.sleep(2)  # 禮貌延遲
+    finally:
+        sink.close()
 
     end = datetime.now(TPE_TZ)
     print("\n🎉 完成！")
-    print("輸出檔案：", out_path.resolve())
-    print(f"共 {len(results)} 筆文章")
+    print("輸出：", sink.summary())
     print("結束時間:", end.strftime("%Y-%m-%d %H:%M:%S"))
     print(f"耗時 {(end - start).total_seconds():.1f} 秒")
 
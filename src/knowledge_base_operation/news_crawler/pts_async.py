@@ -0,0 +1,356 @@
+"""
+PTS (公視) 非同步爬蟲
+=====================
+
+`pts.scrape_pts` 以單一 `requests.Session` 逐篇抓取、每篇固定 `time.sleep(2)`；
+此版本以 asyncio + httpx 併發抓取，在相同的禮貌限制下提高吞吐：
+
+  - 每個 host 的併發上限（semaphore）與請求速率上限（token bucket，預設 0.5 req/s，
+    等同原本每篇間隔 2 秒），等待時間與網路延遲重疊而不是相加
+  - 條件式 GET：記錄 ETag / Last-Modified，下次執行帶 If-None-Match / If-Modified-Since，
+    304 的文章視為未變動而跳過（驗證資訊存於 OUTPUT_DIR/.validators.json）
+  - 429 / 5xx / 連線錯誤以指數退避重試，尊重 Retry-After
+  - HTML 解析（`pts.parse_article_html` / `pts.extract_links`，有 lxml 時使用 lxml）
+    在 process pool 執行，不阻塞 event loop
+  - 跨執行去重（`frontier.Frontier`）：先前已收錄的網址不抓取，內容近似的文章不輸出
+
+文章欄位與 `pts.scrape_pts` 相同，解析完即寫入（`sink.open_sink`，CRAWL_SINK=jsonl,mongo）：
+    FactGraph/data/raw/news/pts/pts_<timestamp>.jsonl
+
+執行方式：
+    python -m src.knowledge_base_operation.news_crawler.pts_async --pages 3 --rate 0.5 --concurrency 4
+    python -m src.knowledge_base_operation.news_crawler.pts_async --base-url http://127.0.0.1:8000   # 本地 fixture
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.knowledge_base_operation.news_crawler.frontier import Frontier
+from src.knowledge_base_operation.news_crawler.pts import (
+    BASE_URL,
+    HEADERS,
+    MAX_PAGES,
+    OUTPUT_DIR,
+    TPE_TZ,
+    extract_links,
+    parse_article_html,
+)
+from src.knowledge_base_operation.news_crawler.sink import ArticleSink, open_sink
+
+# ──────────────────────────────
+# 參數／常數
+# ──────────────────────────────
+RATE_PER_HOST: float = 0.5  # 每秒請求數（原本每篇 sleep 2 秒）
+BURST: int = 1
+CONCURRENCY_PER_HOST: int = 4
+MAX_RETRIES: int = 3
+BACKOFF_BASE: float = 1.0
+BACKOFF_MAX: float = 30.0
+TIMEOUT: float = 10.0
+PARSE_WORKERS: int = 2
+VALIDATORS_FILE = ".validators.json"
+
+_RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+# ──────────────────────────────
+# 禮貌限制
+# ──────────────────────────────
+class HostLimiter:
+    """單一 host 的併發上限與 token bucket 速率限制（rate <= 0 表示不限速）。"""
+
+    def __init__(self, concurrency: int = CONCURRENCY_PER_HOST, rate: float = RATE_PER_HOST,
+                 burst: int = BURST) -> None:
+        self.sem = asyncio.Semaphore(concurrency)
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:  # 依序發放，避免多個等待者同時醒來超發
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ──────────────────────────────
+# 條件式 GET 快取
+# ──────────────────────────────
+class ValidatorCache:
+    """
+    url → {etag, last_modified}；path 為 None 時只存在記憶體。
+    200 回應的驗證資訊先暫存（`stage`），文章解析並寫入後才 `commit`：
+    解析或寫入失敗的文章下次不會因 304 被跳過。
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self.data: Dict[str, Dict[str, str]] = {}
+        self.pending: Dict[str, Dict[str, str]] = {}
+        if path and path.is_file():
+            self.data = json.loads(path.read_text(encoding="utf-8"))
+
+    def headers(self, url: str) -> Dict[str, str]:
+        v = self.data.get(url, {})
+        out = {}
+        if v.get("etag"):
+            out["If-None-Match"] = v["etag"]
+        if v.get("last_modified"):
+            out["If-Modified-Since"] = v["last_modified"]
+        return out
+
+    def stage(self, url: str, resp: httpx.Response) -> None:
+        etag, modified = resp.headers.get("etag"), resp.headers.get("last-modified")
+        if etag or modified:
+            self.pending[url] = {k: v for k, v in (("etag", etag), ("last_modified", modified)) if v}
+
+    def commit(self, url: str) -> None:
+        if url in self.pending:
+            self.data[url] = self.pending.pop(url)
+
+    def save(self) -> None:
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self.data, ensure_ascii=False), encoding="utf-8")
+
+
+# ──────────────────────────────
+# 抓取
+# ──────────────────────────────
+@dataclass
+class CrawlStats:
+    requests: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    retries: int = 0
+    errors: int = 0
+    bytes: int = 0
+    articles: int = 0
+    duplicates: int = 0
+    known_urls: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        rate = self.articles / self.seconds if self.seconds else 0.0
+        return (f"請求 {self.requests}、200 {self.fetched}、304 {self.not_modified}、重試 {self.retries}、"
+                f"失敗 {self.errors}、{self.bytes / 1e6:.1f} MB；略過已收錄 {self.known_urls}、"
+                f"重複 {self.duplicates}；文章 {self.articles} 篇"
+                f"（{rate:.2f} 篇/秒）")
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+@dataclass
+class AsyncFetcher:
+    """共用 httpx 連線池的抓取器；每個 host 一個 `HostLimiter`。"""
+
+    client: httpx.AsyncClient
+    concurrency: int = CONCURRENCY_PER_HOST
+    rate: float = RATE_PER_HOST
+    burst: int = BURST
+    max_retries: int = MAX_RETRIES
+    validators: ValidatorCache = field(default_factory=ValidatorCache)
+    stats: CrawlStats = field(default_factory=CrawlStats)
+    _limiters: Dict[str, HostLimiter] = field(default_factory=dict)
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(self.concurrency, self.rate, self.burst)
+        return self._limiters[host]
+
+    async def fetch(self, url: str, conditional: bool = True) -> Optional[str]:
+        """
+        回傳 HTML；304（未變動）或重試用盡時回傳 None。
+        conditional=False 時不帶驗證標頭（列表頁每次都要重新取得連結）。
+        """
+        limiter = self._limiter(url)
+        headers = self.validators.headers(url) if conditional else {}
+        for attempt in range(self.max_retries + 1):
+            wait: Optional[float] = None
+            async with limiter.sem:
+                await limiter.wait()
+                self.stats.requests += 1
+                try:
+                    resp = await self.client.get(url, headers=headers)
+                except httpx.TransportError as exc:
+                    print(f"❌ 請求錯誤：{exc!r} → {url}")
+                else:
+                    if resp.status_code == 304:
+                        self.stats.not_modified += 1
+                        return None
+                    if resp.status_code == 200:
+                        self.stats.fetched += 1
+                        self.stats.bytes += len(resp.content)
+                        if conditional:
+                            self.validators.stage(url, resp)
+                        return resp.content.decode("utf-8", errors="replace")
+                    if resp.status_code not in _RETRY_STATUS:
+                        print(f"❌ 失敗 {resp.status_code} → {url}")
+                        self.stats.errors += 1
+                        return None
+                    wait = _retry_after(resp)
+            if attempt == self.max_retries:
+                break
+            # 退避在 semaphore 外等待，不佔用該 host 的併發名額
+            if wait is None:
+                wait = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            self.stats.retries += 1
+            await asyncio.sleep(wait)
+        print(f"❌ 重試 {self.max_retries} 次仍失敗 → {url}")
+        self.stats.errors += 1
+        return None
+
+
+# ──────────────────────────────
+# 主流程
+# ──────────────────────────────
+async def crawl(max_pages: int = MAX_PAGES, base_url: str = BASE_URL, *,
+                concurrency: int = CONCURRENCY_PER_HOST, rate: float = RATE_PER_HOST, burst: int = BURST,
+                max_retries: int = MAX_RETRIES, validators: Optional[ValidatorCache] = None,
+                parse_pool: Optional[Executor] = None, stats: Optional[CrawlStats] = None,
+                frontier: Optional[Frontier] = None, sink: Optional[ArticleSink] = None) -> List[dict]:
+    """
+    抓取分類頁前 max_pages 頁的所有文章，回傳文章列表（依解析完成順序）。
+
+    Args:
+        base_url: 網站根網址（測試時指向本地 fixture 伺服器）
+        parse_pool: HTML 解析用的 executor；None 時使用 event loop 預設的 thread pool
+        stats: 傳入時累加統計數字
+        frontier: 跨執行去重庫；None 表示只在本次執行內去重
+        sink: 每篇文章通過去重後立即寫入（JSONL / MongoDB）
+    """
+    loop = asyncio.get_running_loop()
+    stats = stats if stats is not None else CrawlStats()
+    start = time.perf_counter()
+    results: list[dict] = []
+    seen_ids: set[str] = set()
+
+    def accept(item: Optional[dict]) -> None:
+        # 於 event loop 內依完成順序執行，不需要鎖
+        if not item:
+            return
+        if item["id"] in seen_ids:
+            stats.duplicates += 1
+            return
+        if frontier is not None and not frontier.add_article(item["url"], item["title"], item["content"], "pts"):
+            stats.duplicates += 1  # 與先前收錄的文章近似
+            return
+        seen_ids.add(item["id"])
+        results.append(item)
+        if sink is not None:
+            sink.write(item)
+        if frontier is not None:
+            frontier.mark_seen(item["url"], "pts")  # 寫入成功後才確認，失敗的網址下次重新抓取
+
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, limits=limits,
+                                 follow_redirects=True) as client:
+        fetcher = AsyncFetcher(client, concurrency, rate, burst, max_retries,
+                               validators or ValidatorCache(), stats)
+
+        async def page_links(page: int) -> List[str]:
+            html = await fetcher.fetch(f"{base_url}/category/1?page={page}", conditional=False)
+            if not html:
+                return []
+            return await loop.run_in_executor(parse_pool, extract_links, html, base_url)
+
+        async def article(url: str) -> None:
+            html = await fetcher.fetch(url)
+            if not html:
+                return
+            item = await loop.run_in_executor(parse_pool, parse_article_html, html, url)
+            if item:
+                accept(item)
+                fetcher.validators.commit(url)  # 寫入成功後才記錄，下次才會帶條件標頭
+
+        pages = await asyncio.gather(*(page_links(p) for p in range(1, max_pages + 1)))
+        links = list(dict.fromkeys(url for links in pages for url in links))
+        print(f"✅ {max_pages} 頁共找到 {len(links)} 則連結")
+        if frontier is not None:
+            new_links = frontier.filter_new(links)
+            stats.known_urls += len(links) - len(new_links)
+            links = new_links
+        await asyncio.gather(*(article(url) for url in links))
+
+    stats.articles += len(results)
+    stats.seconds += time.perf_counter() - start
+    return results
+
+
+def scrape_pts_async(max_pages: int = MAX_PAGES, base_url: str = BASE_URL, *,
+                     concurrency: int = CONCURRENCY_PER_HOST, rate: float = RATE_PER_HOST,
+                     parse_workers: int = PARSE_WORKERS, output_dir: Path = OUTPUT_DIR,
+                     frontier: Optional[Frontier] = None, sink_kinds: Optional[str] = None) -> Path:
+    """PTS 非同步爬蟲入口；文章邊解析邊寫入 JSONL（及 CRAWL_SINK 指定的 MongoDB），回傳 JSONL 路徑。"""
+    start = datetime.now(TPE_TZ)
+    print("開始時間:", start.strftime("%Y-%m-%d %H:%M:%S"))
+
+    validators = ValidatorCache(output_dir / VALIDATORS_FILE)
+    stats = CrawlStats()
+    out_path = output_dir / f"pts_{start.strftime('%Y%m%d%H%M')}.jsonl"
+    pool: Executor = ProcessPoolExecutor(parse_workers) if parse_workers > 0 else ThreadPoolExecutor(1)
+    with pool, open_sink(out_path, sink_kinds) as sink:
+        asyncio.run(crawl(max_pages, base_url, concurrency=concurrency, rate=rate,
+                          validators=validators, parse_pool=pool, stats=stats,
+                          frontier=frontier or Frontier(), sink=sink))
+    validators.save()
+
+    print("\n🎉 完成！")
+    print("輸出：", sink.summary())
+    print("📊", stats.summary())
+    return out_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PTS 非同步爬蟲")
+    parser.add_argument("--pages", type=int, default=MAX_PAGES, help="分類頁數")
+    parser.add_argument("--base-url", default=BASE_URL, help="網站根網址（測試時可指向本地 fixture）")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY_PER_HOST, help="每個 host 的併發上限")
+    parser.add_argument("--rate", type=float, default=RATE_PER_HOST, help="每個 host 每秒請求數，<= 0 不限速")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="解析 process 數，0 使用執行緒")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--frontier", type=Path, default=None, help="跨執行去重庫路徑（預設 CRAWL_FRONTIER_PATH）")
+    parser.add_argument("--sink", default=None, help="輸出目標，逗號分隔 jsonl / mongo（預設 CRAWL_SINK 或 jsonl）")
+    args = parser.parse_args()
+    scrape_pts_async(args.pages, args.base_url.rstrip("/"), concurrency=args.concurrency, rate=args.rate,
+                     parse_workers=args.parse_workers, output_dir=args.output_dir,
+                     frontier=Frontier(args.frontier) if args.frontier else None, sink_kinds=args.sink)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+爬蟲輸出 sink（邊解析邊寫入）
+===========================
+
+各爬蟲原本把文章累積在 list，結束時一次 `json.dump`；中途當掉整批遺失，
+且 KG ETL 只讀 MongoDB `News.Real_News`，需要另外手動匯入。此模組讓文章解析完就寫出：
+
+  - `JsonlSink` : 每篇一行 JSON 附加寫入並 flush，中斷時已寫出的文章都保留
+  - `MongoSink` : 累積 `UpdateOne(upsert=True)` 批次 bulk_write（達 batch_size 或距上次寫入超過
+    flush_interval 秒時送出），透過 `src.config.get_mongo_client()` 共用連線池；
+    以 `key`（publisher + 正規化網址雜湊，無網址時用日期 + 標題）為唯一索引，重跑不會產生重複文件
+  - `QueueSink` : 放入 ETL orchestrator 的 extract 佇列（SqliteQueue），文章接著自動抽取、入庫、向量化
+  - `open_sink(jsonl_path)` : 依環境變數 CRAWL_SINK（逗號分隔：jsonl、mongo、queue，預設 jsonl）組合
+
+用法：
+    with open_sink(OUTPUT_DIR / f"pts_{ts}.jsonl") as sink:
+        for item in ...:
+            sink.write(item)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.knowledge_base_operation.news_crawler.frontier import canonicalize_url
+
+MONGO_DB: str = os.getenv("CRAWL_MONGO_DB", "News")
+MONGO_COLLECTION: str = os.getenv("CRAWL_MONGO_COLLECTION", "Real_News")
+BATCH_SIZE: int = int(os.getenv("CRAWL_MONGO_BATCH", "100"))
+FLUSH_INTERVAL: float = float(os.getenv("CRAWL_MONGO_FLUSH_SECONDS", "5"))
+
+
+def article_key(item: Dict[str, Any]) -> str:
+    """冪等鍵：同一篇文章（不論哪次執行、網址寫法）得到相同字串。"""
+    publisher = str(item.get("publisher", "")).lower()
+    if item.get("url"):
+        basis = canonicalize_url(item["url"])
+    else:
+        basis = f"{item.get('date', '')}|{item.get('title', '')}"
+    return f"{publisher}:{hashlib.sha1(basis.encode('utf-8')).hexdigest()[:20]}"
+
+
+class ArticleSink(ABC):
+    """sink 介面：write / flush / close，可作為 context manager。"""
+
+    written: int = 0
+
+    @abstractmethod
+    def write(self, item: Dict[str, Any]) -> None:
+        ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def summary(self) -> str:
+        return f"{type(self).__name__} {self.written} 筆"
+
+    def __enter__(self) -> "ArticleSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlSink(ArticleSink):
+    """每篇一行附加寫入；每行寫完即 flush。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = self.path.open("a", encoding="utf-8")
+        self.written = 0
+
+    def write(self, item: Dict[str, Any]) -> None:
+        self._fp.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._fp.flush()
+        self.written += 1
+
+    def close(self) -> None:
+        if not self._fp.closed:
+            self._fp.close()
+
+    def summary(self) -> str:
+        return f"JSONL {self.written} 筆 → {self.path.resolve()}"
+
+
+class MongoSink(ArticleSink):
+    """
+    以 key 為唯一索引的 bulk upsert。
+
+    Args:
+        collection: pymongo Collection；None 時使用 `get_mongo_client()[MONGO_DB][MONGO_COLLECTION]`
+        batch_size: 每批 UpdateOne 數
+        flush_interval: 距上次寫入超過此秒數時，下一次 write 即送出（避免低流量時長時間停留在記憶體）
+    """
+
+    def __init__(self, collection: Any = None, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL) -> None:
+        if collection is None:
+            from src.config import get_mongo_client
+
+            collection = get_mongo_client()[MONGO_DB][MONGO_COLLECTION]
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._ops: List[Any] = []
+        self._last_flush = time.monotonic()
+        self.written = 0
+        self.upserted = 0
+        self.modified = 0
+        self.collection.create_index("key", unique=True, sparse=True)
+
+    def write(self, item: Dict[str, Any]) -> None:
+        from pymongo import UpdateOne
+
+        doc = {**item, "key": article_key(item)}
+        self._ops.append(UpdateOne(
+            {"key": doc["key"]},
+            {"$set": doc, "$setOnInsert": {"crawled_at": time.time()}},
+            upsert=True,
+        ))
+        self.written += 1
+        if len(self._ops) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._ops:
+            return
+        ops, self._ops = self._ops, []
+        result = self.collection.bulk_write(ops, ordered=False)
+        self.upserted += result.upserted_count
+        self.modified += result.modified_count
+        self._last_flush = time.monotonic()
+
+    def summary(self) -> str:
+        return (f"MongoDB {self.collection.name} {self.written} 筆"
+                f"（新增 {self.upserted}、更新 {self.modified}、未變動 {self.written - self.upserted - self.modified}）")
+
+
+class QueueSink(ArticleSink):
+    """每篇放入 orchestrator 的 extract 佇列（路徑：ETL_QUEUE_PATH）。"""
+
+    def __init__(self, queue: Any = None) -> None:
+        if queue is None:
+            from src.knowledge_base_operation.orchestrator.work_queue import SqliteQueue
+
+            queue = SqliteQueue()
+        self.queue = queue
+        self.written = 0
+
+    def write(self, item: Dict[str, Any]) -> None:
+        self.queue.put("extract", {**item, "key": article_key(item), "origin": time.time()})
+        self.written += 1
+
+    def summary(self) -> str:
+        return f"ETL 佇列 {self.written} 筆"
+
+
+class MultiSink(ArticleSink):
+    """同時寫入多個 sink。"""
+
+    def __init__(self, *sinks: ArticleSink) -> None:
+        self.sinks = list(sinks)
+
+    @property
+    def written(self) -> int:  # type: ignore[override]
+        return max((s.written for s in self.sinks), default=0)
+
+    def write(self, item: Dict[str, Any]) -> None:
+        for s in self.sinks:
+            s.write(item)
+
+    def flush(self) -> None:
+        for s in self.sinks:
+            s.flush()
+
+    def close(self) -> None:
+        for s in self.sinks:
+            s.close()
+
+    def summary(self) -> str:
+        return "；".join(s.summary() for s in self.sinks)
+
+
+def open_sink(jsonl_path: Optional[Path], kinds: Optional[str] = None) -> ArticleSink:
+    """依 kinds（預設環境變數 CRAWL_SINK，逗號分隔 jsonl / mongo / queue）建立 sink。"""
+    kinds = kinds if kinds is not None else os.getenv("CRAWL_SINK", "jsonl")
+    sinks: List[ArticleSink] = []
+    for kind in (k.strip().lower() for k in kinds.split(",") if k.strip()):
+        if kind == "jsonl":
+            if jsonl_path is not None:
+                sinks.append(JsonlSink(jsonl_path))
+        elif kind == "mongo":
+            sinks.append(MongoSink())
+        elif kind == "queue":
+            sinks.append(QueueSink())
+        else:
+            raise ValueError(f"未知的 CRAWL_SINK：{kind}（可用：jsonl, mongo, queue）")
+    return sinks[0] if len(sinks) == 1 else MultiSink(*sinks)
@@ -0,0 +1,362 @@
+"""
+事件驅動 ETL orchestrator：crawl → extract → load → embed → refresh
+=================================================================
+
+原本一篇新聞要能被 QA 檢索需手動執行四個腳本（爬蟲、knowledge_graph/pipeline.py、
+neo4j_kg_export、embed_kg_incremental），每一步都重跑全部資料。
+此模組把各階段串成以持久化佇列（`SqliteQueue`）連接的 worker，每篇新文章依序流過：
+
+  crawl    爬蟲以 CRAWL_SINK=...,queue 把文章放入 extract 佇列（或 `enqueue` 子命令匯入 JSONL）
+  extract  LLM 抽取實體與關係（knowledge_graph.extraction），可多執行緒併發
+  load     寫入 Neo4j（Neo4jLoader），並把同一批邊轉成 KG 表格列
+  embed    批次併入 KG 表格 → `update_embeddings` 只編碼新列 → 對齊的 .npy 與敘述庫
+  refresh  把向量 / 表格 / 敘述庫發佈成新的快照版本並切換 CURRENT（`kg_versions`），
+           記錄每篇文章從進入 pipeline 到可被檢索的新鮮度延遲
+
+每個階段完成時以同一交易 ack 並放入下游訊息；失敗以指數退避重試，超過次數轉為 dead。
+embed 與 refresh 在不同執行緒，表格合併 + `update_embeddings` 與 `publish_version` 以同一把鎖互斥，
+發佈時不會 hard link 到寫到一半的表格 / 向量 / 敘述庫。
+embed / refresh 一次處理佇列中累積的多則訊息，流量大時自然合併成較大的批次。
+KG 表格列由寫入 Neo4j 的同一份資料產生；定期以 neo4j_kg_export 全量匯出仍可作為校正。
+
+執行方式：
+  python -m src.knowledge_base_operation.orchestrator.pipeline enqueue FactGraph/data/raw/news/pts/*.jsonl
+  python -m src.knowledge_base_operation.orchestrator.pipeline run               # 常駐
+  python -m src.knowledge_base_operation.orchestrator.pipeline run --until-idle  # 處理完即結束
+  python -m src.knowledge_base_operation.orchestrator.pipeline stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.common.gadget import LOGGER
+from src.knowledge_base_operation.orchestrator.work_queue import DEFAULT_PATH, Message, SqliteQueue
+
+STAGES = ("extract", "load", "embed", "refresh")
+UPSTREAM = {"extract": None, "load": "extract", "embed": "load", "refresh": "embed"}
+BATCH = {"extract": 1, "load": 16, "embed": 512, "refresh": 10_000}
+EXTRACT_WORKERS: int = 4
+POLL_SECONDS: float = 1.0
+
+SNAPSHOTS_DIR = Path("data/processed/knowledge-graph/snapshots")
+
+ExtractFn = Callable[[str], Optional[Dict[str, Any]]]
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+# ──────────────────────────────
+# 資料轉換
+# ──────────────────────────────
+def article_text(item: Dict[str, Any]) -> str:
+    """與 knowledge_graph/pipeline.py 相同的抽取輸入格式。"""
+    return f"日期: {item.get('date', '')}\n標題: {item.get('title', '')}\n內容: {item.get('content', '')}"
+
+
+def kg_rows(nodes: List[Dict[str, Any]], rels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Neo4jLoader.insert_data 的輸入 → KG 表格列（props 為 dict）。
+
+    與 Neo4j 實際寫入的內容一致：缺名稱或 evidence 的關係略過；
+    節點屬性為 id / name / type + attributes，關係屬性為 doc_id / evidence / date。
+    """
+    by_name = {n.get("name"): n for n in nodes}
+    rows = []
+    for rel in rels:
+        head, tail, evidence = rel.get("source_name"), rel.get("target_name"), rel.get("evidence")
+        if not head or not tail or not evidence:
+            continue
+        rows.append({
+            "head": head,
+            "relation": rel.get("relation", "RELATED_TO"),
+            "tail": tail,
+            "head_props": by_name.get(head, {"name": head}),
+            "rel_props": {"doc_id": rel.get("doc_id", ""), "evidence": evidence, "date": rel.get("date")},
+            "tail_props": by_name.get(tail, {"name": tail}),
+        })
+    return rows
+
+
+def _default_extract(text: str) -> Optional[Dict[str, Any]]:
+    from src.knowledge_base_operation.knowledge_graph.extraction import extract_entities_relations
+    return extract_entities_relations(text)
+
+
+def _default_encode() -> EncodeFn:
+    """第一次 embed 時才載入 CKIP 模型。"""
+    from src.qa.preliminary_work.embed_kg_incremental import MODEL_ROOT
+    from src.qa.tools.kg_embed import encode_sentences, load_encoder
+
+    state: Dict[str, Any] = {}
+
+    def encode(texts: List[str]) -> np.ndarray:
+        if "model" not in state:
+            state["model"], state["tokenizer"] = load_encoder(MODEL_ROOT)
+        return encode_sentences(state["model"], state["tokenizer"], texts)
+
+    return encode
+
+
+# ──────────────────────────────
+# Orchestrator
+# ──────────────────────────────
+class Orchestrator:
+    """
+    Args:
+        queue: 持久化佇列
+        extract: 文章文字 → 抽取結果（None 表示失敗、訊息會重試）；預設呼叫 GPT
+        loader: 具 insert_data(nodes, rels) 的物件；預設第一次 load 時建立 Neo4jLoader
+        encode: 句子 → 向量；預設 CKIP
+        table_path: KG 表格；預設 resolve_kg_table(CSV_PATH)
+        store_dir / out_npy / lines_dir: 增量向量庫、對齊向量與敘述庫（同 embed_kg_incremental）
+        snapshots_dir: 快照版本目錄
+    """
+
+    def __init__(self, queue: SqliteQueue, *, extract: Optional[ExtractFn] = None, loader: Any = None,
+                 encode: Optional[EncodeFn] = None, table_path: Optional[Path] = None,
+                 store_dir: Optional[Path] = None, out_npy: Optional[Path] = None,
+                 lines_dir: Optional[Path] = None, snapshots_dir: Path = SNAPSHOTS_DIR,
+                 extract_workers: int = EXTRACT_WORKERS, batch: Optional[Dict[str, int]] = None) -> None:
+        from src.qa.preliminary_work import embed_kg_incremental as eki
+        from src.qa.tools.kg_table import resolve_kg_table
+
+        self.queue = queue
+        self.extract = extract or _default_extract
+        self._loader = loader
+        self._loader_lock = threading.Lock()
+        self._kg_lock = threading.Lock()  # 表格 / 向量 / 敘述庫的寫入與發佈互斥
+        self.encode = encode or _default_encode()
+        self.table_path = Path(table_path) if table_path else resolve_kg_table(Path(eki.CSV_PATH))
+        self.store_dir = Path(store_dir or eki.STORE_DIR)
+        self.out_npy = Path(out_npy or eki.OUT_NPY)
+        self.lines_dir = Path(lines_dir or eki.LINES_DIR)
+        self.snapshots_dir = Path(snapshots_dir)
+        self.extract_workers = max(1, extract_workers)
+        self.batch = {**BATCH, **(batch or {})}
+        self.handlers = {"extract": self.handle_extract, "load": self.handle_load,
+                         "embed": self.handle_embed, "refresh": self.handle_refresh}
+        self.processed = {s: 0 for s in STAGES}
+        self.last_version: Optional[str] = None
+
+    @property
+    def loader(self):
+        with self._loader_lock:
+            if self._loader is None:
+                from src.knowledge_base_operation.knowledge_graph.neo4j_loader import Neo4jLoader
+                self._loader = Neo4jLoader()
+            return self._loader
+
+    # ── 各階段 ──
+    def handle_extract(self, msgs: List[Message]) -> Dict[str, List[Dict[str, Any]]]:
+        out = []
+        for m in msgs:
+            item = m.payload
+            result = self.extract(article_text(item))
+            if not result:
+                raise ValueError(f"抽取失敗：{item.get('title', '')[:30]}")
+            out.append({
+                "item": item.get("key") or item.get("url") or item.get("title", ""),
+                "origin": item.get("origin", m.created),
+                "date": item.get("date", ""),
+                "result": result,
+            })
+        return {"load": out}
+
+    def handle_load(self, msgs: List[Message]) -> Dict[str, List[Dict[str, Any]]]:
+        from src.knowledge_base_operation.knowledge_graph.transformation import transform_to_neo4j_format
+
+        out = []
+        for m in msgs:
+            p = m.payload
+            nodes, rels = transform_to_neo4j_format(p["result"])
+            for r in rels:
+                r["doc_id"] = p["item"]
+                r["date"] = p["date"]
+            self.loader.insert_data(nodes, rels)
+            out.append({"item": p["item"], "origin": p["origin"], "rows": kg_rows(nodes, rels)})
+        return {"embed": out}
+
+    def handle_embed(self, msgs: List[Message]) -> Dict[str, List[Dict[str, Any]]]:
+        rows = [r for m in msgs for r in m.payload["rows"]]
+        stats: Dict[str, int] = {}
+        if rows:
+            from src.qa.preliminary_work.embed_kg_incremental import update_embeddings
+            with self._kg_lock:
+                df = self._merge_rows(rows)
+                stats = update_embeddings(df, self.table_path, self.encode, self.store_dir, self.out_npy,
+                                          self.lines_dir)
+        items = [[m.payload["item"], m.payload["origin"]] for m in msgs]
+        return {"refresh": [{"items": items, "changed": bool(rows), **stats}]}
+
+    def handle_refresh(self, msgs: List[Message]) -> Dict[str, List[Dict[str, Any]]]:
+        from src.qa.tools.kg_versions import current_version, publish_version
+
+        items = [tuple(it) for m in msgs for it in m.payload["items"]]
+        changed = any(m.payload.get("changed") for m in msgs)
+        with self._kg_lock:
+            version = current_version(self.snapshots_dir)
+            if changed or version is None:
+                version = publish_version(self.snapshots_dir, self.out_npy, self.table_path, self.lines_dir,
+                                          meta={"rows": max((m.payload.get("rows", 0) for m in msgs), default=0),
+                                                "articles": len(items)})
+        self.queue.record_freshness(version, items)
+        self.last_version = version
+        lat = [time.time() - origin for _, origin in items]
+        if lat:
+            LOGGER.info("🚀 快照 %s 已發佈：%d 篇，新鮮度 p50 %.1fs / max %.1fs",
+                        version, len(items), statistics.median(lat), max(lat))
+        return {}
+
+    def _merge_rows(self, rows: List[Dict[str, Any]]):
+        """新列併入 KG 表格（以三元組穩定鍵去重，新資料覆蓋舊資料）並原子寫回。"""
+        import pandas as pd
+
+        from src.qa.tools.emb_store import row_keys
+        from src.qa.tools.kg_table import PROPS_COLUMNS, encode_props, read_kg_table, write_kg_table
+
+        suffix = self.table_path.suffix
+        delta = pd.DataFrame([
+            {**r, **{c: encode_props(r[c], suffix) for c in PROPS_COLUMNS}} for r in rows
+        ])
+        if self.table_path.is_file():
+            merged = pd.concat([read_kg_table(self.table_path), delta], ignore_index=True)
+        else:
+            merged = delta
+        keys = pd.Series(row_keys(merged))
+        merged = merged[~keys.duplicated(keep="last").to_numpy()].reset_index(drop=True)
+        write_kg_table(merged, self.table_path)
+        return merged
+
+    # ── 執行 ──
+    def step(self, stage: str) -> int:
+        """處理一批訊息；回傳處理數（0 表示佇列目前沒有可處理的訊息）。"""
+        msgs = self.queue.claim(stage, self.batch[stage])
+        if not msgs:
+            return 0
+        try:
+            forward = self.handlers[stage](msgs)
+        except Exception as exc:  # pylint: disable=broad-except
+            dead = self.queue.fail(msgs, f"{type(exc).__name__}: {exc}")
+            LOGGER.warning("⚠️ %s 階段失敗（%d 則，%d 則轉為 dead）：%s", stage, len(msgs), dead, exc)
+            return 0
+        if not self.queue.ack(msgs, forward):
+            LOGGER.warning("⚠️ %s 階段租約已逾時並被重新租用，本批結果捨棄（%d 則）", stage, len(msgs))
+            return 0
+        self.processed[stage] += len(msgs)
+        return len(msgs)
+
+    def run(self, stages=STAGES, until_idle: bool = False, poll: float = POLL_SECONDS) -> None:
+        """
+        每個階段各自的 worker 執行緒（extract 為 extract_workers 個）。
+
+        until_idle=True 時，上游階段都結束且自己的佇列已清空的 worker 即結束。
+        """
+        done = {s: threading.Event() for s in STAGES}
+        stop = threading.Event()
+        stages = list(stages)
+        for s in STAGES:
+            if s not in stages:
+                done[s].set()
+
+        def finished(stage: str) -> bool:
+            up = UPSTREAM[stage]
+            return until_idle and (up is None or done[up].is_set()) and self.queue.pending(stage) == 0
+
+        counts = {s: self.extract_workers if s == "extract" else 1 for s in stages}
+        lock = threading.Lock()
+
+        def worker(stage: str) -> None:
+            try:
+                while not stop.is_set():
+                    if self.step(stage):
+                        continue
+                    if finished(stage):
+                        break
+                    stop.wait(poll)
+            finally:
+                with lock:
+                    counts[stage] -= 1
+                    if not counts[stage]:
+                        done[stage].set()
+
+        threads = [threading.Thread(target=worker, args=(stage,), name=f"etl-{stage}-{i}", daemon=True)
+                   for stage in stages for i in range(counts[stage])]
+        for t in threads:
+            t.start()
+        try:
+            while any(t.is_alive() for t in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            LOGGER.info("⏹️ 收到中斷，等待進行中的批次完成…")
+            stop.set()
+            for t in threads:
+                t.join()
+
+
+# ──────────────────────────────
+# CLI
+# ──────────────────────────────
+def enqueue_jsonl(queue: SqliteQueue, paths: List[Path]) -> int:
+    """把爬蟲輸出的 JSONL 放入 extract 佇列。"""
+    import json
+
+    from src.knowledge_base_operation.news_crawler.sink import article_key
+
+    total = 0
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as fp:
+            items = [json.loads(line) for line in fp if line.strip()]
+        total += queue.put_many("extract", ({**it, "key": it.get("key") or article_key(it)} for it in items))
+    return total
+
+
+def print_stats(queue: SqliteQueue) -> None:
+    depth = queue.depth()
+    for stage in STAGES:
+        d = depth.get(stage, {})
+        print(f"  {stage:<8} ready {d.get('ready', 0):>6,}  leased {d.get('leased', 0):>4,}  "
+              f"dead {d.get('dead', 0):>4,}")
+    lat = sorted(queue.freshness())
+    if lat:
+        p95 = lat[min(len(lat) - 1, int(round(0.95 * (len(lat) - 1))))]
+        print(f"  新鮮度（最近 {len(lat):,} 篇）p50 {statistics.median(lat):.1f}s  p95 {p95:.1f}s  "
+              f"max {lat[-1]:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="crawl → extract → load → embed → refresh orchestrator")
+    parser.add_argument("--queue", type=Path, default=DEFAULT_PATH, help="佇列 SQLite 檔")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_enq = sub.add_parser("enqueue", help="匯入爬蟲 JSONL 到 extract 佇列")
+    p_enq.add_argument("paths", nargs="+", type=Path)
+    p_run = sub.add_parser("run", help="啟動各階段 worker")
+    p_run.add_argument("--stages", default=",".join(STAGES))
+    p_run.add_argument("--until-idle", action="store_true")
+    p_run.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS)
+    sub.add_parser("stats", help="佇列深度與新鮮度")
+    sub.add_parser("retry-dead", help="把 dead 訊息重設為 ready")
+    args = parser.parse_args()
+
+    with SqliteQueue(args.queue) as queue:
+        if args.cmd == "enqueue":
+            print(f"📥 已放入 extract 佇列 {enqueue_jsonl(queue, args.paths):,} 篇")
+        elif args.cmd == "run":
+            orch = Orchestrator(queue, extract_workers=args.extract_workers)
+            orch.run(args.stages.split(","), until_idle=args.until_idle)
+            print(f"✅ 處理數：{orch.processed}")
+            print_stats(queue)
+        elif args.cmd == "retry-dead":
+            print(f"🔁 重設 {queue.retry_dead():,} 則")
+        else:
+            print_stats(queue)
+
+
+if __name__ == "__main__":
+    main()
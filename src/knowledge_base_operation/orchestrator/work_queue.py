@@ -0,0 +1,257 @@
+"""
+持久化工作佇列（SQLite）
+=====================
+
+ETL orchestrator 各階段之間以具名佇列（extract / load / embed / refresh）傳遞訊息，
+全部放在同一個 SQLite 檔（WAL），行程重啟後未完成的訊息會再被處理：
+
+  - `put` / `put_many`   : 放入訊息（payload 為可 JSON 序列化的 dict）
+  - `claim`              : 租用最多 limit 則可處理的訊息，每次租用發給新的 lease token；
+                           租約逾時（worker 當掉）計為一次失敗，之後可再被租用，超過 max_attempts 轉為 dead
+  - `ack`                : 完成並刪除訊息，同一個交易內把下游訊息放入 forward 佇列；
+                           租約已逾時並被其他 worker 重新租用時（token 不符）整批不生效，不會重複放入
+  - `fail`               : 失敗重試（指數退避），超過 max_attempts 轉為 dead；token 不符時略過
+  - `depth`              : 各佇列 ready / leased / dead 數量
+
+`record_freshness` / `freshness` 記錄文章進入 pipeline 到可被檢索的延遲。
+
+路徑：環境變數 ETL_QUEUE_PATH（預設 FactGraph/data/interim/etl/queue.sqlite3）；":memory:" 可用於測試
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_PATH = Path(os.getenv("ETL_QUEUE_PATH", "FactGraph/data/interim/etl/queue.sqlite3"))
+LEASE_SECONDS: float = 300.0
+MAX_ATTEMPTS: int = 5
+BACKOFF_BASE: float = 2.0  # 第 n 次失敗後等待 BACKOFF_BASE ** n 秒
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,  -- 刪除後不重用 id
+    queue        TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'ready',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    leased_until REAL,
+    lease_token  TEXT,
+    created      REAL NOT NULL,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS msg_ready ON messages(queue, status, available_at);
+CREATE TABLE IF NOT EXISTS freshness (
+    id        INTEGER PRIMARY KEY,
+    version   TEXT,
+    item      TEXT,
+    origin    REAL,
+    published REAL,
+    latency   REAL
+);
+"""
+
+
+class _StaleLease(Exception):
+    """ack 時租約已不屬於呼叫者（回滾整個交易）。"""
+
+
+@dataclass
+class Message:
+    id: int
+    queue: str
+    payload: Dict[str, Any]
+    attempts: int
+    created: float
+    token: str  # 本次租用的 lease token；ack / fail 需相符
+
+
+class SqliteQueue:
+    """
+    Args:
+        path: SQLite 檔路徑
+        lease: 租約秒數；超過仍未 ack / fail 的訊息視為 worker 中斷，可被重新租用
+        max_attempts: 失敗次數上限，超過即標記為 dead（保留 error 供排查）
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, lease: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS) -> None:
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SqliteQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _migrate(self) -> None:
+        """舊版 messages 表（無 AUTOINCREMENT / lease_token）改建為新結構，保留既有訊息。"""
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'messages'").fetchone()
+        if row is None or "lease_token" in row[0]:
+            return
+        self._conn.executescript(
+            "BEGIN; ALTER TABLE messages RENAME TO messages_old; DROP INDEX IF EXISTS msg_ready;"
+            + _SCHEMA +
+            "INSERT INTO messages(id, queue, payload, status, attempts, available_at, created, error) "
+            "SELECT id, queue, payload, CASE status WHEN 'leased' THEN 'ready' ELSE status END, attempts, "
+            "available_at, created, error FROM messages_old; DROP TABLE messages_old; COMMIT;")
+
+    # ── 交易 ──
+    def _tx(self, fn, *args):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(*args)
+                self._conn.execute("COMMIT")
+                return out
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _insert(self, queue: str, payloads: Iterable[Dict[str, Any]], now: float) -> int:
+        rows = [(queue, json.dumps(p, ensure_ascii=False, default=str), now, now) for p in payloads]
+        self._conn.executemany(
+            "INSERT INTO messages(queue, payload, available_at, created) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # ── 生產 ──
+    def put(self, queue: str, payload: Dict[str, Any]) -> None:
+        self.put_many(queue, [payload])
+
+    def put_many(self, queue: str, payloads: Iterable[Dict[str, Any]]) -> int:
+        return self._tx(self._insert, queue, list(payloads), time.time())
+
+    # ── 消費 ──
+    def claim(self, queue: str, limit: int = 1) -> List[Message]:
+        """租用最多 limit 則訊息（先進先出）。"""
+
+        def run() -> List[Message]:
+            now, token = time.time(), uuid.uuid4().hex
+            # 租約逾時：持有者可能已當掉，計為一次失敗（反覆讓 worker 當掉的訊息最終轉為 dead）
+            self._conn.execute(
+                "UPDATE messages SET status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'ready' END, "
+                "attempts = attempts + 1, error = 'lease expired', leased_until = NULL, lease_token = NULL "
+                "WHERE queue = ? AND status = 'leased' AND leased_until < ?", (self.max_attempts, queue, now))
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts, created FROM messages "
+                "WHERE queue = ? AND status = 'ready' AND available_at <= ? ORDER BY id LIMIT ?",
+                (queue, now, limit)).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE messages SET status = 'leased', leased_until = ?, lease_token = ? WHERE id = ?",
+                    [(now + self.lease, token, r[0]) for r in rows])
+            return [Message(r[0], queue, json.loads(r[1]), r[2], r[3], token) for r in rows]
+
+        return self._tx(run)
+
+    def ack(self, messages: Sequence[Message], forward: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> bool:
+        """
+        刪除已完成的訊息，並在同一交易內放入下游訊息；回傳是否生效。
+
+        任一訊息的租約已不屬於呼叫者（逾時後被重新租用、已完成或已轉為 dead）時整批回滾、
+        不放入下游訊息：forward 是整批的產出，部分放入會與重新租用者的產出重複。
+        仍屬於呼叫者的訊息於租約逾時後重新處理。
+        """
+
+        def run() -> None:
+            now = time.time()
+            for m in messages:
+                cur = self._conn.execute(
+                    "DELETE FROM messages WHERE id = ? AND queue = ? AND status = 'leased' AND lease_token = ?",
+                    (m.id, m.queue, m.token))
+                if cur.rowcount == 0:
+                    raise _StaleLease(m.id)
+            for queue, payloads in (forward or {}).items():
+                self._insert(queue, payloads, now)
+
+        try:
+            self._tx(run)
+        except _StaleLease:
+            return False
+        return True
+
+    def fail(self, messages: Sequence[Message], error: str) -> int:
+        """記錄失敗；回傳本次轉為 dead 的數量。"""
+
+        def run() -> int:
+            now, dead = time.time(), 0
+            owned = "WHERE id = ? AND queue = ? AND status = 'leased' AND lease_token = ?"
+            for m in messages:
+                attempts = m.attempts + 1
+                if attempts >= self.max_attempts:
+                    cur = self._conn.execute(
+                        "UPDATE messages SET status = 'dead', attempts = ?, error = ?, leased_until = NULL, "
+                        "lease_token = NULL " + owned, (attempts, error, m.id, m.queue, m.token))
+                    dead += cur.rowcount
+                else:
+                    self._conn.execute(
+                        "UPDATE messages SET status = 'ready', attempts = ?, error = ?, available_at = ?, "
+                        "leased_until = NULL, lease_token = NULL " + owned,
+                        (attempts, error, now + BACKOFF_BASE ** attempts, m.id, m.queue, m.token))
+            return dead
+
+        return self._tx(run)
+
+    def retry_dead(self, queue: Optional[str] = None) -> int:
+        """把 dead 訊息重設為 ready（修正問題後重跑）。"""
+
+        def run() -> int:
+            cur = self._conn.execute(
+                "UPDATE messages SET status = 'ready', attempts = 0, available_at = ? "
+                "WHERE status = 'dead' AND (? IS NULL OR queue = ?)", (time.time(), queue, queue))
+            return cur.rowcount
+
+        return self._tx(run)
+
+    # ── 統計 ──
+    def depth(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT queue, status, COUNT(*) FROM messages GROUP BY queue, status").fetchall()
+        out: Dict[str, Dict[str, int]] = {}
+        for queue, status, n in rows:
+            out.setdefault(queue, {})[status] = n
+        return out
+
+    def pending(self, queue: str) -> int:
+        """ready + leased 數（dead 不計）。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE queue = ? AND status != 'dead'", (queue,)).fetchone()
+        return row[0]
+
+    def record_freshness(self, version: str, items: Iterable[tuple]) -> None:
+        """items: (item_key, origin_ts)；latency = 發佈時間 - origin。"""
+        now = time.time()
+        rows = [(version, key, origin, now, now - origin) for key, origin in items]
+        self._tx(lambda: self._conn.executemany(
+            "INSERT INTO freshness(version, item, origin, published, latency) VALUES (?, ?, ?, ?, ?)", rows))
+
+    def freshness(self, last: int = 1000) -> List[float]:
+        """最近 last 筆的新鮮度延遲（秒）。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT latency FROM freshness ORDER BY id DESC LIMIT ?", (last,)).fetchall()
+        return [r[0] for r in rows]
@@ -4,7 +4,7 @@
 Embedding helpers (CKIP-SBERT) with dedupe functionality.
 
 提供：
- - load_embedder: 載入 SentenceTransformer 模型
+ - load_embedder: 由共用註冊表取得 SentenceTransformer 模型
  - embed_text: 將文字轉為單位向量
  - embed_triple: 將三元組轉為文字後嵌入
  - dedupe: 以實體前綴分組，保留語義最長，並重編號
@@ -14,50 +14,24 @@ from __future__ import annotations
 
 import re
 from pathlib import Path
-from typing import List, Callable
+from typing import TYPE_CHECKING, List, Callable
 
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+
+from ...tools import embedder as registry
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # Regex patterns
 ENTITY_PATTERN = re.compile(r"^\d+\.\s*([^\s（]+)")
 NUMBERING_PATTERN = re.compile(r"^(?:\[\d+\]\.|\d+\.)\s*")
 
 
-def _resolve_snapshot(root: Path) -> Path:
-    """找到包含 config.json 與模型權重的快照目錄"""
-    root = root.expanduser()
-    # 直接在 root 目錄下
-    if (root / 'config.json').is_file() and any(
-            (root / ext).is_file() for ext in [
-                'pytorch_model.bin', 'model.safetensors', 'tf_model.h5',
-                'model.ckpt.index', 'flax_model.msgpack'
-            ]
-    ):
-        return root
-
-    # 在 snapshots 子目錄中尋找
-    snapshots = root / 'snapshots'
-    if snapshots.is_dir():
-        for cand in snapshots.iterdir():
-            if (cand / 'config.json').is_file() and any(
-                    (cand / ext).is_file() for ext in [
-                        'pytorch_model.bin', 'model.safetensors', 'tf_model.h5',
-                        'model.ckpt.index', 'flax_model.msgpack'
-                    ]
-            ):
-                return cand
-
-    raise FileNotFoundError(f'找不到有效模型快照於 {root}')
-
-
-def load_embedder(model_root: Path, device: str | None = None) -> SentenceTransformer:
-    """載入 CKIP-SBERT 模型並回傳 embedder"""
-    resolved = _resolve_snapshot(model_root)
-    import torch
-    device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
-    print(f'🔧 載入 CKIP-SBERT: {resolved} (device={device})', flush=True)
-    return SentenceTransformer(str(resolved), device=device, trust_remote_code=True)
+def load_embedder(model_root: Path, device: str | None = None,
+                  backend: str | None = None) -> SentenceTransformer:
+    """取得 CKIP-SBERT embedder（經由共用註冊表，同一 process 只載入一次；backend 見 EMBED_BACKEND）"""
+    return registry.get_embedder(model_root, device, backend)
 
 
 def embed_text(emb: SentenceTransformer, text: str) -> np.ndarray:
@@ -84,6 +58,8 @@ def dedupe(
     依第一實體分桶，同一桶內若相似度 >= threshold 視為重複，
     只保留最長敘述，最後重編號。
     """
+    from sentence_transformers import util
+
     groups: dict[str, list[tuple[str, np.ndarray]]] = {}
     order: list[str] = []
 
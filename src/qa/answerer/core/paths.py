@@ -16,7 +16,8 @@ from typing import Dict, Any
 __all__ = [
     'PROJECT_ROOT', 'FACTGRAPH_SRC', 'ANSWERER_ROOT', 'DATA_DIR',
     'RAW_KG_DIR', 'PROCESSED_KG_DIR', 'INTERIM_ANSWERER_DIR', 'USER_INPUT_DIR',
-    'KG_EMB_PATH', 'KG_CSV_PATH', 'OUT_DIR', 'USER_KG_PATH', 'USER_JUDGE_PATH',
+    'KG_EMB_PATH', 'KG_CSV_PATH', 'KG_STORE_DIR', 'KG_LINES_DIR', 'KG_SNAPSHOTS_DIR',
+    'OUT_DIR', 'USER_KG_PATH', 'USER_JUDGE_PATH',
     'CKIP_ROOT', 'PROMPTS_DIR', 'EXTRACT_PROMPT_PATH', 'JUDGE_PROMPT_PATH',
     'print_paths'
 ]
@@ -48,6 +49,9 @@ USER_INPUT_DIR: Path = INTERIM_ANSWERER_DIR / 'user-input'
 # 知識圖譜檔案
 KG_EMB_PATH: Path = PROCESSED_KG_DIR / 'kg-triplet.emb.npy'
 KG_CSV_PATH: Path = RAW_KG_DIR / 'neo4j-kg-raw-graph.csv'
+KG_STORE_DIR: Path = PROCESSED_KG_DIR / 'emb-store'
+KG_LINES_DIR: Path = PROCESSED_KG_DIR / 'kg-lines'
+KG_SNAPSHOTS_DIR: Path = PROCESSED_KG_DIR / 'snapshots'
 
 # Answerer 輸出目錄
 OUT_DIR: Path = DATA_DIR / 'processed' / 'answerer'
@@ -0,0 +1,25 @@
+"""
+Neo4j 鄰域檢索 backend（KG_BACKEND=graph）
+"""
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from ..core.embedding import load_embedder
+from ..core.paths import CKIP_ROOT, KG_STORE_DIR
+from ...tools.graph_retrieval import GraphRetriever, ensure_entity_index
+
+__all__ = ['get_retriever']
+
+
+@lru_cache(maxsize=None)
+def get_retriever(hops: int = 2, backend: str | None = None) -> GraphRetriever:
+    """整個行程共用的檢索器（即時編碼向量的快取跨請求保留）；第一次建立時確保 Entity.name 索引。"""
+    ensure_entity_index()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        emb = load_embedder(CKIP_ROOT, backend=backend)
+        return emb.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+    return GraphRetriever(KG_STORE_DIR, encode_fn=encode, hops=hops)
@@ -6,9 +6,13 @@
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
 
-__all__ = ['load_kg_vectors', 'load_kg_df']
+from ..core.paths import KG_EMB_PATH, KG_CSV_PATH, KG_LINES_DIR, KG_SNAPSHOTS_DIR
+from ...tools.kg_snapshot import KGSnapshot
+from ...tools.kg_table import read_kg_table, resolve_kg_table
+from ...tools.snapshot_manager import SnapshotManager, get_manager
+
+__all__ = ['load_kg_vectors', 'load_kg_df', 'kg_manager', 'get_kg']
 
 
 def load_kg_vectors(path: Path):
@@ -17,8 +21,17 @@ def load_kg_vectors(path: Path):
 
 
 def load_kg_df(path: Path):
-    df = pd.read_csv(path)
+    df = read_kg_table(resolve_kg_table(path))
     hp_col = 'head_props' if 'head_props' in df.columns else None
     rp_col = 'rel_props' if 'rel_props' in df.columns else None
     tp_col = 'tail_props' if 'tail_props' in df.columns else None
     return (df, hp_col, rp_col, tp_col)
+
+
+def kg_manager() -> SnapshotManager:
+    """與 verifier 相同路徑時共用同一個管理器（同一份快照與熱更新）；全表掃描，KG_SHARDS > 1 時分片。"""
+    return get_manager(KG_EMB_PATH, KG_CSV_PATH, KG_LINES_DIR, KG_SNAPSHOTS_DIR, sharded=True)
+
+
+def get_kg() -> KGSnapshot:
+    return kg_manager().get()
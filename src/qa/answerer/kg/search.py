@@ -8,32 +8,40 @@ KG 檢索模組
   回傳符合門檻的敘述區塊列表。
 
 主要函式：
-  - search_by_triples
+  - search_by_triples : 掃描 CSV/npy 快照（可選多行程分片）
+  - search_by_graph   : 以 Neo4j 鄰域為候選（KG_BACKEND=graph）
 """
 
 from __future__ import annotations
 
-import json
 from typing import (
+    TYPE_CHECKING,
     List, Dict, Any,
     Callable, Optional
 )
 
 import numpy as np
-import pandas as pd
+
+from ...tools.kg_nl import number_line
+from ...tools.kg_table import decode_props
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def search_by_triples(
         triples: List[Dict[str, str]],
         embed_fn: Callable[[Dict[str, str]], np.ndarray],
         kg_vecs_norm: np.ndarray,
-        kg_df: pd.DataFrame,
+        kg_df: 'pd.DataFrame',
         build_block_fn: Callable[..., str],
         top_k: int = 100,
         sim_th: float = 0.8,
         hp_col: Optional[str] = None,
         rp_col: Optional[str] = None,
-        tp_col: Optional[str] = None
+        tp_col: Optional[str] = None,
+        line_store: Optional[Any] = None,
+        searcher: Optional[Any] = None
 ) -> List[str]:
     """
     依據輸入的三元組列表進行向量相似度檢索，
@@ -50,22 +58,32 @@ def search_by_triples(
         hp_col: head 屬性 json 欄位名稱，若無則設 None。
         rp_col: relation 屬性 json 欄位名稱，若無則設 None.
         tp_col: tail 屬性 json 欄位名稱，若無則設 None.
+        line_store: 預先計算的敘述庫（KGLineStore），提供時直接依列號取句，
+            不再逐列解碼屬性與組句。
+        searcher: 分片檢索器（ShardedSearcher），提供時全部三元組一次送給各分片 worker
+            掃描，取代逐一計算 kg_vecs_norm @ vec。
 
     Returns:
         符合條件的敘述區塊列表，每個元素為一行文字，保留原始編號。
     """
     results: List[str] = []
 
-    for tp in triples:
-        vec = embed_fn(tp)
-        sims = kg_vecs_norm @ vec
-        # 取出符合 sim_th 且排名前 top_k 的索引
-        top_indices = np.argsort(sims)[-top_k:][::-1]
+    if searcher is not None:
+        vecs = [embed_fn(tp) for tp in triples]
+        hits = [rows for rows, _ in searcher.topk_many(np.stack(vecs), top_k, sim_th)] if vecs else []
+    else:
+        hits = []
+        for tp in triples:
+            sims = kg_vecs_norm @ embed_fn(tp)
+            # 取出符合 sim_th 且排名前 top_k 的索引
+            top_indices = np.argsort(sims)[-top_k:][::-1]
+            hits.append(top_indices[sims[top_indices] >= sim_th])
 
+    for top_indices in hits:
         for idx in top_indices:
-            score = sims[idx]
-            if score < sim_th:
-                break
+            if line_store is not None:
+                results.append(number_line(1, line_store.line(int(idx))))
+                continue
             row = kg_df.iloc[idx]
             # 基本三元組
             tri = {
@@ -75,9 +93,9 @@ def search_by_triples(
             }
             # 屬性詳情
             det: Dict[str, Dict[str, Any]] = {
-                'head': json.loads(row[hp_col]) if hp_col and row.get(hp_col) else {},
-                'rel': json.loads(row[rp_col]) if rp_col and row.get(rp_col) else {},
-                'tail': json.loads(row[tp_col]) if tp_col and row.get(tp_col) else {}
+                'head': decode_props(row[hp_col]) if hp_col else {},
+                'rel': decode_props(row[rp_col]) if rp_col else {},
+                'tail': decode_props(row[tp_col]) if tp_col else {}
             }
             # 使用外部函式組合文字區塊
             block = build_block_fn([tri], {tuple(tri.values()): det})
@@ -86,3 +104,24 @@ def search_by_triples(
                 results.append(line)
 
     return results
+
+
+def search_by_graph(
+        triples: List[Dict[str, str]],
+        embed_fn: Callable[[Dict[str, str]], np.ndarray],
+        retriever: Any,
+        build_block_fn: Callable[..., str],
+        top_k: int = 100,
+        sim_th: float = 0.8,
+) -> List[str]:
+    """
+    與 search_by_triples 相同輸出，但候選集合改為各三元組 head / tail
+    在 Neo4j 中的鄰域邊，由 retriever（GraphRetriever）以快取向量排序。
+    """
+    results: List[str] = []
+    for tp in triples:
+        vec = embed_fn(tp)
+        for tri, det in retriever.search(tp, vec, top_k=top_k, sim_th=sim_th):
+            block = build_block_fn([tri], {tuple(tri.values()): det})
+            results.extend(block.splitlines())
+    return results
@@ -5,28 +5,23 @@
 
 from __future__ import annotations
 
-import time
+from typing import Callable, Optional
 
-from openai import OpenAI, OpenAIError, APITimeoutError
+from ....common.llm_backends import for_stage
 
 __all__ = ['GPTClient']
 
 
 class GPTClient:
+    """answerer 的對話介面；依階段路由至 openai 或 local 後端（見 src.common.llm_backends）。"""
 
     def __init__(self, api_key: str, model_id: str, **kwargs):
-        self._client = OpenAI(api_key=api_key)
+        self._api_key = api_key
         self._base_kwargs = {'model': model_id, **kwargs}
 
-    def chat(self, system_prompt: str, user_prompt: str) -> str:
-        backoff = 5
-        while True:
-            try:
-                resp = self._client.chat.completions.create(
-                    messages=[{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': user_prompt}],
-                    **self._base_kwargs)
-                return resp.choices[0].message.content.strip()
-            except (OpenAIError, APITimeoutError) as err:
-                print(f'[WARN] GPT retry in {backoff}s → {err}')
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 60)
+    def chat(self, system_prompt: str, user_prompt: str, stage: str = 'judge',
+             on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """on_delta 不為 None 時以串流呼叫，每段 delta 依序傳入。"""
+        return for_stage(stage, self._api_key).chat(
+            [{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': user_prompt}],
+            stream=on_delta is not None, on_delta=on_delta, **self._base_kwargs)
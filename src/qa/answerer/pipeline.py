@@ -11,151 +11,227 @@ answerer ─ 問答主流程（Orchestrator）
 4. 去重（相似僅保留最長條目）
 5. 呼叫 GPT 評估最終結果
 6. 依輸入檔名動態輸出 user_kg_*.txt 與 user_qa_judge_*.txt
+
+web 服務以 `answer()` 於 process 內呼叫，embedder 與服務共用同一份權重。
+
+選項：--trace trace.json 輸出各階段耗時；--profile cprofile|pyinstrument 產生效能分析
 """
 
 from __future__ import annotations
 
 import argparse
+import contextvars
 import os
-import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .core.embedding import load_embedder, embed_triple, embed_text, dedupe
 # ──────────────────────── 本專案自製模組 ────────────────────────
 from .core.paths import (
     CKIP_ROOT,
-    KG_EMB_PATH,
-    KG_CSV_PATH,
     OUT_DIR,
     USER_INPUT_DIR,
     EXTRACT_PROMPT_PATH,
     JUDGE_PROMPT_PATH,
 )
-from .core.utils import safe_json_loads, clean_json_block
-from .kg.loader import load_kg_vectors, load_kg_df
-from .kg.search import search_by_triples
+from .kg.graph import get_retriever
+from .kg.loader import get_kg
+from .kg.search import search_by_graph, search_by_triples
 from .llm.gpt import GPTClient
 from .llm.prompt_loader import load_prompt
 from ..tools import data_utils as du
+from ...common import tracing
 # 需用到 qa.tools 生成敘述區塊
 from ..tools import kg_nl as knl
+from ..tools.context_builder import build_context, rank_by_similarity, report
+from ..tools.json_stream import TripleStream, parse_json
 
 # ───────────────────────────── 參數設定 ─────────────────────────
 SIM_TH: float = 0.80  # KG 相似度門檻
 TOP_K: int = 100  # 每個三元組取前 TOP_K 條
+KG_BACKEND: str = os.getenv("KG_BACKEND", "snapshot")  # snapshot | graph
+GRAPH_HOPS: int = int(os.getenv("KG_GRAPH_HOPS", "2"))
+EMBED_BACKEND: str = os.getenv("EMBED_BACKEND", "torch")  # torch | onnx | onnx-int8
+JUDGE_TOKEN_BUDGET: int = int(os.getenv("JUDGE_TOKEN_BUDGET", "6000"))  # <= 0 表示不裁切
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Answerer pipeline: 指定問題檔案 <id>.txt")
     parser.add_argument("input_file", help="Path or filename of question file, e.g. '2024-...txt'")
+    parser.add_argument("--trace", default=None, help="輸出 JSON trace 檔（各階段耗時、命中與 token 數）")
+    parser.add_argument("--profile", choices=("cprofile", "pyinstrument"), default=None,
+                        help="效能分析（預設讀取 FACTGRAPH_PROFILE）")
     args = parser.parse_args()
 
+    try:
+        answer(args.input_file, args.profile)
+    finally:
+        if args.trace:
+            tracing.dump(args.trace)
+
+
+def answer(input_file: str, profile: str | None = None) -> None:
+    """以追蹤（與選用的效能分析）包裝單一問題處理；web 服務於 process 內直接呼叫。"""
+    with tracing.profiled(f"answerer-{Path(input_file).stem}", profile), \
+            tracing.trace("answerer", Path(input_file).stem):
+        _answer(input_file)
+
+
+def _answer(input_file: str) -> None:
     # 讀取問題檔案
-    input_path = Path(args.input_file)
+    input_path = Path(input_file)
     if not input_path.is_file():
-        candidate = Path(USER_INPUT_DIR) / args.input_file
+        candidate = Path(USER_INPUT_DIR) / input_file
         if candidate.is_file():
             input_path = candidate
     if not input_path.is_file():
-        for p in Path(USER_INPUT_DIR).rglob(Path(args.input_file).name):
+        for p in Path(USER_INPUT_DIR).rglob(Path(input_file).name):
             input_path = p
             break
     if not input_path.is_file():
-        sys.exit(f"❌ 無效的輸入檔案: {args.input_file}")
+        sys.exit(f"❌ 無效的輸入檔案: {input_file}")
 
     question = input_path.read_text(encoding="utf-8").strip()
     slug = input_path.stem
     print(f"🔸 Question: {question}")
 
     # 資源初始化
-    emb = load_embedder(CKIP_ROOT)
-    kg_vecs, kg_vecs_norm = load_kg_vectors(KG_EMB_PATH)
-    kg_df, hp_col, rp_col, tp_col = load_kg_df(KG_CSV_PATH)
-    extract_prompt = load_prompt(EXTRACT_PROMPT_PATH)
-    judge_prompt = load_prompt(JUDGE_PROMPT_PATH)
-    gpt = GPTClient(
-        api_key=os.getenv("GPT_API"),
-        model_id=os.getenv("GPT_MODEL", "gpt-4o"),
-        temperature=0.4,
-        top_p=0.9,
-        max_tokens=2048,
-    )
-
-    # 2. 呼叫 GPT 抽取三元組
-    raw_resp = gpt.chat(extract_prompt, question)
-    print("🪵 GPT raw response:\n", raw_resp)
-
-    # 擷取 JSON block
-    block = clean_json_block(raw_resp)
-    # 移除所有反引號，並去掉可能的 "json" 前綴
-    cleaned = re.sub(r'^\s*json\s*', '', block, flags=re.IGNORECASE)
-    cleaned = cleaned.replace("`", "").strip()
-    print("🪵 Cleaned JSON block:\n", cleaned)
-
+    with tracing.span("load"):
+        emb = load_embedder(CKIP_ROOT, backend=EMBED_BACKEND)
+        extract_prompt = load_prompt(EXTRACT_PROMPT_PATH)
+        judge_prompt = load_prompt(JUDGE_PROMPT_PATH)
+        gpt = GPTClient(
+            api_key=os.getenv("GPT_API"),
+            model_id=os.getenv("GPT_MODEL", "gpt-4o"),
+            temperature=0.4,
+            top_p=0.9,
+            max_tokens=2048,
+        )
+
+    # 2. 呼叫 GPT 抽取三元組（串流；每條三元組一完整就在背景開始嵌入，離開 with 時等待嵌入完成）
+    pre_embedded = {}
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="triple-embed") as pool:
+        def _pre_embed(tp):
+            # 於 LLM 背景執行緒呼叫，只負責排程；沿用 context 讓 embed span 記到同一個 trace
+            if du.key(tp) not in pre_embedded:
+                pre_embedded[du.key(tp)] = pool.submit(contextvars.copy_context().run, embed_fn, tp)
+
+        def embed_fn(tp):
+            with tracing.span("embed"):
+                return embed_triple(emb, tp)
+
+        stream = TripleStream(on_triple=_pre_embed)
+        with tracing.span("extract_round_1"):
+            raw_resp = gpt.chat(extract_prompt, question, stage="extract", on_delta=stream)
+        print("🪵 GPT raw response:\n", raw_resp)
+
+    # 串流已組出的三元組之外，再以整份文件補上（容忍圍欄與尾逗號）
     try:
-        data = safe_json_loads(cleaned)
-    except Exception as e:
-        print("[ERROR] 無法解析 JSON，cleaned 內容如下：", cleaned)
-        sys.exit("❌ GPT 回傳的內容不是合法 JSON，請檢查模型輸出與 prompt 設定")
+        data = parse_json(raw_resp)
+    except Exception:
+        if not stream.triples:
+            print("[ERROR] 無法解析 JSON，原始內容如下：", raw_resp)
+            sys.exit("❌ GPT 回傳的內容不是合法 JSON，請檢查模型輸出與 prompt 設定")
+        data = None
 
     if isinstance(data, dict) and "triples" in data:
-        triples = [
+        full = [
             {"head": t["subject"], "relation": t["relation"], "tail": t["object"]}
             for t in data["triples"]
             if t.get("subject") and t.get("relation")
         ]
     else:
-        triples = du.json_to_triples(data) or []
-    print(f"🪲 Parsed triples count: {len(triples)}")
+        full = du.json_to_triples(data) or []
+    triples = du.merge_triples(stream.triples, full)
+    print(f"🪲 Parsed triples count: {len(triples)}（串流中完成 {len(stream.triples)}）")
     if not triples:
         sys.exit("❌ GPT 未抽取到三元組")
 
-    # 3. KG 向量檢索
-    raw_lines = search_by_triples(
-        triples,
-        embed_fn=lambda tp: embed_triple(emb, tp),
-        kg_vecs_norm=kg_vecs_norm,
-        top_k=TOP_K,
-        sim_th=SIM_TH,
-        kg_df=kg_df,
-        hp_col=hp_col,
-        rp_col=rp_col,
-        tp_col=tp_col,
-        build_block_fn=knl.build_block,
-    )
+    def search_embed_fn(tp):
+        fut = pre_embedded.get(du.key(tp))
+        return fut.result() if fut is not None else embed_fn(tp)
+
+    # 3. KG 向量檢索（search span 內含各三元組的 embed span）
+    if KG_BACKEND == "graph":
+        with tracing.span("load"):
+            retriever = get_retriever(GRAPH_HOPS, EMBED_BACKEND)
+        with tracing.span("search"):
+            raw_lines = search_by_graph(
+                triples,
+                embed_fn=search_embed_fn,
+                retriever=retriever,
+                top_k=TOP_K,
+                sim_th=SIM_TH,
+                build_block_fn=knl.build_block,
+            )
+    else:
+        with tracing.span("load"):
+            kg = get_kg()  # 取得一次並持有到請求結束：熱更新換版時本請求仍使用這個版本
+        with tracing.span("search"):
+            raw_lines = search_by_triples(
+                triples,
+                embed_fn=search_embed_fn,
+                kg_vecs_norm=kg.vecs_norm,
+                top_k=TOP_K,
+                sim_th=SIM_TH,
+                kg_df=kg.df,
+                hp_col=kg.hp_col,
+                rp_col=kg.rp_col,
+                tp_col=kg.tp_col,
+                build_block_fn=knl.build_block,
+                line_store=kg.lines,
+                searcher=kg.searcher,
+            )
+    tracing.count("triples", len(triples))
+    tracing.count("kg_hits", len(raw_lines))
     if not raw_lines:
         sys.exit("⚠️ KG 無任何匹配")
 
     # 4. 語意去重
-    final_lines = dedupe(
-        raw_lines,
-        embed_fn=lambda ln: embed_text(emb, ln),
-        threshold=0.80,
-    )
+    with tracing.span("dedup"):
+        final_lines = dedupe(
+            raw_lines,
+            embed_fn=lambda ln: embed_text(emb, ln),
+            threshold=0.80,
+        )
+    tracing.count("kg_lines_kept", len(final_lines))
 
     # 5. 輸出至檔案
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     kg_out = OUT_DIR / f"user_kg_{slug}.txt"
     judge_out = OUT_DIR / f"user_qa_judge_{slug}.txt"
 
-    kg_out.write_text(
-        "[使用者提問]\n"
-        f"{question}\n\n[知識查詢結果]\n"
-        + "\n".join(final_lines)
-        + "\n",
-        encoding="utf-8",
-    )
-
-    # 6. GPT 最終判斷
-    judge_result = gpt.chat(judge_prompt, kg_out.read_text(encoding="utf-8-sig"))
+    with tracing.span("write"):
+        kg_out.write_text(
+            "[使用者提問]\n"
+            f"{question}\n\n[知識查詢結果]\n"
+            + "\n".join(final_lines)
+            + "\n",
+            encoding="utf-8",
+        )
+
+    # 6. GPT 最終判斷（kg_out 保留完整結果，送出的 context 依 token 預算裁切）
+    with tracing.span("context"):
+        judge_ctx = build_context(
+            "[使用者提問]", question, "[知識查詢結果]", final_lines,
+            budget=JUDGE_TOKEN_BUDGET,
+            rank=lambda: rank_by_similarity(
+                embed_text(emb, question),
+                emb.encode(final_lines, convert_to_numpy=True, show_progress_bar=False),
+            ),
+        )
+    report(judge_ctx)
+    with tracing.span("judge"):
+        judge_result = gpt.chat(judge_prompt, judge_ctx.text, stage="judge")
     # 移除所有反引號、井號與星號
     judge_result = (judge_result
                     .replace("`", "")
                     .replace("#", "")
                     .replace("*", "")
                     )
-    judge_out.write_text(judge_result, encoding="utf-8-sig")
+    with tracing.span("write"):
+        judge_out.write_text(judge_result, encoding="utf-8-sig")
 
     print("✅ finished; outputs saved under", OUT_DIR)
     print("   KG    →", kg_out.name)
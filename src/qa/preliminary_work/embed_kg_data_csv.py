@@ -1,110 +1,91 @@
 """
 將提取出的原始知識 data/raw/kg-raw-graph.csv（三元組格式）
 轉成向量檔 data/vector/kg-raw-graph.emb.npy
+
+全量重建；日常更新請改用 embed_kg_incremental.py，只編碼新增的三元組。
+
+執行方式：
+  python -m src.qa.preliminary_work.embed_kg_data_csv                # 單行程
+  python -m src.qa.preliminary_work.embed_kg_data_csv --workers 4    # 多行程分片，可中斷續跑
+  python -m src.qa.preliminary_work.embed_kg_data_csv --no-publish   # 不發佈快照版本
+
+完成後發佈快照版本（snapshots/CURRENT），服務端熱更新換上新 KG。
 """
+import argparse
+import os
 import time
 from pathlib import Path
-from typing import List
 
 import numpy as np
-import pandas as pd
-import torch
-from sentence_transformers import SentenceTransformer
-from tqdm import tqdm
-from transformers import AutoTokenizer
 
-# ─── 0. tqdm 全域格式 ─────────────────────────────────────────
-tqdm_cfg = dict(bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} "
-                           "[{elapsed}<{remaining}, {rate_fmt}]",
-                ncols=80)
+from src.qa.tools.kg_embed import (
+    SHARD_SIZE,
+    build_sentences,
+    encode_parallel,
+    encode_sentences,
+    load_encoder,
+)
+from src.qa.tools.kg_lines import build_line_store
+from src.qa.tools.kg_table import read_kg_table, resolve_kg_table
+from src.qa.tools.kg_versions import publish_version
 
 # ─── 1. 路徑與參數 ───────────────────────────────────────────
 CSV_PATH = "data/raw/knowledge-graph/neo4j-kg-raw-graph.csv"
 MODEL_ROOT = Path("models/CKIP/models--ckiplab--bert-base-chinese")
 OUT_NPY = "data/processed/knowledge-graph/kg-triplet.emb.npy"
-
-WINDOW, STRIDE = 510, 256  # sliding window
-BATCH_SRC, BATCH_ENC = 32, 16  # 來源句數 / encode 批次
-
-
-# ─── 2. 解析 HuggingFace snapshot 路徑 ───────────────────────
-def resolve_snapshot(root: Path) -> str:
-    if (root / "config.json").is_file():
-        return str(root)
-    snaps = root / "snapshots"
-    for sub in snaps.iterdir():
-        if (sub / "config.json").is_file():
-            return str(sub)
-    raise FileNotFoundError(f"❌ 找不到模型權重於 {root}")
-
-
-MODEL_PATH = resolve_snapshot(MODEL_ROOT)
-print(f"[Model] resolved → {MODEL_PATH}")
-
-# ─── 3. 載入模型 ─────────────────────────────────────────────
-t0 = time.time()
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model = SentenceTransformer(MODEL_PATH, device=device, trust_remote_code=True)
-tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-DIM = model.get_sentence_embedding_dimension()
-print(f"[Model] {DIM}-d on {device}  ({time.time() - t0:.1f}s)")
-
-# ─── 4. 讀 CSV（確保有 head / relation / tail）──────────────
-df = pd.read_csv(CSV_PATH, low_memory=False)
-assert {"head", "relation", "tail"}.issubset(df.columns), "CSV schema error"
+CKPT_DIR = Path("data/interim/knowledge-graph/emb-shards")
+LINES_DIR = Path("data/processed/knowledge-graph/kg-lines")
+SNAPSHOTS_DIR = Path("data/processed/knowledge-graph/snapshots")
 
 # 若要把屬性一起編碼，把下方 False 改 True
 INCLUDE_PROPS = False
 
-if INCLUDE_PROPS:
-    sentences = (df["head"] + " " + df["relation"] + " " + df["tail"] +
-                 " " + df.get("head_props", "").fillna("") +
-                 " " + df.get("rel_props", "").fillna("") +
-                 " " + df.get("tail_props", "").fillna("")).tolist()
-else:
-    sentences = (df["head"] + " " + df["relation"] + " " + df["tail"]).tolist()
-
-print(f"[Data] 三元組 {len(sentences):,} 條")
-
-
-# ─── 5. sliding-window 分片 ─────────────────────────────────
-def split_windows(text: str) -> List[str]:
-    ids = tokenizer.encode(text, add_special_tokens=False)
-    if len(ids) <= WINDOW:
-        return [text]
-    chunks, pos = [], 0
-    while pos < len(ids):
-        chunk_ids = ids[pos: pos + WINDOW]
-        chunks.append(tokenizer.decode(chunk_ids, skip_special_tokens=True))
-        if pos + WINDOW >= len(ids):
-            break
-        pos += STRIDE
-    return chunks
-
-
-# ─── 6. 產生向量 ────────────────────────────────────────────
-embs = np.zeros((len(sentences), DIM), dtype=np.float32)
-
-pbar = tqdm(range(0, len(sentences), BATCH_SRC),
-            desc="Embedding", **tqdm_cfg)
-for i in pbar:
-    batch_texts = sentences[i:i + BATCH_SRC]
-    chunk_lists = [split_windows(t) for t in batch_texts]
-
-    flat_texts = [c for lst in chunk_lists for c in lst]
-    flat_embs = model.encode(flat_texts,
-                             batch_size=BATCH_ENC,
-                             convert_to_numpy=True,
-                             show_progress_bar=False)
-
-    idx = 0
-    for j, chunks in enumerate(chunk_lists):
-        n = len(chunks)
-        embs[i + j] = flat_embs[idx:idx + n].mean(0)
-        idx += n
-    pbar.set_postfix(done=f"{min(i + BATCH_SRC, len(sentences))}/{len(sentences)}")
-
-# ─── 7. 儲存 ───────────────────────────────────────────────
-Path(OUT_NPY).parent.mkdir(parents=True, exist_ok=True)
-np.save(OUT_NPY, embs)
-print(f"[Save] {OUT_NPY}  shape={embs.shape}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full KG embedding builder")
+    parser.add_argument("--workers", type=int, default=1, help="編碼行程數（>1 啟用分片）")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="每個分片的三元組數")
+    parser.add_argument("--ckpt-dir", default=str(CKPT_DIR), help="分片 checkpoint 目錄")
+    parser.add_argument("--no-publish", action="store_true", help="不發佈快照版本（服務端不會熱更新）")
+    args = parser.parse_args()
+
+    # ─── 2. 讀 KG 表格（CSV 或 Parquet，需有 head / relation / tail）
+    kg_path = resolve_kg_table(Path(CSV_PATH))
+    df = read_kg_table(kg_path)
+    print(f"[Data] 讀取 {kg_path}")
+    sentences = build_sentences(df, include_props=INCLUDE_PROPS)
+    print(f"[Data] 三元組 {len(sentences):,} 條")
+
+    # ─── 3. 產生向量 ────────────────────────────────────────
+    t0 = time.perf_counter()
+    if args.workers > 1:
+        embs = encode_parallel(sentences, MODEL_ROOT, Path(args.ckpt_dir),
+                               workers=args.workers, shard_size=args.shard_size)
+    else:
+        model, tokenizer = load_encoder(MODEL_ROOT)
+        t0 = time.perf_counter()
+        embs = encode_sentences(model, tokenizer, sentences)
+        elapsed = time.perf_counter() - t0
+        print(f"[Throughput] {len(sentences):,} 筆 / {elapsed:.1f}s = "
+              f"{len(sentences) / max(elapsed, 1e-9):,.1f} triples/s")
+
+    # ─── 4. 儲存 ───────────────────────────────────────────
+    Path(OUT_NPY).parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(OUT_NPY).with_name(Path(OUT_NPY).name + ".tmp")  # 快照版本 hard link 此檔，不可原位覆寫
+    with tmp.open("wb") as fp:
+        np.save(fp, embs)
+    os.replace(tmp, OUT_NPY)
+    print(f"[Save] {OUT_NPY}  shape={embs.shape}  ({time.perf_counter() - t0:.1f}s)")
+
+    # ─── 5. 預先計算敘述句（檢索端直接依列號取用）──────────────
+    n = build_line_store(df, LINES_DIR, source=kg_path)
+    print(f"[Lines] {LINES_DIR}  rows={n:,}")
+
+    # ─── 6. 發佈快照版本（服務端監看 CURRENT 熱更新）────────────
+    if not args.no_publish:
+        version = publish_version(SNAPSHOTS_DIR, Path(OUT_NPY), kg_path, LINES_DIR, meta={"rows": n})
+        print(f"[Publish] {SNAPSHOTS_DIR / version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+增量更新 KG 向量：只編碼新增或變更的三元組
+
+與 embed_kg_data_csv.py 相同讀取 data/raw/knowledge-graph/neo4j-kg-raw-graph.csv，
+但以三元組穩定雜湊為鍵，將向量累積在 data/processed/knowledge-graph/emb-store/：
+  1. 比對 CSV 與向量庫 → 找出新增 / 變更 / 已刪除的列
+  2. 只編碼新增與變更的列，append 成新分段
+  3. 已刪除的列標記墓碑；墓碑比例過高時壓縮
+  4. 依 CSV 列順序輸出 kg-triplet.emb.npy，保持與檢索用 KG 表格一一對齊
+  5. 重建預先計算的敘述庫 kg-lines/
+  6. 發佈快照版本（snapshots/CURRENT），服務端熱更新換上新 KG
+步驟 1–5 為 `update_embeddings`，ETL orchestrator 的 embed 階段也呼叫它（發佈由 orchestrator 負責）。
+
+執行方式：
+  python -m src.qa.preliminary_work.embed_kg_incremental
+  python -m src.qa.preliminary_work.embed_kg_incremental --seed-from-npy   # 以既有全量向量初始化
+  python -m src.qa.preliminary_work.embed_kg_incremental --no-publish      # 只更新檔案，不發佈快照版本
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.qa.tools.emb_store import EmbeddingStore, row_keys, text_hash
+from src.qa.tools.kg_embed import build_sentences, encode_parallel, encode_sentences, load_encoder
+from src.qa.tools.kg_lines import build_line_store
+from src.qa.tools.kg_table import read_kg_table, resolve_kg_table
+from src.qa.tools.kg_versions import publish_version
+
+# ─── 路徑與參數 ─────────────────────────────────────────────
+CSV_PATH = "data/raw/knowledge-graph/neo4j-kg-raw-graph.csv"
+MODEL_ROOT = Path("models/CKIP/models--ckiplab--bert-base-chinese")
+OUT_NPY = "data/processed/knowledge-graph/kg-triplet.emb.npy"
+STORE_DIR = Path("data/processed/knowledge-graph/emb-store")
+LINES_DIR = Path("data/processed/knowledge-graph/kg-lines")
+SNAPSHOTS_DIR = Path("data/processed/knowledge-graph/snapshots")
+
+INCLUDE_PROPS = False  # 需與 embed_kg_data_csv.py 一致
+COMPACT_RATIO = 0.3  # 墓碑比例超過此值即壓縮
+
+
+def seed_from_npy(store: EmbeddingStore, keys: list[str], hashes: list[str]) -> None:
+    """以既有的全量 kg-triplet.emb.npy 初始化空的向量庫，省去第一次全量編碼。"""
+    if len(store) or not Path(OUT_NPY).is_file():
+        return
+    vecs = np.load(OUT_NPY, mmap_mode="r")
+    if len(vecs) != len(keys):
+        print(f"[Seed] 略過：npy 列數 {len(vecs):,} 與 CSV {len(keys):,} 不符")
+        return
+    # 同鍵重複的列只保留第一次出現
+    first: dict[str, int] = {}
+    for i, k in enumerate(keys):
+        first.setdefault(k, i)
+    rows = np.fromiter(first.values(), dtype=np.int64)
+    store.append(list(first), [hashes[i] for i in rows], np.asarray(vecs[rows]))
+    print(f"[Seed] 自 {OUT_NPY} 匯入 {len(rows):,} 筆向量")
+
+
+def update_embeddings(
+        df,
+        kg_path: Path,
+        encode: Callable[[List[str]], np.ndarray],
+        store_dir: Path = STORE_DIR,
+        out_npy: Path = Path(OUT_NPY),
+        lines_dir: Path = LINES_DIR,
+        seed: bool = False,
+) -> Dict[str, int]:
+    """
+    以 KG 表格 df（來自 kg_path）增量更新向量庫，輸出對齊的 .npy 與敘述庫。
+
+    encode: 句子列表 → 向量（只會收到新增 / 變更的列）；供 CLI 與 ETL orchestrator 共用。
+    回傳 {"rows", "encoded", "deleted", "reused"}。
+    """
+    sentences = build_sentences(df, include_props=INCLUDE_PROPS)
+    keys = row_keys(df)
+    hashes = [text_hash(s) for s in sentences]
+    print(f"[Data] 三元組 {len(keys):,} 條（唯一鍵 {len(set(keys)):,}）")
+
+    store = EmbeddingStore(Path(store_dir))
+    if seed:
+        seed_from_npy(store, keys, hashes)
+
+    # 1. 差異比對
+    todo, stale = store.diff(keys, hashes)
+    n_deleted = store.delete(stale)
+
+    # 同一鍵在 CSV 內重複時只編碼一次
+    pending: dict[str, int] = {}
+    for i in np.flatnonzero(todo):
+        pending.setdefault(keys[i], int(i))
+    n_reused = len(store)
+    print(f"[Diff] 需編碼 {len(pending):,}、刪除 {n_deleted:,}、沿用 {n_reused:,}")
+
+    # 2. 只編碼新增 / 變更列
+    if pending:
+        rows = list(pending.values())
+        vecs = encode([sentences[i] for i in rows])
+        store.append(list(pending), [hashes[i] for i in rows], vecs)
+
+    # 3. 墓碑壓縮
+    if store.dead_ratio > COMPACT_RATIO:
+        print(f"[Compact] 墓碑比例 {store.dead_ratio:.0%}，重寫分段")
+        store.compact()
+    store.save()
+
+    # 4. 依 CSV 列順序輸出
+    embs = store.materialize(keys, Path(out_npy))
+    print(f"[Save] {out_npy}  shape={embs.shape}")
+
+    # 5. 敘述庫與向量同列對齊
+    n = build_line_store(df, Path(lines_dir), source=kg_path)
+    print(f"[Lines] {lines_dir}  rows={n:,}")
+    return {"rows": len(keys), "encoded": len(pending), "deleted": n_deleted, "reused": n_reused}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental KG embedding builder")
+    parser.add_argument("--csv", default=None, help="KG 表格（CSV / Parquet），預設自動挑選較新者")
+    parser.add_argument("--out", default=OUT_NPY, help="輸出對齊後的 .npy")
+    parser.add_argument("--store", default=str(STORE_DIR), help="增量向量庫目錄")
+    parser.add_argument("--workers", type=int, default=1, help="編碼行程數（>1 啟用分片）")
+    parser.add_argument("--seed-from-npy", action="store_true",
+                        help="向量庫為空時，以既有 --out 檔案初始化")
+    parser.add_argument("--no-publish", action="store_true", help="不發佈快照版本（服務端不會熱更新）")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    kg_path = Path(args.csv) if args.csv else resolve_kg_table(Path(CSV_PATH))
+    df = read_kg_table(kg_path)
+    print(f"[Data] 讀取 {kg_path}")
+
+    def encode(texts: List[str]) -> np.ndarray:
+        if args.workers > 1:
+            return encode_parallel(texts, MODEL_ROOT, Path(args.store) / "ckpt", workers=args.workers)
+        model, tokenizer = load_encoder(MODEL_ROOT)
+        return encode_sentences(model, tokenizer, texts)
+
+    stats = update_embeddings(df, kg_path, encode, Path(args.store), Path(args.out), LINES_DIR,
+                              seed=args.seed_from_npy)
+    if not args.no_publish:
+        version = publish_version(SNAPSHOTS_DIR, Path(args.out), kg_path, LINES_DIR, meta={"rows": stats["rows"]})
+        print(f"[Publish] {SNAPSHOTS_DIR / version}")
+    print(f"[Done] {time.time() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
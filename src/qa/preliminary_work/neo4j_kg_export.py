@@ -0,0 +1,181 @@
+"""
+Neo4j → KG 表格串流匯出
+
+取代 APOC 匯出 + 搬檔的作法：透過 Bolt driver 以 fetch_size 分頁串流
+`MATCH (h)-[r]->(t)` 的結果，邊讀邊寫入 KG 表格，不在磁碟上產生中間檔。
+
+輸出格式：
+  - parquet（預設）: data/raw/knowledge-graph/neo4j-kg-raw-graph.parquet
+                     每頁寫成一個 row group，props 為 map<string, string>（值為 JSON，保留型態）
+  - csv            : data/raw/knowledge-graph/neo4j-kg-raw-graph.csv
+                     props 為 JSON 字串（與舊 APOC 匯出相同）
+  兩者皆以 `kg_table.encode_props` 編碼，`decode_props` 讀回原生型態
+
+執行方式：
+  python -m src.qa.preliminary_work.neo4j_kg_export
+  python -m src.qa.preliminary_work.neo4j_kg_export --since 2025-07-01 --merge   # 增量匯出並併入既有表格
+"""
+import argparse
+import csv
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+from src.qa.tools.emb_store import row_keys
+from src.qa.tools.kg_table import (
+    BASE_COLUMNS,
+    KG_SCHEMA,
+    PROPS_COLUMNS,
+    clean_props,
+    encode_props,
+    read_kg_table,
+    write_kg_table,
+)
+
+load_dotenv()
+
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USER = os.getenv("NEO4J_USER")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+
+OUT_DIR = Path("data/raw/knowledge-graph")
+OUT_STEM = "neo4j-kg-raw-graph"
+PAGE_SIZE = 5_000  # Bolt 每次 PULL 的筆數，也是每個 row group 的大小
+
+EXPORT_QUERY = """
+MATCH (h)-[r]->(t)
+WHERE $since IS NULL OR r.date >= $since
+RETURN h.name        AS head,
+       type(r)       AS relation,
+       t.name        AS tail,
+       properties(h) AS head_props,
+       properties(r) AS rel_props,
+       properties(t) AS tail_props
+"""
+
+
+def stream_pages(driver, since: str | None, page_size: int = PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """以 fetch_size 分頁串流查詢結果，每次 yield 一頁 row dict。"""
+    with driver.session(database=NEO4J_DATABASE, fetch_size=page_size) as session:
+        result = session.run(EXPORT_QUERY, since=since)
+        page: List[Dict[str, Any]] = []
+        for rec in result:
+            page.append({
+                "head": rec["head"],
+                "relation": rec["relation"],
+                "tail": rec["tail"],
+                "head_props": clean_props(rec["head_props"]),
+                "rel_props": clean_props(rec["rel_props"]),
+                "tail_props": clean_props(rec["tail_props"]),
+            })
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+
+class _ParquetSink:
+    """每頁寫成一個 row group。"""
+
+    def __init__(self, path: Path) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._writer = pq.ParquetWriter(path, KG_SCHEMA, compression="zstd")
+
+    def write(self, page: List[Dict[str, Any]]) -> None:
+        cols = {c: [row[c] for row in page] for c in BASE_COLUMNS}
+        for c in PROPS_COLUMNS:
+            cols[c] = [encode_props(row[c], ".parquet") for row in page]
+        self._writer.write_table(self._pa.Table.from_pydict(cols, schema=KG_SCHEMA))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _CsvSink:
+    """欄位與舊版 APOC 匯出一致，props 以 JSON 字串保存。"""
+
+    def __init__(self, path: Path) -> None:
+        self._fp = path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fp)
+        self._writer.writerow(BASE_COLUMNS + PROPS_COLUMNS)
+
+    def write(self, page: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(
+            [row[c] for c in BASE_COLUMNS]
+            + [encode_props(row[c], ".csv") for c in PROPS_COLUMNS]
+            for row in page
+        )
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+def export(out_path: Path, fmt: str, since: str | None, page_size: int) -> int:
+    """串流匯出到暫存檔，完成後原子替換；回傳匯出筆數。"""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    sink = _ParquetSink(tmp) if fmt == "parquet" else _CsvSink(tmp)
+
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    total, t0 = 0, time.time()
+    try:
+        for page in stream_pages(driver, since, page_size):
+            sink.write(page)
+            total += len(page)
+            print(f"  ↳ 已匯出 {total:,} 條邊（{total / (time.time() - t0):,.0f} rows/s）")
+    finally:
+        sink.close()
+        driver.close()
+    os.replace(tmp, out_path)
+    return total
+
+
+def merge_into(base_path: Path, delta_path: Path) -> int:
+    """將增量表格併入既有表格（以三元組穩定鍵去重，新資料覆蓋舊資料）。"""
+    delta = read_kg_table(delta_path)
+    if base_path.is_file():
+        base = read_kg_table(base_path)
+        merged = pd.concat([base, delta], ignore_index=True)
+    else:
+        merged = delta
+    keys = pd.Series(row_keys(merged))
+    merged = merged[~keys.duplicated(keep="last").to_numpy()]
+
+    write_kg_table(merged, base_path)
+    delta_path.unlink()
+    return len(merged)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream Neo4j edges into the KG table")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    parser.add_argument("--out", default=None, help="輸出路徑（預設依格式放在 data/raw/knowledge-graph/）")
+    parser.add_argument("--since", default=None, help="只匯出 r.date >= since 的邊（YYYY-MM-DD）")
+    parser.add_argument("--merge", action="store_true", help="增量匯出後併入既有表格")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    out_path = Path(args.out) if args.out else OUT_DIR / f"{OUT_STEM}.{args.format}"
+    if args.merge and not args.since:
+        parser.error("--merge 需搭配 --since 使用")
+
+    target = out_path.with_name(f"{out_path.stem}.delta{out_path.suffix}") if args.merge else out_path
+    n = export(target, args.format, args.since, args.page_size)
+    print(f"✅ 匯出完成：{target}（{n:,} 條邊）")
+
+    if args.merge:
+        total = merge_into(out_path, target)
+        print(f"🔀 已併入 {out_path}，目前共 {total:,} 條邊")
+
+
+if __name__ == "__main__":
+    main()
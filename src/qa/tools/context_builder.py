@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+判斷（judge）請求的 context 組裝
+
+system prompt 固定放在訊息最前面且內容不變，讓 API 端的 prompt prefix cache 能命中；
+可變內容（新聞 / 提問 + KG 敘述）全部放在 user 訊息，並依 token 預算裁切：
+  - KG 敘述依與新聞（提問）的相似度排序，預算內由高到低選入，輸出時維持原順序並重新編號
+  - 新聞本身超過預算上限比例時截斷尾端
+  - 回報完整 payload 與裁切後的 token 數（tracing 計數 judge_tokens / judge_tokens_saved）
+
+token 數以本地 tokenizer 計算：安裝 tiktoken 時使用 o200k_base（gpt-4o 系列），
+否則以「CJK 字元一字一 token、其他字元每 4 字一 token」估算。
+
+提供：
+  - `count_tokens(text)`                 : 本地 token 計數
+  - `rank_by_similarity(query, vecs)`    : 依 cosine 由高到低的索引
+  - `build_context(...)`                 : 組裝並裁切，回傳 `JudgeContext`
+  - `report(ctx, label)`                 : 計入 tracing 並列印節省的 token 數
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from ...common import tracing
+
+__all__ = ['JudgeContext', 'count_tokens', 'rank_by_similarity', 'build_context', 'report']
+
+_NUMBERING = re.compile(r'^(?:\[\d+\]|\d+\.)\s*')
+_CJK = re.compile(r'[　-鿿가-힯＀-￯]')
+
+
+@lru_cache(maxsize=1)
+def _encoder() -> Optional[Callable[[str], list]]:
+    try:
+        import tiktoken
+    except ImportError:  # 選用依賴
+        return None
+    return tiktoken.get_encoding('o200k_base').encode
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is not None:
+        return len(enc(text))
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def rank_by_similarity(query_vec: np.ndarray, vecs: np.ndarray) -> np.ndarray:
+    """vecs 各列與 query_vec 的 cosine 由高到低排序後的索引。"""
+    q = query_vec / (np.linalg.norm(query_vec) or 1.0)
+    v = vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+    return np.argsort(-(v @ q), kind='stable')
+
+
+@dataclass
+class JudgeContext:
+    """裁切後的 user 訊息與 token 統計。"""
+
+    text: str
+    kept: int
+    dropped: int
+    tokens: int
+    tokens_full: int
+    head_truncated: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_full - self.tokens
+
+
+def _truncate(text: str, budget: int) -> str:
+    """把 text 截到約 budget 個 token（二分搜尋字元長度）。"""
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + '…'
+
+
+def build_context(head_title: str, head: str, kb_title: str, lines: Sequence[str],
+                  rank: Optional[Callable[[], Sequence[int]]] = None, budget: int = 6000,
+                  head_share: float = 0.5) -> JudgeContext:
+    """
+    組裝 `{head_title}\\n{head}\\n\\n{kb_title}\\n[1] …` 形式的 user 訊息。
+
+    Args:
+        head_title / head: 新聞或提問的標題與內容
+        kb_title / lines: KG 敘述區塊標題與敘述句（可帶 "[i]" 或 "i." 編號，輸出時重編）
+        rank: 回傳敘述句優先順序的函式（通常包裝 `rank_by_similarity`），
+              只在超出預算時才呼叫，避免未裁切時多做一次嵌入；None 表示原順序
+        budget: user 訊息的 token 上限；<= 0 表示不裁切
+        head_share: head 最多可佔用的預算比例
+    """
+    bodies = [_NUMBERING.sub('', ln) for ln in lines]
+
+    def render(h: str, idx: Sequence[int]) -> str:
+        kb = '\n'.join(f'[{n}] {bodies[i]}' for n, i in enumerate(idx, 1))
+        return f'{head_title}\n{h}\n\n{kb_title}\n{kb}'
+
+    full = render(head, range(len(bodies)))
+    tokens_full = count_tokens(full)
+    if budget <= 0 or tokens_full <= budget:
+        return JudgeContext(full, len(bodies), 0, tokens_full, tokens_full)
+
+    head_truncated = False
+    overhead = count_tokens(f'{head_title}\n\n\n{kb_title}\n')
+    if count_tokens(head) > budget * head_share:
+        head, head_truncated = _truncate(head, int(budget * head_share)), True
+    remaining = budget - overhead - count_tokens(head)
+
+    chosen: List[int] = []
+    for i in (rank() if rank is not None else range(len(bodies))):
+        cost = count_tokens(f'[{len(chosen) + 1}] {bodies[i]}\n')
+        if cost > remaining:
+            continue
+        chosen.append(int(i))
+        remaining -= cost
+    chosen.sort()  # 選入依相似度，輸出維持原順序
+
+    text = render(head, chosen)
+    return JudgeContext(text, len(chosen), len(bodies) - len(chosen), count_tokens(text), tokens_full,
+                        head_truncated)
+
+
+def report(ctx: JudgeContext, label: str = 'judge') -> None:
+    tracing.count(f'{label}_tokens', ctx.tokens)
+    tracing.count(f'{label}_tokens_saved', ctx.tokens_saved)
+    if ctx.dropped or ctx.head_truncated:
+        print(f'✂️ {label} context：{ctx.tokens_full:,} → {ctx.tokens:,} tokens'
+              f'（保留 {ctx.kept} 條、略過 {ctx.dropped} 條{"，新聞已截斷" if ctx.head_truncated else ""}）')
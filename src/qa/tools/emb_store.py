@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 增量向量庫（segmented store）
+
+以「三元組穩定雜湊」為鍵保存 KG 向量，讓每日新增的邊只需編碼一次：
+  - `triple_key`     : (head, relation, tail, rel_props) → 穩定鍵
+  - `row_keys`       : KG 表格每列的穩定鍵
+  - `text_hash`      : 待編碼句子的內容雜湊，用於判斷列是否變更
+  - `EmbeddingStore` : append-only 的 .npy 分段 + 墓碑（tombstone）索引
+
+目錄結構：
+    <root>/manifest.json       # dim、分段清單
+    <root>/index.npz           # key / text_hash / seg / off / alive
+    <root>/seg-00000.npy …     # 每次 append 產生一段 float32 向量
+
+分段以 mmap 讀取；刪除或更新只會把舊位置標記為墓碑，
+待墓碑比例超過門檻時再 `compact()` 重寫。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .kg_table import decode_props, stringify_props
+
+__all__ = ['triple_key', 'row_keys', 'text_hash', 'canonical_props', 'EmbeddingStore']
+
+_SEP = '\x1f'
+
+
+def canonical_props(props: Any) -> str:
+    """將屬性（JSON 字串、dict 或 Parquet map）轉為排序後的 JSON 字串；空值回傳 '{}'。"""
+    try:
+        decoded = decode_props(props)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return str(props)
+    # 值一律字串化，CSV 與 Parquet 匯出的同一條邊才會得到相同的鍵
+    return json.dumps(stringify_props(decoded), ensure_ascii=False, sort_keys=True)
+
+
+def triple_key(head: str, relation: str, tail: str, rel_props: Any = None) -> str:
+    """
+    產生三元組的穩定鍵。
+
+    Neo4j 中同一組 (head, relation, tail) 可能因不同新聞（evidence / doc_id）
+    而有多條邊，因此關係屬性也納入雜湊。
+    """
+    raw = _SEP.join((str(head), str(relation), str(tail), canonical_props(rel_props)))
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def row_keys(df) -> List[str]:
+    """計算 KG 表格（DataFrame）每列的三元組穩定鍵。"""
+    rel_props = df['rel_props'] if 'rel_props' in df.columns else [None] * len(df)
+    return [
+        triple_key(h, r, t, rp)
+        for h, r, t, rp in zip(df['head'], df['relation'], df['tail'], rel_props)
+    ]
+
+
+def text_hash(text: str) -> str:
+    """待編碼句子的內容雜湊（8 bytes）。"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _atomic_save_npy(path: Path, arr: np.ndarray) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('wb') as fp:
+        np.save(fp, arr)
+    os.replace(tmp, path)
+
+
+class EmbeddingStore:
+    """
+    以三元組鍵索引的分段向量庫。
+
+    每個鍵最多只有一個存活（alive）位置；重新寫入同一鍵時，舊位置轉為墓碑。
+    """
+
+    MANIFEST = 'manifest.json'
+    INDEX = 'index.npz'
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.dim: int | None = None
+        self.segments: List[str] = []
+        self._keys = np.empty(0, dtype='U32')
+        self._hashes = np.empty(0, dtype='U16')
+        self._seg = np.empty(0, dtype=np.int32)
+        self._off = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._pos: Dict[str, int] = {}  # key → index 陣列中的存活位置
+        self._mmaps: Dict[int, np.ndarray] = {}
+        self._load()
+
+    # ── 持久化 ──────────────────────────────────────────────
+    def _load(self) -> None:
+        manifest = self.root / self.MANIFEST
+        if not manifest.is_file():
+            return
+        meta = json.loads(manifest.read_text(encoding='utf-8'))
+        self.dim = meta.get('dim')
+        self.segments = list(meta.get('segments', []))
+
+        with np.load(self.root / self.INDEX) as idx:
+            self._keys = idx['key']
+            self._hashes = idx['text_hash']
+            self._seg = idx['seg']
+            self._off = idx['off']
+            self._alive = idx['alive']
+        self._pos = {k: i for i, k in enumerate(self._keys.tolist()) if self._alive[i]}
+
+    def save(self) -> None:
+        """寫出索引與 manifest（皆以暫存檔 + os.replace 原子替換）。"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_idx = self.root / (self.INDEX + '.tmp.npz')
+        np.savez(tmp_idx, key=self._keys, text_hash=self._hashes,
+                 seg=self._seg, off=self._off, alive=self._alive)
+        os.replace(tmp_idx, self.root / self.INDEX)
+
+        tmp_manifest = self.root / (self.MANIFEST + '.tmp')
+        tmp_manifest.write_text(
+            json.dumps({'dim': self.dim, 'segments': self.segments}, indent=2),
+            encoding='utf-8',
+        )
+        os.replace(tmp_manifest, self.root / self.MANIFEST)
+
+    def _segment(self, seg_id: int) -> np.ndarray:
+        if seg_id not in self._mmaps:
+            self._mmaps[seg_id] = np.load(self.root / self.segments[seg_id], mmap_mode='r')
+        return self._mmaps[seg_id]
+
+    # ── 查詢 ────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pos
+
+    def keys(self) -> Iterable[str]:
+        return self._pos.keys()
+
+    @property
+    def dead_ratio(self) -> float:
+        total = len(self._alive)
+        return 0.0 if total == 0 else 1.0 - len(self._pos) / total
+
+    def diff(self, keys: Sequence[str], hashes: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        比對目前 KG 表格與向量庫。
+
+        Returns:
+            (todo_mask, stale_keys)
+            - todo_mask : 需要（重新）編碼的列（新鍵或內容雜湊不同）
+            - stale_keys: 向量庫仍存活、但已不在 KG 表格中的鍵
+        """
+        todo = np.ones(len(keys), dtype=bool)
+        for i, (k, h) in enumerate(zip(keys, hashes)):
+            pos = self._pos.get(k)
+            if pos is not None and self._hashes[pos] == h:
+                todo[i] = False
+        current = set(keys)
+        stale = [k for k in self._pos if k not in current]
+        return todo, stale
+
+    def gather(self, keys: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """依鍵取回向量；回傳 (vecs, found_mask)，找不到的列為零向量。"""
+        out = np.zeros((len(keys), self.dim or 0), dtype=np.float32)
+        found = np.zeros(len(keys), dtype=bool)
+        if not self._pos:
+            return out, found
+
+        pos = np.array([self._pos.get(k, -1) for k in keys], dtype=np.int64)
+        found = pos >= 0
+        rows = np.flatnonzero(found)
+        segs = self._seg[pos[rows]]
+        offs = self._off[pos[rows]]
+        # 依分段分組後一次 fancy-index，避免逐列讀 mmap
+        for seg_id in np.unique(segs):
+            sel = segs == seg_id
+            out[rows[sel]] = self._segment(int(seg_id))[offs[sel]]
+        return out, found
+
+    # ── 寫入 ────────────────────────────────────────────────
+    def append(self, keys: Sequence[str], hashes: Sequence[str], vecs: np.ndarray) -> None:
+        """新增一段向量；已存在的鍵會先轉為墓碑再寫入新位置。"""
+        if len(keys) == 0:
+            return
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vecs.shape[1])
+        elif vecs.shape[1] != self.dim:
+            raise ValueError(f'向量維度不符：store={self.dim}, new={vecs.shape[1]}')
+
+        self.delete(keys)
+
+        seg_id = len(self.segments)
+        name = self._next_segment_name()
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_save_npy(self.root / name, vecs)
+        self.segments.append(name)
+
+        base = len(self._keys)
+        self._keys = np.concatenate([self._keys, np.asarray(keys, dtype='U32')])
+        self._hashes = np.concatenate([self._hashes, np.asarray(hashes, dtype='U16')])
+        self._seg = np.concatenate([self._seg, np.full(len(keys), seg_id, dtype=np.int32)])
+        self._off = np.concatenate([self._off, np.arange(len(keys), dtype=np.int64)])
+        self._alive = np.concatenate([self._alive, np.ones(len(keys), dtype=bool)])
+        for i, k in enumerate(keys):
+            self._pos[k] = base + i
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """將鍵標記為墓碑，回傳實際刪除數。"""
+        n = 0
+        for k in keys:
+            pos = self._pos.pop(k, None)
+            if pos is not None:
+                self._alive[pos] = False
+                n += 1
+        return n
+
+    def compact(self) -> None:
+        """把所有存活向量重寫成單一分段，並清除墓碑與舊分段檔。"""
+        keys = list(self._pos)
+        hashes = [str(self._hashes[self._pos[k]]) for k in keys]
+        vecs, _ = self.gather(keys)
+        old_segments = self.segments
+
+        name = self._next_segment_name()
+        _atomic_save_npy(self.root / name, vecs)
+
+        self._mmaps.clear()
+        self.segments = [name]
+        self._keys = np.asarray(keys, dtype='U32')
+        self._hashes = np.asarray(hashes, dtype='U16')
+        self._seg = np.zeros(len(keys), dtype=np.int32)
+        self._off = np.arange(len(keys), dtype=np.int64)
+        self._alive = np.ones(len(keys), dtype=bool)
+        self._pos = {k: i for i, k in enumerate(keys)}
+        # 先寫新索引再刪舊分段，中途中斷也不會指向不存在的檔案
+        self.save()
+        for old in old_segments:
+            (self.root / old).unlink(missing_ok=True)
+
+    def _next_segment_name(self) -> str:
+        last = max((int(n[4:9]) for n in self.segments), default=-1)
+        return f'seg-{last + 1:05d}.npy'
+
+    def materialize(self, keys: Sequence[str], out_path: Path) -> np.ndarray:
+        """
+        依 KG 表格的列順序輸出對齊的向量矩陣（檢索端使用的 .npy）。
+
+        每一列 i 對應 keys[i]；若有鍵缺向量則拋出 KeyError，
+        避免檢索時 row index 與 KG 表格錯位。
+        """
+        vecs, found = self.gather(keys)
+        if not found.all():
+            missing = int((~found).sum())
+            raise KeyError(f'向量庫缺少 {missing} 筆鍵，請先編碼再輸出')
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_save_npy(out_path, vecs)
+        return vecs
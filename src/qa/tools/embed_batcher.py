@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+嵌入微批次器（process 內，多執行緒共用同一模型）
+
+web 服務同時處理多個請求時，每條 pipeline 各自對共用模型做小批 encode，
+CPU 上變成許多填充率低的小 forward pass。`EmbedBatcher` 收集並合併：
+  - 第一筆請求到達後最多等待 `max_wait_ms`，或累積到 `max_batch` 句即送出
+  - 合併後依長度排序，再以 `max_tokens`（batch × 最長句）切成數個 padded batch，
+    相近長度放在同一批，減少 padding
+  - 結果依原順序分回各請求的 Future
+
+介面同 `SentenceTransformer.encode`，可直接替換模型傳給現有程式碼；
+帶有非預設參數（如 normalize_embeddings）的呼叫直接轉給底層模型，不合併。
+由 `qa.tools.embedder` 依環境變數 EMBED_BATCH_WAIT_MS（> 0 時啟用）自動包裝。
+
+CKIP bert-base-chinese 以字為 token，長度以字元數近似 token 數。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ['EmbedBatcher']
+
+# 可合併的 encode 參數（其值不影響輸出）
+_MERGEABLE = {'convert_to_numpy', 'show_progress_bar', 'batch_size'}
+
+
+class EmbedBatcher:
+    """
+    以背景執行緒合併並行的 encode 請求。
+
+    Args:
+        model: 具 `encode(list[str]) -> ndarray` 的模型（SentenceTransformer / OnnxEmbedder）
+        max_batch: 單次合併的最多句數
+        max_wait_ms: 第一筆請求後最多等待的毫秒數
+        max_tokens: 單一 padded batch 的 token 上限（句數 × 最長句長度）
+    """
+
+    def __init__(self, model: Any, max_batch: int = 64, max_wait_ms: float = 5.0,
+                 max_tokens: int = 8192) -> None:
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1e3
+        self.max_tokens = max_tokens
+        self._queue: 'queue.Queue[Tuple[List[str], Future]]' = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()  # 關閉檢查與入列視為一步，close() 之後不會再有請求進入佇列
+        self._thread = threading.Thread(target=self._loop, name='embed-batcher', daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name: str) -> Any:
+        # 其餘屬性（tokenizer、get_sentence_embedding_dimension …）轉給底層模型
+        return getattr(self.model, name)
+
+    def encode(self, sentences: str | Sequence[str], **kwargs: Any) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if set(kwargs) - _MERGEABLE or not kwargs.get('convert_to_numpy', True) or self._closed:
+            return self.model.encode(sentences, **kwargs)
+        if not texts:
+            return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        fut: Future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((texts, fut))
+        if closed:
+            return self.model.encode(sentences, **kwargs)
+        out = fut.result()
+        return out[0] if single else out
+
+    def close(self) -> None:
+        """停止背景執行緒；之後的 encode 直接呼叫底層模型。"""
+        with self._lock:
+            self._closed = True
+            self._queue.put(([], Future()))
+        self._thread.join(timeout=1.0)
+
+    # ─────────────────────────── 背景執行緒 ───────────────────────────
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        first = self._queue.get()
+        pending = [first]
+        n = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while n < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            n += len(item[0])
+        return pending
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        out: np.ndarray | None = None
+        start = 0
+        while start < len(order):
+            # 由短到長累加，直到 句數 × 最長句 超過 token 上限
+            end = start + 1
+            while end < len(order) and (end - start + 1) * len(texts[order[end]]) <= self.max_tokens:
+                end += 1
+            idx = order[start:end]
+            embs = self.model.encode([texts[i] for i in idx], convert_to_numpy=True,
+                                     show_progress_bar=False, batch_size=len(idx))
+            if out is None:
+                out = np.empty((len(texts), embs.shape[1]), dtype=embs.dtype)
+            out[idx] = embs
+            start = end
+        return out
+
+    def _loop(self) -> None:
+        while not self._closed:
+            pending = [(texts, fut) for texts, fut in self._collect() if texts]
+            if not pending:
+                continue
+            flat = [t for texts, _ in pending for t in texts]
+            try:
+                embs = self._run(flat)
+            except Exception as exc:  # 失敗時讓所有等待者收到同一例外
+                for _, fut in pending:
+                    fut.set_exception(exc)
+                continue
+            offset = 0
+            for texts, fut in pending:
+                fut.set_result(embs[offset:offset + len(texts)])
+                offset += len(texts)
+        # 關閉時仍留在佇列中的請求直接處理，避免等待者卡住
+        while True:
+            try:
+                texts, fut = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if not texts:
+                continue
+            try:
+                fut.set_result(self._run(texts))
+            except Exception as exc:  # 與批次路徑相同：例外交給等待者，其餘請求繼續處理
+                fut.set_exception(exc)
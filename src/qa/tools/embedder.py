@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CKIP Sentence-BERT 模型註冊表（process 內共用一份權重）
+
+web 服務、verifier 與 answerer 皆透過此模組取得 embedder，
+同一個模型快照（與推論後端）在同一個 process 只會載入一次：
+  - `resolve_snapshot` : 找出含 config.json 與權重檔的快照目錄
+  - `get_embedder`     : 取得（必要時載入）指定模型，執行緒安全
+  - `warmup`           : 載入並以假輸入 encode 一次，完成後標記為就緒
+  - `is_ready`         : 是否已完成 warm-up
+  - `loaded_models`    : 已載入的模型快照路徑（供 /api/ready 回報）
+
+推論後端由 backend 參數或環境變數 EMBED_BACKEND 決定：
+  - torch     : SentenceTransformer（預設）
+  - onnx      : onnxruntime fp32（見 qa.tools.onnx_embedder，ONNX 檔放在 <model_root>/onnx）
+  - onnx-int8 : onnxruntime dynamic int8 量化
+
+環境變數 EMBED_BATCH_WAIT_MS > 0 時，回傳的 embedder 以 `EmbedBatcher` 包裝，
+合併多執行緒並行的 encode（web 服務建議 2–5ms；EMBED_BATCH_MAX 為單次合併句數上限）。
+
+torch / sentence-transformers / onnxruntime 於第一次載入模型時才 import。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+__all__ = ['BACKENDS', 'resolve_snapshot', 'get_embedder', 'warmup', 'is_ready', 'loaded_models']
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+_WEIGHT_FILES = (
+    'pytorch_model.bin', 'model.safetensors', 'tf_model.h5',
+    'model.ckpt.index', 'flax_model.msgpack',
+)
+
+_LOCK = threading.Lock()
+_MODELS: Dict[Tuple[Path, str], 'SentenceTransformer'] = {}
+_READY: Set[Tuple[Path, str]] = set()
+
+
+def _backend(backend: str | None) -> str:
+    backend = (backend or os.getenv('EMBED_BACKEND', 'torch')).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f'未知的 EMBED_BACKEND: {backend}（可用：{", ".join(BACKENDS)}）')
+    return backend
+
+
+def _is_snapshot(path: Path) -> bool:
+    return (path / 'config.json').is_file() and any((path / f).is_file() for f in _WEIGHT_FILES)
+
+
+def resolve_snapshot(root: Path) -> Path:
+    """root 本身或 root/snapshots/* 中第一個有效的模型快照目錄。"""
+    root = Path(root).expanduser()
+    if _is_snapshot(root):
+        return root.resolve()
+    snapshots = root / 'snapshots'
+    if snapshots.is_dir():
+        for cand in sorted(snapshots.iterdir()):
+            if _is_snapshot(cand):
+                return cand.resolve()
+    raise FileNotFoundError(f'找不到有效模型快照於 {root}')
+
+
+def _load(snapshot: Path, model_root: Path, backend: str, device: str | None):
+    if backend == 'torch':
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        print(f'🔧 載入 CKIP-SBERT: {snapshot} (device={device})', flush=True)
+        return SentenceTransformer(str(snapshot), device=device, trust_remote_code=True)
+
+    from .onnx_embedder import OnnxEmbedder, export_onnx, onnx_path
+
+    quantized = backend == 'onnx-int8'
+    onnx_dir = Path(model_root).expanduser() / 'onnx'
+    if not onnx_path(onnx_dir, quantized).is_file():
+        print(f'⚠️ 找不到 {onnx_path(onnx_dir, quantized)}，先行匯出 ONNX', flush=True)
+        export_onnx(snapshot, onnx_dir, quantize=quantized)
+    print(f'🔧 載入 CKIP-SBERT ONNX: {onnx_dir} (backend={backend})', flush=True)
+    return OnnxEmbedder(onnx_dir, quantized=quantized)
+
+
+def get_embedder(model_root: Path, device: str | None = None,
+                 backend: str | None = None) -> 'SentenceTransformer':
+    """
+    取得 model_root 對應的 embedder；以（解析後的快照路徑, 後端）為 key，
+    不同子套件傳入同一模型（或同一快照的不同路徑寫法）時共用同一實例。
+    device 只在第一次以 torch 後端載入時生效。
+    """
+    key = (resolve_snapshot(model_root), _backend(backend))
+    model = _MODELS.get(key)
+    if model is not None:
+        return model
+    with _LOCK:
+        model = _MODELS.get(key)
+        if model is None:
+            t0 = time.perf_counter()
+            model = _load(key[0], model_root, key[1], device)
+            print(f'✅ 模型載入完成，耗時 {time.perf_counter() - t0:.2f} 秒', flush=True)
+            wait_ms = float(os.getenv('EMBED_BATCH_WAIT_MS', '0'))
+            if wait_ms > 0:
+                from .embed_batcher import EmbedBatcher
+
+                model = EmbedBatcher(model, max_batch=int(os.getenv('EMBED_BATCH_MAX', '64')),
+                                     max_wait_ms=wait_ms)
+            _MODELS[key] = model
+    return model
+
+
+def warmup(model_root: Path, device: str | None = None,
+           backend: str | None = None) -> 'SentenceTransformer':
+    """載入模型並 encode 一次假輸入（觸發 lazy 初始化與 kernel 編譯），完成後標記就緒。"""
+    model = get_embedder(model_root, device, backend)
+    model.encode(['暖機'], convert_to_numpy=True, show_progress_bar=False)
+    _READY.add((resolve_snapshot(model_root), _backend(backend)))
+    return model
+
+
+def is_ready(model_root: Path | None = None, backend: str | None = None) -> bool:
+    """指定模型（未指定則任一模型）是否已完成 warm-up。"""
+    if model_root is None:
+        return bool(_READY)
+    try:
+        return (resolve_snapshot(model_root), _backend(backend)) in _READY
+    except FileNotFoundError:
+        return False
+
+
+def loaded_models() -> List[str]:
+    return [f'{path} [{backend}]' for path, backend in _MODELS]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Neo4j 鄰域檢索（graph-native retrieval）
+
+不掃描整份 CSV / npy 快照，而是直接向 Neo4j 取得抽取實體的 1–2 跳鄰域，
+再以快取向量（EmbeddingStore）對這些邊排序：
+  - `get_driver`         : 共用 `src.config.get_driver` 的連線池（整個行程只有一個 driver）
+  - `ensure_entity_index`: 建立 (:Entity {name}) 索引，讓錨點查找走 index seek
+  - `fetch_neighborhood` : 參數化查詢實體鄰域的邊
+  - `GraphRetriever`     : 鄰域邊 → 相似度排序 → (triple, detail) 列表
+
+尚未進入向量庫的新邊（剛寫入 Neo4j、尚未重建向量）會即時編碼並暫存在記憶體。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ...config import NEO4J_CONFIG, get_driver
+from .emb_store import EmbeddingStore, triple_key
+from .kg_table import clean_props
+
+__all__ = ['get_driver', 'ensure_entity_index', 'fetch_neighborhood', 'GraphRetriever']
+
+NEO4J_DATABASE = NEO4J_CONFIG['database']
+NEIGHBOR_LIMIT = 2000  # 每次查詢最多取回的邊數，避免熱門節點爆量
+
+# 變長路徑上限無法參數化，依 hops 預先組好兩種查詢
+_NEIGHBORHOOD_QUERY = """
+MATCH (e:Entity) WHERE e.name IN $names
+MATCH p = (e)-[*1..{hops}]-()
+UNWIND relationships(p) AS r
+WITH DISTINCT r LIMIT $limit
+WITH r, startNode(r) AS h, endNode(r) AS t
+RETURN h.name        AS head,
+       type(r)       AS relation,
+       t.name        AS tail,
+       properties(h) AS head_props,
+       properties(r) AS rel_props,
+       properties(t) AS tail_props
+"""
+_QUERIES = {hops: _NEIGHBORHOOD_QUERY.format(hops=hops) for hops in (1, 2)}
+
+
+def ensure_entity_index(driver=None) -> None:
+    """建立 Entity.name 索引（已存在則略過）。"""
+    driver = driver or get_driver()
+    with driver.session(database=NEO4J_DATABASE) as session:
+        session.run('CREATE INDEX entity_name IF NOT EXISTS FOR (n:Entity) ON (n.name)').consume()
+
+
+def fetch_neighborhood(
+        names: Sequence[str],
+        hops: int = 2,
+        limit: int = NEIGHBOR_LIMIT,
+        driver=None,
+) -> List[Dict[str, Any]]:
+    """取得 names 中各實體 hops 跳內的所有邊（去重），以 KG 表格列格式回傳。"""
+    if hops not in _QUERIES:
+        raise ValueError(f'hops 只支援 {sorted(_QUERIES)}，收到 {hops}')
+    names = [n for n in dict.fromkeys(names) if n]
+    if not names:
+        return []
+
+    driver = driver or get_driver()
+    with driver.session(database=NEO4J_DATABASE, default_access_mode='READ') as session:
+        result = session.run(_QUERIES[hops], names=names, limit=limit)
+        return [
+            {
+                'head': rec['head'],
+                'relation': rec['relation'],
+                'tail': rec['tail'],
+                'head_props': clean_props(rec['head_props']),
+                'rel_props': clean_props(rec['rel_props']),
+                'tail_props': clean_props(rec['tail_props']),
+            }
+            for rec in result
+        ]
+
+
+class GraphRetriever:
+    """
+    以 Neo4j 鄰域為候選集合的檢索器。
+
+    Args:
+        store_dir: EmbeddingStore 目錄（增量向量庫），提供已編碼邊的向量
+        encode_fn: 批次編碼函式 List[str] → (N, DIM)，用於尚未編碼的新邊
+        hops: 鄰域跳數（1 或 2）
+        cache_size: 即時編碼向量的記憶體快取筆數
+    """
+
+    def __init__(
+            self,
+            store_dir: Path,
+            encode_fn: Callable[[List[str]], np.ndarray],
+            hops: int = 2,
+            cache_size: int = 50_000,
+    ) -> None:
+        self.store = EmbeddingStore(store_dir)
+        self.encode_fn = encode_fn
+        self.hops = hops
+        self._fresh: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_size = cache_size
+
+    def _vectors(self, rows: List[Dict[str, Any]], keys: List[str]) -> np.ndarray:
+        """向量庫優先；缺少的邊即時編碼並放入 LRU 快取。"""
+        vecs, found = self.store.gather(keys)
+        missing = np.flatnonzero(~found)
+        if not len(missing):
+            return vecs
+
+        todo = [i for i in missing if keys[i] not in self._fresh]
+        if todo:
+            texts = [f"{rows[i]['head']} {rows[i]['relation']} {rows[i]['tail']}" for i in todo]
+            new = np.asarray(self.encode_fn(texts), dtype=np.float32)
+            for i, v in zip(todo, new):
+                self._fresh[keys[i]] = v
+
+        fresh = np.stack([self._fresh[keys[i]] for i in missing])
+        if vecs.shape[1] != fresh.shape[1]:  # 向量庫為空時 gather 回傳 0 維
+            vecs = np.zeros((len(keys), fresh.shape[1]), dtype=np.float32)
+        vecs[missing] = fresh
+
+        for i in missing:
+            self._fresh.move_to_end(keys[i])
+        while len(self._fresh) > self._cache_size:
+            self._fresh.popitem(last=False)
+        return vecs
+
+    def search(
+            self,
+            tp: Dict[str, str],
+            q_vec: np.ndarray,
+            top_k: int = 100,
+            sim_th: float = 0.8,
+    ) -> List[Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]]:
+        """回傳相似度 ≥ sim_th 的前 top_k 條 (triple, detail)，依分數遞減。"""
+        rows = fetch_neighborhood([tp.get('head'), tp.get('tail')], hops=self.hops)
+        if not rows:
+            return []
+
+        keys = [triple_key(r['head'], r['relation'], r['tail'], r['rel_props']) for r in rows]
+        vecs = self._vectors(rows, keys)
+        norms = np.linalg.norm(vecs, axis=1)
+        norms[norms == 0] = 1.0
+        sims = (vecs @ q_vec) / norms
+
+        order = np.argsort(sims)[::-1][:top_k]
+        hits = []
+        for i in order:
+            if sims[i] < sim_th:
+                break
+            r = rows[i]
+            tri = {'head': r['head'], 'relation': r['relation'], 'tail': r['tail']}
+            det = {'head': r['head_props'], 'rel': r['rel_props'], 'tail': r['tail_props']}
+            hits.append((tri, det))
+        return hits
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+串流 JSON 增量解析（LLM 三元組抽取輸出）
+
+抽取回應是一個物件，內含 `entities` / `relations`（verifier）或 `triples`（answerer）陣列。
+`JSONStream` 逐段餵入串流 delta，每當頂層陣列中的一個元素物件收尾就立即回報，
+不必等整個回應結束；`TripleStream` 再把元素組成三元組：
+  - 容忍 ```json 圍欄、前後說明文字與反引號（第一個 `{` 之前、根物件結束之後的內容皆忽略）
+  - 容忍尾逗號（`{"a": 1,}`、`[1, 2,]`）
+  - relation 的 source / target 尚未出現在 entities 時先暫存，等實體到齊再輸出
+
+提供：
+  - `JSONStream`   : `feed(chunk) -> [(key, obj)]`、`result()` 取得整份文件
+  - `TripleStream` : `feed(chunk) -> [triple]`，可設定 `on_triple` 回呼
+  - `parse_json`   : 一次解析整段文字（同樣容忍圍欄與尾逗號）
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = ['JSONStream', 'TripleStream', 'parse_json']
+
+Triple = Dict[str, str]
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """移除字串外、緊接在 } 或 ] 之前的逗號。"""
+    out: List[str] = []
+    in_str = esc = False
+    pending_comma = -1
+    for ch in text:
+        if in_str:
+            out.append(ch)
+            if esc:
+                esc = False
+            elif ch == '\\':
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch in '}]' and pending_comma >= 0:
+            del out[pending_comma]
+        if ch == ',':
+            pending_comma = len(out)
+        elif not ch.isspace():
+            pending_comma = -1
+        if ch == '"':
+            in_str = True
+        out.append(ch)
+    return ''.join(out)
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_strip_trailing_commas(text))
+
+
+class JSONStream:
+    """
+    增量掃描根物件；頂層 key 對應的陣列中，每個元素（物件）結束時回報 (key, obj)。
+    無法解析的元素略過（不中斷其他元素）。
+    """
+
+    def __init__(self) -> None:
+        self._text = ''
+        self._pos = 0               # 已掃描到 _text 的位置
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_start = -1
+        self._last_str = ''         # 深度 1 最近一個字串（可能是 key）
+        self._key: Optional[str] = None
+        self._elem_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        events: List[Tuple[str, Any]] = []
+        if self._done or not chunk:
+            return events
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == '\\':
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._last_str = text[self._str_start + 1:i]
+            elif ch == '"':
+                self._in_str = True
+                self._str_start = i
+            elif ch == ':' and self._depth == 1:
+                self._key = self._last_str
+            elif ch in '{[':
+                self._depth += 1
+                if self._depth == 3 and ch == '{':
+                    self._elem_start = i
+            elif ch in '}]':
+                if self._depth == 3 and ch == '}' and self._elem_start >= 0:
+                    try:
+                        events.append((self._key or '', _loads(text[self._elem_start:i + 1])))
+                    except json.JSONDecodeError:
+                        pass
+                    self._elem_start = -1
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = True
+                    self._pos = i + 1
+                    break
+            i += 1
+        else:
+            self._pos = i
+        return events
+
+    def result(self) -> Any:
+        """整份根物件（含容錯）；尚未看到根物件時回傳 None。"""
+        text = self._text
+        start = text.find('{')
+        if start < 0:
+            return None
+        end = self._pos if self._done else len(text)
+        return _loads(text[start:end])
+
+
+class TripleStream:
+    """
+    把 `JSONStream` 的元素事件組成三元組：
+      - entities 元素：記錄 id → name，並釋放等待中的 relations
+      - relations 元素：source / target 皆已知時輸出
+      - triples 元素：subject / relation / object 直接輸出
+    相同 (head, relation, tail) 只輸出一次。
+    """
+
+    def __init__(self, on_triple: Optional[Callable[[Triple], None]] = None) -> None:
+        self.json = JSONStream()
+        self.on_triple = on_triple
+        self.triples: List[Triple] = []
+        self._names: Dict[Any, str] = {}
+        self._waiting: List[Dict[str, Any]] = []
+        self._seen: set = set()
+
+    def _emit(self, head: Any, relation: Any, tail: Any, out: List[Triple]) -> None:
+        if not (head and relation and tail):
+            return
+        tp = {'head': head, 'relation': relation, 'tail': tail}
+        k = (head, relation, tail)
+        if k in self._seen:
+            return
+        self._seen.add(k)
+        self.triples.append(tp)
+        out.append(tp)
+        if self.on_triple:
+            self.on_triple(tp)
+
+    def _relation(self, rel: Dict[str, Any], out: List[Triple]) -> bool:
+        h, t = self._names.get(rel.get('source')), self._names.get(rel.get('target'))
+        if h is None or t is None:
+            return False
+        self._emit(h, rel.get('relation'), t, out)
+        return True
+
+    def feed(self, chunk: str) -> List[Triple]:
+        out: List[Triple] = []
+        for key, obj in self.json.feed(chunk):
+            if not isinstance(obj, dict):
+                continue
+            if key == 'entities' and 'id' in obj:
+                self._names[obj['id']] = obj.get('name')
+                self._waiting = [r for r in self._waiting if not self._relation(r, out)]
+            elif key == 'relations':
+                if not self._relation(obj, out):
+                    self._waiting.append(obj)
+            elif key == 'triples':
+                self._emit(obj.get('subject'), obj.get('relation'), obj.get('object'), out)
+        return out
+
+    def __call__(self, chunk: str) -> None:
+        """可直接作為 LLM client 的 on_delta 回呼。"""
+        self.feed(chunk)
+
+
+def parse_json(text: str) -> Any:
+    """一次解析整段 LLM 輸出：容忍圍欄、前後文字與尾逗號；找不到物件時拋出 json.JSONDecodeError。"""
+    stream = JSONStream()
+    stream.feed(text)
+    doc = stream.result()
+    if doc is None:
+        raise json.JSONDecodeError('找不到 JSON 物件', text, 0)
+    return doc
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 三元組向量化共用模組
+
+建置 KG 向量檔（全量或增量）時共用的工具：
+  - `resolve_snapshot`  : 解析 HuggingFace snapshot 路徑
+  - `build_sentences`   : KG DataFrame → 待編碼句子
+  - `load_encoder`      : 載入 SentenceTransformer 與 tokenizer
+  - `window_chunks`     : fast tokenizer 批次斷詞與 sliding-window 分片
+  - `length_buckets`    : 依 token 長度分桶，減少 padding
+  - `encode_sentences`  : 分桶批次編碼，長句取各片平均
+  - `encode_parallel`   : 多行程分片編碼，可中斷續跑
+"""
+
+from __future__ import annotations
+
+import hashlib
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+__all__ = [
+    'WINDOW', 'STRIDE', 'TOKEN_BUDGET', 'MAX_BATCH', 'SHARD_SIZE', 'TQDM_CFG',
+    'resolve_snapshot', 'build_sentences', 'load_encoder',
+    'window_chunks', 'length_buckets', 'encode_sentences', 'encode_parallel',
+]
+
+WINDOW, STRIDE = 510, 256  # sliding window
+TOKEN_BUDGET = 8192  # 每批 padding 後 token 上限
+MAX_BATCH = 256  # 每批片段數上限
+SHARD_SIZE = 20_000  # 多行程模式每個分片的三元組數
+
+# tqdm 全域格式
+TQDM_CFG = dict(bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} "
+                           "[{elapsed}<{remaining}, {rate_fmt}]",
+                ncols=80)
+
+
+def resolve_snapshot(root: Path) -> str:
+    """找到包含 config.json 的模型快照目錄。"""
+    if (root / "config.json").is_file():
+        return str(root)
+    snaps = root / "snapshots"
+    for sub in snaps.iterdir():
+        if (sub / "config.json").is_file():
+            return str(sub)
+    raise FileNotFoundError(f"❌ 找不到模型權重於 {root}")
+
+
+def build_sentences(df: pd.DataFrame, include_props: bool = False) -> List[str]:
+    """將 KG 表格每列組成待編碼句子：「head relation tail [props…]」。"""
+    assert {"head", "relation", "tail"}.issubset(df.columns), "CSV schema error"
+    sentences = df["head"] + " " + df["relation"] + " " + df["tail"]
+    if include_props:
+        for col in ("head_props", "rel_props", "tail_props"):
+            if col in df.columns:
+                sentences = sentences + " " + df[col].fillna("").astype(str)
+            else:
+                sentences = sentences + " "
+    return sentences.tolist()
+
+
+def load_encoder(model_root: Path):
+    """載入 SentenceTransformer 與對應 tokenizer，回傳 (model, tokenizer)。"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoTokenizer
+
+    model_path = resolve_snapshot(model_root)
+    print(f"[Model] resolved → {model_path}")
+
+    t0 = time.time()
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(model_path, device=device, trust_remote_code=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    print(f"[Model] {model.get_sentence_embedding_dimension()}-d on {device}  "
+          f"({time.time() - t0:.1f}s)")
+    return model, tokenizer
+
+
+def window_chunks(tokenizer, texts: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    以 fast tokenizer 批次斷詞，並將超過 WINDOW 的句子切成重疊片段。
+
+    Returns:
+        (chunks, owner, lengths)
+        - chunks : 待編碼文字片段（短句即原句，不經 decode）
+        - owner  : 每個片段對應的來源句索引
+        - lengths: 每個片段的 token 數，供長度分桶使用
+    """
+    if not getattr(tokenizer, "is_fast", False):
+        print("[WARN] tokenizer 非 fast 版本，批次斷詞會明顯變慢")
+    ids_list = tokenizer(list(texts), add_special_tokens=False,
+                         return_attention_mask=False,
+                         return_token_type_ids=False)["input_ids"]
+
+    chunks: List[str] = []
+    owner: List[int] = []
+    lengths: List[int] = []
+    long_ids: List[List[int]] = []
+    long_owner: List[int] = []
+    for i, (text, ids) in enumerate(zip(texts, ids_list)):
+        if len(ids) <= WINDOW:
+            chunks.append(text)
+            owner.append(i)
+            lengths.append(len(ids))
+            continue
+        pos = 0
+        while pos < len(ids):
+            long_ids.append(ids[pos: pos + WINDOW])
+            long_owner.append(i)
+            if pos + WINDOW >= len(ids):
+                break
+            pos += STRIDE
+
+    if long_ids:
+        chunks.extend(tokenizer.batch_decode(long_ids, skip_special_tokens=True))
+        owner.extend(long_owner)
+        lengths.extend(len(c) for c in long_ids)
+
+    return chunks, np.asarray(owner, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+
+
+def length_buckets(lengths: np.ndarray, token_budget: int = TOKEN_BUDGET,
+                   max_batch: int = MAX_BATCH) -> List[np.ndarray]:
+    """
+    依 token 長度排序後切批：每批 padding 後的 token 總數不超過 token_budget。
+
+    相近長度的片段放在同一批，可大幅減少 padding 的無效運算。
+    """
+    order = np.argsort(lengths, kind="stable")
+    batches: List[np.ndarray] = []
+    start = 0
+    while start < len(order):
+        end = start + 1
+        # 排序後批內最長者即最後一筆
+        while (end < len(order) and end - start < max_batch
+               and (end - start + 1) * (int(lengths[order[end]]) + 2) <= token_budget):
+            end += 1
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+
+def encode_sentences(
+        model,
+        tokenizer,
+        sentences: Sequence[str],
+        desc: str = "Embedding",
+        token_budget: int = TOKEN_BUDGET,
+) -> np.ndarray:
+    """
+    以長度分桶批次編碼句子，回傳 (N, DIM) float32 矩陣。
+
+    長句經 sliding-window 分片後，各片向量取平均作為該句向量。
+    """
+    dim = model.get_sentence_embedding_dimension()
+    embs = np.zeros((len(sentences), dim), dtype=np.float32)
+    if not len(sentences):
+        return embs
+
+    chunks, owner, lengths = window_chunks(tokenizer, sentences)
+    batches = length_buckets(lengths, token_budget=token_budget)
+
+    pbar = tqdm(batches, desc=desc, **TQDM_CFG)
+    for batch in pbar:
+        flat_embs = model.encode([chunks[i] for i in batch],
+                                 batch_size=len(batch),
+                                 convert_to_numpy=True,
+                                 show_progress_bar=False)
+        np.add.at(embs, owner[batch], flat_embs.astype(np.float32, copy=False))
+
+    counts = np.bincount(owner, minlength=len(sentences)).astype(np.float32)
+    embs /= counts[:, None]
+    return embs
+
+
+# ─── 多行程編碼 ───────────────────────────────────────────────
+_WORKER: dict = {}
+
+
+def _init_worker(model_root: str, threads: int) -> None:
+    """子行程初始化：限制 intra-op 執行緒數並載入一次模型。"""
+    import torch
+    torch.set_num_threads(threads)
+    _WORKER["model"], _WORKER["tokenizer"] = load_encoder(Path(model_root))
+
+
+def _encode_shard(task: Tuple[int, List[str], str]) -> Tuple[int, int, float]:
+    """編碼單一分片並原子寫入 shard-XXXXX.npy，回傳 (分片編號, 筆數, 秒數)。"""
+    shard_id, texts, ckpt_dir = task
+    t0 = time.perf_counter()
+    vecs = encode_sentences(_WORKER["model"], _WORKER["tokenizer"], texts,
+                            desc=f"shard {shard_id}")
+    out = Path(ckpt_dir) / f"shard-{shard_id:05d}.npy"
+    tmp = out.with_name(out.name + ".tmp")
+    with tmp.open("wb") as fp:
+        np.save(fp, vecs)
+    os.replace(tmp, out)
+    return shard_id, len(texts), time.perf_counter() - t0
+
+
+def _ckpt_signature(sentences: Sequence[str], shard_size: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{len(sentences)}:{shard_size}:{WINDOW}:{STRIDE}".encode())
+    for s in sentences:
+        h.update(s.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def encode_parallel(
+        sentences: Sequence[str],
+        model_root: Path,
+        ckpt_dir: Path,
+        workers: int = 1,
+        shard_size: int = SHARD_SIZE,
+) -> np.ndarray:
+    """
+    以多個 CPU 行程分片編碼，分片寫入 ckpt_dir 後依序合併。
+
+    - 每個分片完成即落地為 shard-XXXXX.npy；中斷後重跑會略過已完成分片
+    - 輸入內容改變（簽章不同）時自動清除舊分片
+    - 結束時列印 triples/s 吞吐量
+    """
+    ckpt_dir = Path(ckpt_dir)
+    ckpt_dir.mkdir(parents=True, exist_ok=True)
+    sig = _ckpt_signature(sentences, shard_size)
+    sig_file = ckpt_dir / "signature.txt"
+    if not sig_file.is_file() or sig_file.read_text(encoding="utf-8") != sig:
+        for old in ckpt_dir.glob("shard-*.npy"):
+            old.unlink()
+        sig_file.write_text(sig, encoding="utf-8")
+
+    n_shards = (len(sentences) + shard_size - 1) // shard_size
+    todo = [
+        (i, list(sentences[i * shard_size:(i + 1) * shard_size]), str(ckpt_dir))
+        for i in range(n_shards)
+        if not (ckpt_dir / f"shard-{i:05d}.npy").is_file()
+    ]
+    print(f"[Shard] 共 {n_shards} 片，已完成 {n_shards - len(todo)}、待處理 {len(todo)}"
+          f"（workers={workers}）")
+
+    t0 = time.perf_counter()
+    done_rows = 0
+    if todo:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = mp.get_context("spawn")  # torch 不適合 fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(str(model_root), threads)) as pool:
+            for shard_id, n, sec in pool.map(_encode_shard, todo):
+                done_rows += n
+                print(f"[Shard] {shard_id:05d} 完成 {n:,} 筆 ({n / sec:,.1f} triples/s)")
+    elapsed = time.perf_counter() - t0
+    if done_rows:
+        print(f"[Throughput] {done_rows:,} 筆 / {elapsed:.1f}s = "
+              f"{done_rows / elapsed:,.1f} triples/s")
+
+    # 依分片編號合併
+    parts = [np.load(ckpt_dir / f"shard-{i:05d}.npy") for i in range(n_shards)]
+    return np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 實體名稱反向索引（head / tail name → row ids）
+
+載入 KG 表格時建立一次，全部以整數陣列保存（CSR 形式）：
+  - `names`            : 實體名稱字典 name → code
+  - `head_codes` / `tail_codes` : 每列 head / tail 的實體 code
+  - `*_indptr` / `*_rows`       : 依 code 分組的列號（CSR）
+
+提供兩種用法：
+  - `candidates(head, tail)`      : 前置過濾，只回傳共享實體的列號
+  - `matches(rows, head, tail)`   : 向量化後置過濾，取代逐列 pandas 查值
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = ['EntityIndex']
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _csr(codes: np.ndarray, n_codes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """把每列的 code 轉為 (indptr, rows)；rows[indptr[c]:indptr[c+1]] 為 code c 的列號。"""
+    rows = np.argsort(codes, kind='stable').astype(np.int64)
+    counts = np.bincount(codes[codes >= 0], minlength=n_codes)
+    indptr = np.zeros(n_codes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    # code = -1（名稱為空）的列排在最前面，略過
+    return indptr, rows[len(codes) - int(counts.sum()):]
+
+
+class EntityIndex:
+    """head / tail 名稱 → KG 列號的反向索引。"""
+
+    def __init__(self, heads: Sequence[str], tails: Sequence[str]) -> None:
+        import pandas as pd
+
+        n = len(heads)
+        codes, uniques = pd.factorize(pd.concat(
+            [pd.Series(heads, dtype=object), pd.Series(tails, dtype=object)],
+            ignore_index=True,
+        ))
+        codes = codes.astype(np.int32)
+        self.names: Dict[str, int] = {name: i for i, name in enumerate(uniques)}
+        self.head_codes = codes[:n]
+        self.tail_codes = codes[n:]
+        self.head_indptr, self.head_rows = _csr(self.head_codes, len(uniques))
+        self.tail_indptr, self.tail_rows = _csr(self.tail_codes, len(uniques))
+
+    @classmethod
+    def from_df(cls, df: 'pd.DataFrame') -> 'EntityIndex':
+        return cls(df['head'].to_numpy(), df['tail'].to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.head_codes)
+
+    def code(self, name: str | None) -> int:
+        """實體名稱 → code；不存在回傳 -1。"""
+        return self.names.get(name, -1) if name else -1
+
+    def rows_with_head(self, name: str | None) -> np.ndarray:
+        c = self.code(name)
+        return _EMPTY if c < 0 else self.head_rows[self.head_indptr[c]:self.head_indptr[c + 1]]
+
+    def rows_with_tail(self, name: str | None) -> np.ndarray:
+        c = self.code(name)
+        return _EMPTY if c < 0 else self.tail_rows[self.tail_indptr[c]:self.tail_indptr[c + 1]]
+
+    def candidates(self, head: str | None, tail: str | None) -> np.ndarray:
+        """head 相同或 tail 相同的列號（遞增、不重複）。"""
+        return np.union1d(self.rows_with_head(head), self.rows_with_tail(tail))
+
+    def matches(self, rows: np.ndarray, head: str | None, tail: str | None) -> np.ndarray:
+        """rows 中 head 相同或 tail 相同者的布林遮罩。"""
+        rows = np.asarray(rows, dtype=np.int64)
+        hc, tc = self.code(head), self.code(tail)
+        mask = np.zeros(len(rows), dtype=bool)
+        if hc >= 0:
+            mask |= self.head_codes[rows] == hc
+        if tc >= 0:
+            mask |= self.tail_codes[rows] == tc
+        return mask
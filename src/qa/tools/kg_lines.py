@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 敘述預先計算庫（verbalized line store）
+
+檢索命中後原本每列都要 `iloc` → 三次 props 解碼 → `kg_nl.verbalize`，
+熱門列在每次請求都重算一次。此模組在 KG 建置階段一次算好：
+  - 每列的敘述句本體（`kg_nl.sentence`，不含編號前綴）
+  - 每列的 (triple, detail)，props 已解碼（JSON 串接存放，命中時才解碼該列）
+
+目錄結構：
+    <root>/lines.bin     # 所有敘述句 UTF-8 串接
+    <root>/offsets.npy   # int64，第 i 句為 lines.bin[offsets[i]:offsets[i+1]]
+    <root>/details.bin   # 每列 [tri, det] 的 JSON（UTF-8）串接，與 KG 表格列一一對齊
+    <root>/details-offsets.npy  # int64，與 offsets.npy 相同格式
+    <root>/meta.json     # 列數與來源表格資訊，用於判斷是否過期
+    <root>/ngram-*       # head / tail / evidence 的字元 n-gram 索引（`kg_ngram`，hybrid 檢索使用）
+
+提供：
+  - `build_line_store` : 由 KG 表格建立（建置腳本呼叫，亦可單獨執行本模組）
+  - `load_line_store`  : 載入並檢查是否與目前 KG 表格對齊，不符回傳 None
+  - `KGLineStore`      : 依列號取回敘述句 / detail
+
+執行方式：
+  python -m src.qa.tools.kg_lines
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from . import kg_nl as knl
+from .kg_table import decode_props
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = ['KGLineStore', 'build_line_store', 'load_line_store']
+
+_Detail = Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]
+
+
+def _source_info(source: Path | None) -> Dict[str, Any]:
+    if source is None or not Path(source).is_file():
+        return {}
+    st = Path(source).stat()
+    return {'source': Path(source).name, 'source_size': st.st_size, 'source_mtime_ns': st.st_mtime_ns}
+
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+
+def _pack(payloads: List[bytes]) -> Tuple[bytes, bytes]:
+    """串接 payloads，回傳 (blob, offsets.npy 內容)。"""
+    offsets = np.zeros(len(payloads) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in payloads], out=offsets[1:])
+    buf = io.BytesIO()
+    np.save(buf, offsets)
+    return b''.join(payloads), buf.getvalue()
+
+
+def _open_blob(root: Path, blob: str, offsets: str) -> Tuple[np.ndarray, np.ndarray]:
+    offs = np.load(root / offsets)
+    data = np.memmap(root / blob, dtype=np.uint8, mode='r') if offs[-1] else np.empty(0, dtype=np.uint8)
+    return offs, data
+
+
+def _row_details(df: 'pd.DataFrame') -> List[_Detail]:
+    cols = {c: df[c] if c in df.columns else [None] * len(df)
+            for c in ('head_props', 'rel_props', 'tail_props')}
+    return [
+        ({'head': h, 'relation': r, 'tail': t},
+         {'head': decode_props(hp), 'rel': decode_props(rp), 'tail': decode_props(tp)})
+        for h, r, t, hp, rp, tp in zip(df['head'], df['relation'], df['tail'],
+                                       cols['head_props'], cols['rel_props'], cols['tail_props'])
+    ]
+
+
+def build_line_store(df: 'pd.DataFrame', root: Path, source: Path | None = None) -> int:
+    """依 KG 表格列順序預先計算敘述句、detail 與 n-gram 索引，回傳列數。"""
+    from .kg_ngram import build_ngram_index  # kg_ngram 沿用本模組的 _source_info / _write_atomic
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    details = _row_details(df)
+
+    lines, line_offsets = _pack([
+        knl.sentence(tri['head'], tri['relation'], tri['tail'],
+                     det['head'], det['rel'], det['tail']).encode('utf-8')
+        for tri, det in details
+    ])
+    blob, detail_offsets = _pack([json.dumps(d, ensure_ascii=False, default=str).encode('utf-8') for d in details])
+
+    # 所有檔案皆以暫存檔 + os.replace 寫入（新 inode）：快照版本以 hard link 引用這些檔案，不可原位覆寫。
+    # meta 最後寫入：中途中斷時舊 meta 已先移除，載入端會判定為不存在
+    (root / 'meta.json').unlink(missing_ok=True)
+    (root / 'details.pkl').unlink(missing_ok=True)  # 舊格式
+    for name, payload in (('lines.bin', lines), ('offsets.npy', line_offsets),
+                          ('details.bin', blob), ('details-offsets.npy', detail_offsets)):
+        _write_atomic(root / name, payload)
+    build_ngram_index(((tri['head'], tri['tail'], det['rel'].get('evidence')) for tri, det in details),
+                      root, source=source)
+
+    meta = {'rows': len(details), **_source_info(source)}
+    _write_atomic(root / 'meta.json', json.dumps(meta, indent=2).encode('utf-8'))
+    return len(details)
+
+
+class KGLineStore:
+    """與 KG 表格列對齊的敘述句 / detail 庫。"""
+
+    def __init__(self, root: Path) -> None:
+        root = Path(root)
+        self.meta = json.loads((root / 'meta.json').read_text(encoding='utf-8'))
+        self._offsets, self._blob = _open_blob(root, 'lines.bin', 'offsets.npy')
+        self._detail_offsets, self._details = _open_blob(root, 'details.bin', 'details-offsets.npy')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def line(self, row: int) -> str:
+        """第 row 列的敘述句（不含編號）。"""
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+    def lines(self, rows: Sequence[int]) -> List[str]:
+        return [self.line(int(r)) for r in rows]
+
+    def detail(self, row: int) -> _Detail:
+        """第 row 列的 (triple, detail)，props 已解碼。"""
+        start, end = self._detail_offsets[row], self._detail_offsets[row + 1]
+        tri, det = json.loads(self._details[start:end].tobytes().decode('utf-8'))
+        return tri, det
+
+
+def load_line_store(root: Path, n_rows: int, source: Path | None = None) -> KGLineStore | None:
+    """
+    載入敘述庫；不存在、列數不符或來源表格已更新時回傳 None，
+    呼叫端應退回即時 verbalize。
+    """
+    root = Path(root)
+    if not (root / 'meta.json').is_file():
+        return None
+    if not (root / 'details.bin').is_file():
+        print('⚠️ 敘述庫為舊格式（details.pkl），改為即時生成；請重新建置 kg-lines')
+        return None
+    store = KGLineStore(root)
+    if len(store) != n_rows:
+        print(f'⚠️ 敘述庫列數 {len(store):,} 與 KG 表格 {n_rows:,} 不符，改為即時生成')
+        return None
+    expected = _source_info(source)
+    if expected and any(store.meta.get(k) != v for k, v in expected.items()):
+        print('⚠️ 敘述庫早於目前 KG 表格，改為即時生成')
+        return None
+    return store
+
+
+def main() -> None:
+    import argparse
+
+    from .kg_table import read_kg_table, resolve_kg_table
+
+    parser = argparse.ArgumentParser(description='Precompute verbalized KG lines')
+    parser.add_argument('--csv', default='data/raw/knowledge-graph/neo4j-kg-raw-graph.csv',
+                        help='KG 表格（CSV / Parquet），預設自動挑選較新者')
+    parser.add_argument('--out', default='data/processed/knowledge-graph/kg-lines')
+    args = parser.parse_args()
+
+    kg_path = resolve_kg_table(Path(args.csv))
+    n = build_line_store(read_kg_table(kg_path), Path(args.out), source=kg_path)
+    print(f'✅ 敘述庫：{args.out}（{n:,} 列）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 字元 n-gram 反向索引（BM25）
+
+`EntityIndex` 只接受 head / tail 名稱完全相同的列，「柯文哲」與「台北市長柯文哲」這類
+近似名稱會被漏掉；全量向量掃描又太貴。此索引以字元 bigram（單字名稱用 unigram）
+涵蓋 head、tail 與 evidence，於 KG 建置時（`build_line_store`）一併建立：
+
+    <kg-lines>/ngram-meta.json     # 列數、平均長度、來源表格資訊
+    <kg-lines>/ngram-terms.json    # n-gram → term id
+    <kg-lines>/ngram-indptr.npy    # CSR：term t 的 postings 為 [indptr[t], indptr[t+1])
+    <kg-lines>/ngram-rows.npy      # postings 列號（int32，依列號遞增）
+    <kg-lines>/ngram-tf.npy        # postings 加權詞頻（float32；head / tail 權重較高）
+    <kg-lines>/ngram-doclen.npy    # 每列加權長度
+
+放在敘述庫目錄內，快照版本（`kg_versions`）發佈時一起固定；陣列以 mmap 載入。
+查詢只累加查詢 n-gram 的 postings，計分列數與命中數成正比，而非 KG 總列數。
+
+提供：
+  - `ngrams`             : 正規化後的字元 n-gram
+  - `build_ngram_index`  : 由 (head, tail, evidence) 建立
+  - `load_ngram_index`   : 載入並檢查與 KG 表格對齊，不符回傳 None
+  - `NgramIndex`         : `search(texts, k)` → BM25 前 k 名 (列號, 分數)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .kg_lines import _source_info, _write_atomic
+
+__all__ = ['ngrams', 'build_ngram_index', 'load_ngram_index', 'NgramIndex']
+
+FIELD_WEIGHTS: Dict[str, float] = {'head': 2.0, 'tail': 2.0, 'evidence': 1.0}
+K1: float = 1.2
+B: float = 0.75
+MAX_DF_RATIO: float = 0.2  # 出現在超過此比例列數的 n-gram（如「實體」「報導」）查詢時略過
+
+_SPACE = re.compile(r'\s+')
+_EMPTY = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+
+
+def ngrams(text: Any, n: int = 2) -> List[str]:
+    """NFKC + 小寫 + 去空白後的字元 n-gram；短於 n 的字串整串當作一個 term。"""
+    if not isinstance(text, str) or not text:
+        return []
+    text = _SPACE.sub('', unicodedata.normalize('NFKC', text).lower())
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _files(root: Path) -> Dict[str, Path]:
+    return {k: Path(root) / f'ngram-{k}' for k in ('meta.json', 'terms.json', 'indptr.npy', 'rows.npy',
+                                                   'tf.npy', 'doclen.npy')}
+
+
+def build_ngram_index(fields: Iterable[Tuple[Any, Any, Any]], root: Path, source: Path | None = None) -> int:
+    """
+    fields 依 KG 表格列順序提供 (head, tail, evidence)，回傳列數。
+    meta 最後寫入：中途中斷時載入端會判定為不存在。
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    files = _files(root)
+    files['meta.json'].unlink(missing_ok=True)
+
+    vocab: Dict[str, int] = {}
+    term_ids, row_ids, weights = array('q'), array('q'), array('f')  # 緊湊緩衝，百萬列時不佔大量 Python 物件
+    doclen = array('f')
+    for row, values in enumerate(fields):
+        length = 0.0
+        for w, text in zip(FIELD_WEIGHTS.values(), values):
+            for g in ngrams(text):
+                term_ids.append(vocab.setdefault(g, len(vocab)))
+                row_ids.append(row)
+                weights.append(w)
+                length += w
+        doclen.append(length)
+    n_rows = len(doclen)
+
+    # (term, row) 排序後合併重複，得到 CSR postings
+    terms = np.frombuffer(term_ids, dtype=np.int64)
+    rows = np.frombuffer(row_ids, dtype=np.int64)
+    order = np.lexsort((rows, terms))
+    terms, rows, tf = terms[order], rows[order], np.frombuffer(weights, dtype=np.float32)[order]
+    if len(terms):
+        first = np.flatnonzero(np.r_[True, (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])])
+        tf = np.add.reduceat(tf, first)
+        terms, rows = terms[first], rows[first]
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=indptr[1:])
+
+    for key, arr in (('indptr.npy', indptr), ('rows.npy', rows.astype(np.int32)),
+                     ('tf.npy', tf.astype(np.float32)), ('doclen.npy', np.asarray(doclen, dtype=np.float32))):
+        tmp = files[key].with_name(files[key].name + '.tmp')
+        with tmp.open('wb') as fp:
+            np.save(fp, arr)
+        os.replace(tmp, files[key])
+    # 與敘述庫相同：快照版本以 hard link 引用，一律以暫存檔 + os.replace 寫入
+    _write_atomic(files['terms.json'], json.dumps(vocab, ensure_ascii=False).encode('utf-8'))
+
+    meta = {'rows': n_rows, 'terms': len(vocab), 'postings': int(len(rows)),
+            'avgdl': float(np.mean(doclen)) if n_rows else 0.0, 'fields': FIELD_WEIGHTS,
+            **_source_info(source)}
+    _write_atomic(files['meta.json'], json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+    return n_rows
+
+
+class NgramIndex:
+    """與 KG 表格列對齊的字元 n-gram BM25 索引。"""
+
+    def __init__(self, root: Path) -> None:
+        files = _files(root)
+        self.meta = json.loads(files['meta.json'].read_text(encoding='utf-8'))
+        self.vocab: Dict[str, int] = json.loads(files['terms.json'].read_text(encoding='utf-8'))
+        self._indptr = np.load(files['indptr.npy'])
+        self._rows = np.load(files['rows.npy'], mmap_mode='r')
+        self._tf = np.load(files['tf.npy'], mmap_mode='r')
+        self._doclen = np.load(files['doclen.npy'], mmap_mode='r')
+        self.n_rows = int(self.meta['rows'])
+        self.avgdl = float(self.meta['avgdl']) or 1.0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def df(self, term: str) -> int:
+        t = self.vocab.get(term)
+        return 0 if t is None else int(self._indptr[t + 1] - self._indptr[t])
+
+    def search(self, texts: Sequence[Any], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        texts（例如查詢三元組的 head、tail）的 n-gram 以 BM25 計分，回傳分數遞減的前 k 名 (列號, 分數)。
+        只計算含有查詢 n-gram 的列；過於常見的 n-gram 略過（全部都常見時仍保留）。
+        """
+        terms = {self.vocab[g] for text in texts for g in ngrams(text) if g in self.vocab}
+        if not terms:
+            return _EMPTY
+        spans = sorted((int(self._indptr[t]), int(self._indptr[t + 1])) for t in terms)
+        max_df = MAX_DF_RATIO * self.n_rows
+        rare = [(a, b) for a, b in spans if b - a <= max_df]
+        spans = rare or [min(spans, key=lambda s: s[1] - s[0])]
+
+        rows, contrib = [], []
+        for a, b in spans:
+            df = b - a
+            idf = math.log(1.0 + (self.n_rows - df + 0.5) / (df + 0.5))
+            r = np.asarray(self._rows[a:b], dtype=np.int64)
+            tf = np.asarray(self._tf[a:b])
+            norm = K1 * (1.0 - B + B * np.asarray(self._doclen[r]) / self.avgdl)
+            rows.append(r)
+            contrib.append(idf * tf * (K1 + 1.0) / (tf + norm))
+        uniq, inv = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inv, weights=np.concatenate(contrib)).astype(np.float32)
+        if len(uniq) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            uniq, scores = uniq[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return uniq[order], scores[order]
+
+
+def load_ngram_index(root: Path, n_rows: int, source: Path | None = None) -> NgramIndex | None:
+    """載入索引；不存在、列數不符或來源表格已更新時回傳 None（hybrid 檢索退回 prefilter）。"""
+    if not _files(root)['meta.json'].is_file():
+        return None
+    index = NgramIndex(root)
+    if len(index) != n_rows:
+        print(f'⚠️ n-gram 索引列數 {len(index):,} 與 KG 表格 {n_rows:,} 不符，略過')
+        return None
+    expected = _source_info(source)
+    if expected and any(index.meta.get(k) != v for k, v in expected.items()):
+        print('⚠️ n-gram 索引早於目前 KG 表格，略過')
+        return None
+    return index
@@ -6,7 +6,9 @@ KG → 自然語言模組
 本模組提供將知識圖譜三元組轉換為自然語言描述的工具：
   - `_fmt_props`      : 屬性字典格式化
   - `format_entity`   : 組裝實體描述
-  - `verbalize`       : 將單一三元組轉為句子
+  - `sentence`        : 將單一三元組轉為句子本體（不含編號）
+  - `number_line`     : 為句子本體加上編號
+  - `verbalize`       : 將單一三元組轉為編號句子
   - `build_block`     : 批量生成多行描述
 
 修訂：若關係屬性含 `date` 或 `time`，會在敘述末端附加事件時間。
@@ -59,6 +61,35 @@ def format_entity(
     return f'{name}（{formatted}）'
 
 
+def sentence(
+        head: str,
+        relation: str,
+        tail: str,
+        head_props: Dict[str, Any],
+        rel_props: Dict[str, Any],
+        tail_props: Dict[str, Any]
+) -> str:
+    """
+    將單條三元組及其屬性轉為不含編號的描述句，
+    可預先計算保存（見 kg_lines），輸出時再以 `number_line` 編號。
+    """
+    head_desc = format_entity(head, head_props, role='主體')
+    tail_desc = format_entity(tail, tail_props, role='受體')
+    desc = rel_props.get('evidence', relation)
+    date = rel_props.get('date') or rel_props.get('time')
+    time_part = f'；事件時間：{date}' if date else ''
+
+    return (
+        f'{head_desc} 透過關係【{relation}】'
+        f'與 {tail_desc} 建立連結，說明：{desc}{time_part}。'
+    )
+
+
+def number_line(idx: int, body: str) -> str:
+    """為描述句加上 "idx. " 前綴。"""
+    return f'{idx}. {body}'
+
+
 def verbalize(
         idx: int,
         head: str,
@@ -83,16 +114,7 @@ def verbalize(
         格式化後的描述句，例如：
         "1. A（屬性…）透過關係【rel】與 B（屬性…）建立連結…。"
     """
-    head_desc = format_entity(head, head_props, role='主體')
-    tail_desc = format_entity(tail, tail_props, role='受體')
-    desc = rel_props.get('evidence', relation)
-    date = rel_props.get('date') or rel_props.get('time')
-    time_part = f'；事件時間：{date}' if date else ''
-
-    return (
-        f'{idx}. {head_desc} 透過關係【{relation}】'
-        f'與 {tail_desc} 建立連結，說明：{desc}{time_part}。'
-    )
+    return number_line(idx, sentence(head, relation, tail, head_props, rel_props, tail_props))
 
 
 def build_block(
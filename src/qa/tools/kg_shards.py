@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 向量分片檢索（多行程）
+
+單一行程以 `vecs_norm @ q` 掃描整個 KG 矩陣，受限於一個核心的記憶體頻寬；數百萬列時
+正規化矩陣也無法整份放進每個行程。`ShardedSearcher` 把矩陣依列切成 N 片：
+
+  - 正規化向量只寫一次到 `<emb>.norm.npy`（float32），之後各行程以 mmap 共用同一份 page cache，
+    主行程也改用 mmap（不再在記憶體內另存一份）
+  - 每片由一個專屬 worker 行程掃描（spawn，與服務端的執行緒安全），分塊矩陣乘法限制暫存記憶體，
+    回傳該片分數遞減的本地 top-K（已套用相似度門檻）
+  - 主行程以 heap 合併各片結果（k 路合併，只取前 K）
+  - 一次可送出多個查詢向量（矩陣乘矩陣），answerer 的所有三元組共用一次掃描
+
+未設定 KG_SHARDS（或 <= 1）時完全不使用，檢索維持原本的單行程路徑。只有全表掃描的呼叫端
+會建立分片：answerer，以及 KG_FILTER_MODE=postfilter 的 verifier（見 snapshot_manager）。
+
+提供：
+  - `SHARDS`           : 環境變數 KG_SHARDS（分片 / worker 數）
+  - `norm_path`        : 向量檔對應的正規化向量檔路徑
+  - `ensure_norm_file` : 分塊正規化並寫入（已是最新時略過）
+  - `scan_topk`        : 對一段向量計算每個查詢的 top-K（worker 與單行程共用）
+  - `ShardedSearcher`  : topk / topk_many / close
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+__all__ = ['SHARDS', 'norm_path', 'ensure_norm_file', 'scan_topk', 'ShardedSearcher']
+
+SHARDS: int = int(os.getenv('KG_SHARDS', '0'))  # <= 1 表示不分片
+CHUNK_ROWS: int = 65536  # 每次矩陣乘法的列數（暫存 sims 為 CHUNK_ROWS × 查詢數）
+
+Hits = Tuple[np.ndarray, np.ndarray]  # (列號, 分數)，分數遞減
+
+
+def norm_path(emb_path: Path) -> Path:
+    """kg-triplet.emb.npy → kg-triplet.emb.norm.npy"""
+    emb_path = Path(emb_path)
+    return emb_path.with_name(emb_path.name[:-len('.npy')] + '.norm.npy')
+
+
+def ensure_norm_file(emb_path: Path, chunk: int = CHUNK_ROWS) -> Path:
+    """
+    以 mmap 逐塊讀取原始向量、正規化後寫入 float32 的 norm 檔（暫存檔 + os.replace）。
+    norm 檔比向量檔新且列數相同時直接沿用。
+    """
+    emb_path = Path(emb_path)
+    out = norm_path(emb_path)
+    src = np.load(emb_path, mmap_mode='r')
+    if out.is_file() and out.stat().st_mtime >= emb_path.stat().st_mtime:
+        if np.load(out, mmap_mode='r').shape == src.shape:
+            return out
+    tmp = out.with_name(f'.{out.name}.{os.getpid()}.tmp')
+    dst = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=src.shape)
+    for a in range(0, len(src), chunk):
+        block = np.asarray(src[a:a + chunk], dtype=np.float32)
+        dst[a:a + chunk] = block / np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+    dst.flush()
+    del dst
+    os.replace(tmp, out)
+    return out
+
+
+def scan_topk(vecs: np.ndarray, q: np.ndarray, k: int, min_score: float = -np.inf, offset: int = 0,
+              chunk: int = CHUNK_ROWS) -> List[Hits]:
+    """
+    vecs (N, d) 與查詢 q (Q, d) → 每個查詢分數 >= min_score 的前 k 名（列號加上 offset）。
+    分塊計算，每塊只保留候選（argpartition），不建立 N × Q 的完整分數矩陣。
+    """
+    q = np.atleast_2d(np.asarray(q, dtype=np.float32))
+    best_rows = [np.empty(0, np.int64) for _ in range(len(q))]
+    best_scores = [np.empty(0, np.float32) for _ in range(len(q))]
+    for a in range(0, len(vecs), chunk):
+        sims = np.asarray(vecs[a:a + chunk]) @ q.T  # (c, Q)
+        for j in range(len(q)):
+            s = sims[:, j]
+            keep = np.flatnonzero(s >= min_score)
+            if not len(keep):
+                continue
+            rows = np.concatenate([best_rows[j], keep + a])
+            scores = np.concatenate([best_scores[j], s[keep]])
+            if len(rows) > k:
+                part = np.argpartition(scores, -k)[-k:]
+                rows, scores = rows[part], scores[part]
+            best_rows[j], best_scores[j] = rows, scores
+    out = []
+    for rows, scores in zip(best_rows, best_scores):
+        order = np.argsort(-scores, kind='stable')
+        out.append((rows[order] + offset, scores[order]))
+    return out
+
+
+# ── worker 行程 ──
+_SHARD: Optional[Tuple[np.ndarray, int]] = None
+
+
+def _open_shard(path: str, lo: int, hi: int) -> None:
+    global _SHARD
+    _SHARD = (np.load(path, mmap_mode='r')[lo:hi], lo)
+
+
+def _shard_rows() -> int:
+    return len(_SHARD[0])
+
+
+def _shard_topk(q: np.ndarray, k: int, min_score: float) -> List[Hits]:
+    vecs, lo = _SHARD
+    return scan_topk(vecs, q, k, min_score, offset=lo)
+
+
+def _merge(parts: List[Hits], k: int) -> Hits:
+    """各片分數遞減的結果以 heap 做 k 路合併，取前 k 名。"""
+    runs = [zip((-s for s in scores.tolist()), rows.tolist()) for rows, scores in parts]
+    top = list(itertools.islice(heapq.merge(*runs), k))
+    return (np.array([r for _, r in top], dtype=np.int64),
+            np.array([-s for s, _ in top], dtype=np.float32))
+
+
+class ShardedSearcher:
+    """
+    Args:
+        path: 正規化向量檔（`ensure_norm_file` 的輸出）
+        shards: 分片數（= worker 行程數）
+    """
+
+    def __init__(self, path: Path, shards: int = SHARDS) -> None:
+        self.path = Path(path)
+        n = len(np.load(self.path, mmap_mode='r'))
+        shards = max(1, min(shards, n))
+        edges = np.linspace(0, n, shards + 1).astype(int)
+        self.bounds = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+        ctx = mp.get_context('spawn')
+        self._pools = [ProcessPoolExecutor(1, mp_context=ctx, initializer=_open_shard,
+                                           initargs=(str(self.path), lo, hi)) for lo, hi in self.bounds]
+        # 先啟動所有 worker 並確認分片大小，第一個查詢不需等待行程啟動
+        sizes = [f.result() for f in [p.submit(_shard_rows) for p in self._pools]]
+        if sum(sizes) != n:
+            self.close()
+            raise RuntimeError(f'分片列數 {sum(sizes):,} 與向量檔 {n:,} 列不符：{self.path}')
+
+    def __len__(self) -> int:
+        return self.bounds[-1][1]
+
+    def topk_many(self, q: np.ndarray, k: int, min_score: float = -np.inf) -> List[Hits]:
+        """多個查詢向量一次送給所有分片；回傳每個查詢的 (列號, 分數)。執行緒安全。"""
+        q = np.atleast_2d(np.asarray(q, dtype=np.float32))
+        futs = [p.submit(_shard_topk, q, k, float(min_score)) for p in self._pools]
+        parts = [f.result() for f in futs]
+        return [_merge([part[j] for part in parts], k) for j in range(len(q))]
+
+    def topk(self, q_vec: np.ndarray, k: int, min_score: float = -np.inf) -> Hits:
+        return self.topk_many(q_vec, k, min_score)[0]
+
+    def close(self) -> None:
+        for p in self._pools:
+            p.shutdown(wait=False, cancel_futures=True)
+        self._pools = []
+
+    def __enter__(self) -> 'ShardedSearcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 快照（snapshot backend 共用的記憶體內資料）
+
+把檢索需要的 KG 表格、正規化向量、敘述庫與實體索引集中成一個物件，
+由呼叫端決定何時載入（第一次檢索或明確 warm-up），import 本模組不做任何 I/O：
+  - `KGSnapshot`    : 資料容器；`index` 與（shards > 1 時）`searcher` 於第一次使用時才建立，
+                      `lexical` 為敘述庫目錄內的 n-gram 索引（不存在時為 None）
+  - `load_snapshot` : 由向量檔、KG 表格與敘述庫目錄載入（版本目錄中的檔案以 table_path 指定）
+"""
+
+from __future__ import annotations
+
+import time
+import weakref
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from .kg_index import EntityIndex
+from .kg_lines import KGLineStore, load_line_store
+from .kg_ngram import NgramIndex, load_ngram_index
+from .kg_shards import SHARDS, ShardedSearcher, ensure_norm_file
+from .kg_table import read_kg_table, resolve_kg_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = ['KGSnapshot', 'load_snapshot']
+
+
+@dataclass
+class KGSnapshot:
+    df: 'pd.DataFrame'
+    vecs_norm: np.ndarray
+    table_path: Path
+    lines: Optional[KGLineStore] = None
+    version: Optional[str] = None
+    lexical: Optional[NgramIndex] = None
+    norm_path: Optional[Path] = None  # 分片檢索時 vecs_norm 為此檔的 mmap
+    shards: int = 0
+    hp_col: Optional[str] = field(init=False)
+    rp_col: Optional[str] = field(init=False)
+    tp_col: Optional[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        cols = self.df.columns
+        self.hp_col = 'head_props' if 'head_props' in cols else None
+        self.rp_col = 'rel_props' if 'rel_props' in cols else None
+        self.tp_col = 'tail_props' if 'tail_props' in cols else None
+
+    @cached_property
+    def index(self) -> EntityIndex:
+        return EntityIndex.from_df(self.df)
+
+    @cached_property
+    def searcher(self) -> Optional[ShardedSearcher]:
+        """多行程分片檢索器（shards > 1 時）；快照被回收時一併結束 worker。"""
+        if self.shards <= 1 or self.norm_path is None:
+            return None
+        searcher = ShardedSearcher(self.norm_path, self.shards)
+        weakref.finalize(self, searcher.close)
+        return searcher
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+
+def load_snapshot(emb_path: Path, csv_path: Path, lines_dir: Path | None = None, *,
+                  table_path: Path | None = None, version: str | None = None,
+                  shards: int = SHARDS) -> KGSnapshot:
+    """
+    載入向量（正規化）、KG 表格與（若存在且對齊）預先計算的敘述庫。
+
+    table_path 指定時直接使用（不經 resolve_kg_table / KG_TABLE_PATH），供快照版本目錄使用。
+    shards > 1 時正規化向量寫成 norm 檔並以 mmap 開啟，與分片 worker 共用。
+    """
+    t0 = time.perf_counter()
+    norm = None
+    if shards > 1:
+        norm = ensure_norm_file(emb_path)
+        vecs_norm = np.load(norm, mmap_mode='r')
+    else:
+        vecs = np.load(emb_path)
+        vecs_norm = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    table_path = Path(table_path) if table_path else resolve_kg_table(csv_path)
+    df = read_kg_table(table_path)
+    if len(df) != len(vecs_norm):
+        raise ValueError(f'KG 表格 {len(df):,} 列與向量 {len(vecs_norm):,} 列不符：{table_path} / {emb_path}')
+    lines = load_line_store(lines_dir, len(df), source=table_path) if lines_dir else None
+    lexical = load_ngram_index(lines_dir, len(df), source=table_path) if lines_dir else None
+    print(f'📚 KG 快照{f" {version} " if version else ""}載入 {len(df):,} 列（{time.perf_counter() - t0:.1f}s）')
+    return KGSnapshot(df=df, vecs_norm=vecs_norm, table_path=table_path, lines=lines, version=version,
+                      lexical=lexical, norm_path=norm, shards=shards)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 表格讀寫共用模組
+
+KG 表格（每列一條 (h)-[r]->(t) 邊）有兩種落地格式：
+  - CSV    : 舊版 APOC 匯出，props 欄位為 JSON 字串
+  - Parquet: 串流匯出器輸出，props 欄位為原生 map<string, string>，每個值為該屬性的 JSON 文字，
+             數字、布林、list 讀回時保留型態（Neo4j 屬性無固定鍵集合，無法使用 struct）；
+             早期檔案的值為 str()，無法以 JSON 解析時原樣保留
+
+提供：
+  - `KG_SCHEMA`         : Parquet 欄位定義（需 pyarrow）
+  - `clean_props`       : 移除 None 值，屬性值保留原生型態
+  - `stringify_props`   : 屬性值一律轉為字串，供穩定鍵使用
+  - `decode_props`      : 任一格式的 props 欄位值 → dict
+  - `read_kg_table`     : 依副檔名讀取 CSV / Parquet
+  - `encode_props`      : dict 形式的 props → 該格式落地時的欄位值
+  - `write_kg_table`    : 依副檔名原子寫入 CSV / Parquet
+  - `resolve_kg_table`  : 在 raw 目錄中挑選最新的 KG 表格
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    'BASE_COLUMNS', 'PROPS_COLUMNS', 'KG_SCHEMA',
+    'clean_props', 'stringify_props', 'decode_props', 'read_kg_table', 'encode_props', 'write_kg_table', 'resolve_kg_table',
+]
+
+BASE_COLUMNS = ('head', 'relation', 'tail')
+PROPS_COLUMNS = ('head_props', 'rel_props', 'tail_props')
+
+
+def _build_schema():
+    try:
+        import pyarrow as pa
+    except ImportError:  # 僅 Parquet 讀寫需要
+        return None
+    props_type = pa.map_(pa.string(), pa.string())
+    return pa.schema(
+        [(c, pa.string()) for c in BASE_COLUMNS]
+        + [(c, props_type) for c in PROPS_COLUMNS]
+    )
+
+
+KG_SCHEMA = _build_schema()
+
+
+def _prop_value(v: Any) -> str:
+    """純量以 str() 保存（與 kg_nl 敘述一致），容器以 JSON 保存。"""
+    if isinstance(v, str):
+        return v
+    if isinstance(v, (list, tuple, dict)):
+        return json.dumps(v, ensure_ascii=False, default=str)
+    return str(v)
+
+
+def stringify_props(props: Dict[str, Any] | None) -> Dict[str, str]:
+    """移除 None 值並把屬性值轉為字串。"""
+    if not props:
+        return {}
+    return {str(k): _prop_value(v) for k, v in props.items() if v is not None}
+
+
+def clean_props(props: Dict[str, Any] | None) -> Dict[str, Any]:
+    """移除 None 值；屬性值保留原生型態（寫入表格時再依格式編碼）。"""
+    if not props:
+        return {}
+    return {str(k): v for k, v in props.items() if v is not None}
+
+
+def _json(v: Any) -> str:
+    # Neo4j 的日期時間等型態以 str() 保存
+    return json.dumps(v, ensure_ascii=False, default=str)
+
+
+def _map_value(v: Any) -> Any:
+    """Parquet map 的值：JSON 文字；早期檔案直接存 str()，無法解析時原樣回傳。"""
+    if not isinstance(v, str):
+        return v
+    try:
+        return json.loads(v)
+    except ValueError:
+        return v
+
+
+def decode_props(value: Any) -> Dict[str, Any]:
+    """
+    將 props 欄位值轉為 dict。
+
+    支援：dict、JSON 字串（CSV）、(key, JSON 值) 序列（Parquet map 經 pandas 讀出）、
+    None / NaN / 空字串（回傳空 dict）。
+    """
+    if value is None:
+        return {}
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, float) and math.isnan(value):
+        return {}
+    if isinstance(value, str):
+        return json.loads(value) if value.strip() else {}
+    return {k: _map_value(v) for k, v in value}
+
+
+def read_kg_table(path: Path) -> 'pd.DataFrame':
+    """依副檔名讀取 KG 表格（.parquet 或 .csv）。"""
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path, low_memory=False)
+
+
+def encode_props(props: Dict[str, Any] | None, suffix: str) -> Any:
+    """dict → Parquet map 項目序列（值為 JSON 文字）或 JSON 字串（.csv），與 `read_kg_table` 讀出的型態一致。"""
+    props = clean_props(props)
+    if suffix == '.parquet':
+        return [(k, _json(v)) for k, v in props.items()]
+    return _json(props)
+
+
+def write_kg_table(df: 'pd.DataFrame', path: Path) -> None:
+    """寫入暫存檔後原子替換；props 欄位需已是該格式的值（見 `encode_props`）。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    if path.suffix == '.parquet':
+        df.to_parquet(tmp, schema=KG_SCHEMA, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def resolve_kg_table(csv_path: Path) -> Path:
+    """
+    決定實際使用的 KG 表格。
+
+    1. 環境變數 KG_TABLE_PATH 優先
+    2. 同目錄同名的 .parquet 與 .csv 取修改時間較新者
+    """
+    if env_val := os.getenv('KG_TABLE_PATH'):
+        return Path(env_val)
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    candidates = [p for p in (parquet_path, csv_path) if p.is_file()]
+    if not candidates:
+        return csv_path
+    return max(candidates, key=lambda p: p.stat().st_mtime)
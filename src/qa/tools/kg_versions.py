@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 快照版本目錄（發佈端）
+
+ETL 在原位覆寫 kg-triplet.emb.npy / KG 表格 / kg-lines，服務端讀到一半的檔案可能不一致。
+發佈時改為把三者放進不可變的版本目錄，最後才原子替換 CURRENT 指標：
+
+    snapshots/
+      CURRENT                      ← 目前版本名稱（單行文字）
+      v20250701-120000-000001/
+        manifest.json              ← 版本、列數、建立時間、來源檔案
+        kg-triplet.emb.npy
+        neo4j-kg-raw-graph.parquet | .csv
+        kg-lines/
+
+檔案優先以 hard link 放入（同一檔案系統時不複製）；保留最近 `keep` 個版本。
+向量、表格與敘述庫的列數不一致時拒絕發佈（CURRENT 不變），避免切換到無法載入的版本。
+hard link 與來源共用 inode，因此寫出向量 / 表格 / 敘述庫的程式一律以暫存檔 + os.replace 替換
+（kg_table.write_kg_table、kg_embed、kg_lines.build_line_store…），原位覆寫會改到已發佈的版本。
+
+提供：
+  - `publish_version`  : 建立新版本並切換 CURRENT，回傳版本名稱
+  - `current_version`  : 讀取 CURRENT（不存在時回傳 None）
+  - `version_paths`    : 版本目錄內的 (emb, table, lines) 路徑
+  - `prune_versions`   : 刪除 CURRENT 以外、超出保留數的舊版本
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+__all__ = ['VersionPaths', 'publish_version', 'current_version', 'version_paths', 'prune_versions']
+
+CURRENT = 'CURRENT'
+MANIFEST = 'manifest.json'
+EMB_NAME = 'kg-triplet.emb.npy'
+LINES_NAME = 'kg-lines'
+KEEP = 3
+
+
+@dataclass(frozen=True)
+class VersionPaths:
+    version: str
+    root: Path
+    emb: Path
+    table: Path
+    lines: Path
+    manifest: Dict[str, Any]
+
+
+def _place(src: Path, dst: Path) -> None:
+    """
+    hard link（不可跨檔案系統時複製並保留 mtime，敘述庫的來源檢查依賴 mtime）。
+    來源檔之後須以 os.replace 更新（見模組說明），否則版本內容會一起被改掉。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _row_counts(emb_path: Path, table_path: Path, lines_dir: Path) -> Dict[str, int]:
+    """向量 / 表格 / 敘述庫各自的列數（只讀 header 或單一欄位）。"""
+    import numpy as np
+    import pandas as pd
+
+    counts = {'emb': len(np.load(emb_path, mmap_mode='r'))}
+    if table_path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        counts['table'] = pq.read_metadata(table_path).num_rows
+    else:
+        counts['table'] = len(pd.read_csv(table_path, usecols=['head'], low_memory=False))
+    meta = lines_dir / 'meta.json'
+    if meta.is_file():
+        counts['lines'] = int(json.loads(meta.read_text(encoding='utf-8'))['rows'])
+    return counts
+
+
+def current_version(root: Path) -> Optional[str]:
+    path = Path(root) / CURRENT
+    if not path.is_file():
+        return None
+    return path.read_text(encoding='utf-8').strip() or None
+
+
+def version_paths(root: Path, version: str) -> VersionPaths:
+    vdir = Path(root) / version
+    manifest = json.loads((vdir / MANIFEST).read_text(encoding='utf-8'))
+    return VersionPaths(version=version, root=vdir, emb=vdir / EMB_NAME, table=vdir / manifest['table'],
+                        lines=vdir / LINES_NAME, manifest=manifest)
+
+
+def _new_version_name(root: Path) -> str:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    seq = 1 + max((int(p.name.rsplit('-', 1)[1]) for p in root.glob('v*-*-*') if p.is_dir()
+                   and p.name.rsplit('-', 1)[1].isdigit()), default=0)
+    return f'v{stamp}-{seq:06d}'
+
+
+def publish_version(root: Path, emb_path: Path, table_path: Path, lines_dir: Path,
+                    meta: Optional[Dict[str, Any]] = None, keep: int = KEEP) -> str:
+    """
+    把目前的向量 / 表格 / 敘述庫固定成新版本並切換 CURRENT。
+
+    版本目錄先以 .tmp 名稱建好再 rename，CURRENT 以暫存檔 + os.replace 更新，
+    讀取端任何時刻都只會看到完整的版本。列數不一致時拋出 ValueError，不建立版本。
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    version = _new_version_name(root)
+    staging = root / f'.{version}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    (staging / LINES_NAME).mkdir(parents=True)
+
+    table_path = Path(table_path)
+    _place(Path(emb_path), staging / EMB_NAME)
+    _place(table_path, staging / table_path.name)
+    for f in Path(lines_dir).iterdir():
+        if f.is_file() and not f.name.endswith('.tmp'):
+            _place(f, staging / LINES_NAME / f.name)
+
+    counts = _row_counts(staging / EMB_NAME, staging / table_path.name, staging / LINES_NAME)
+    if len(set(counts.values())) > 1:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise ValueError(f'快照列數不一致，拒絕發佈：{counts}')
+
+    manifest = {'version': version, 'created': time.time(), 'table': table_path.name, **(meta or {})}
+    (staging / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(staging, root / version)
+
+    tmp = root / f'{CURRENT}.tmp'
+    tmp.write_text(version + '\n', encoding='utf-8')
+    os.replace(tmp, root / CURRENT)
+
+    prune_versions(root, keep)
+    return version
+
+
+def prune_versions(root: Path, keep: int = KEEP) -> List[str]:
+    """保留最新 keep 個版本（CURRENT 一定保留），回傳刪除的版本名稱。"""
+    root = Path(root)
+    current = current_version(root)
+    versions = sorted((p.name for p in root.glob('v*') if p.is_dir()), reverse=True)
+    removed = [v for v in versions[keep:] if v != current]
+    for v in removed:
+        shutil.rmtree(root / v, ignore_errors=True)
+    return removed
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CKIP SBERT 的 ONNX Runtime 推論後端（CPU 最佳化）
+
+把 BERT + pooling 匯出為單一 ONNX 圖（可選 dynamic int8 量化），
+以 onnxruntime 執行，輸出向量與 PyTorch `SentenceTransformer` 可互換：
+  - `export_onnx`      : 由模型快照匯出 model.onnx（與 model.int8.onnx）
+  - `OnnxEmbedder`     : 介面同 `SentenceTransformer.encode` 的推論器
+  - `check_agreement`  : 與 PyTorch 版本逐句比較 cosine，驗證可互換
+
+由 `qa.tools.embedder.get_embedder(..., backend='onnx' | 'onnx-int8')`
+（環境變數 EMBED_BACKEND）選用；找不到 ONNX 檔時會先自動匯出一次。
+intra-op 執行緒數預設為 CPU 數，可用 EMBED_THREADS 覆寫（Cloud Run 建議設為 vCPU 數）。
+
+選用依賴：onnxruntime（推論）、onnx（int8 量化）；匯出另需 torch / transformers。
+
+執行方式：
+  python -m src.qa.tools.onnx_embedder --model models/CKIP/models--ckiplab--bert-base-chinese --quantize --check
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+__all__ = ['OnnxEmbedder', 'export_onnx', 'check_agreement', 'onnx_path']
+
+FP32_NAME = 'model.onnx'
+INT8_NAME = 'model.int8.onnx'
+
+
+def onnx_path(onnx_dir: Path, quantized: bool = False) -> Path:
+    return Path(onnx_dir) / (INT8_NAME if quantized else FP32_NAME)
+
+
+def _pooling_mode(snapshot: Path) -> str:
+    """讀取 sentence-transformers 的 pooling 設定；純 HF 模型與 SentenceTransformer 預設相同，取 mean。"""
+    cfg = snapshot / '1_Pooling' / 'config.json'
+    if cfg.is_file():
+        conf = json.loads(cfg.read_text(encoding='utf-8'))
+        if conf.get('pooling_mode_cls_token'):
+            return 'cls'
+        if conf.get('pooling_mode_max_tokens'):
+            return 'max'
+    return 'mean'
+
+
+def _max_seq_length(snapshot: Path, tokenizer) -> int:
+    cfg = snapshot / 'sentence_bert_config.json'
+    if cfg.is_file():
+        length = json.loads(cfg.read_text(encoding='utf-8')).get('max_seq_length')
+        if length:
+            return int(length)
+    return min(int(getattr(tokenizer, 'model_max_length', 512) or 512), 512)
+
+
+def export_onnx(snapshot: Path, onnx_dir: Path, quantize: bool = False, opset: int = 17) -> Path:
+    """
+    匯出 BERT + pooling 為 ONNX（輸入 input_ids / attention_mask / token_type_ids，
+    輸出 sentence_embedding），並複製 tokenizer；quantize=True 時另產生 int8 版本。
+    回傳本次要使用的 ONNX 檔路徑。
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    snapshot, onnx_dir = Path(snapshot), Path(onnx_dir)
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(str(snapshot))
+    model = AutoModel.from_pretrained(str(snapshot)).eval()
+    mode = _pooling_mode(snapshot)
+
+    class _Pooled(torch.nn.Module):
+        def __init__(self, bert):
+            super().__init__()
+            self.bert = bert
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            tokens = self.bert(input_ids=input_ids, attention_mask=attention_mask,
+                               token_type_ids=token_type_ids).last_hidden_state
+            if mode == 'cls':
+                return tokens[:, 0]
+            mask = attention_mask.unsqueeze(-1).to(tokens.dtype)
+            if mode == 'max':
+                return tokens.masked_fill(mask == 0, -1e9).max(dim=1).values
+            return (tokens * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+
+    sample = tokenizer(['匯出範例'], return_tensors='pt')
+    fp32 = onnx_path(onnx_dir)
+    axes = {0: 'batch', 1: 'seq'}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Pooled(model),
+            (sample['input_ids'], sample['attention_mask'], sample['token_type_ids']),
+            str(fp32),
+            input_names=['input_ids', 'attention_mask', 'token_type_ids'],
+            output_names=['sentence_embedding'],
+            dynamic_axes={'input_ids': axes, 'attention_mask': axes, 'token_type_ids': axes,
+                          'sentence_embedding': {0: 'batch'}},
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(str(onnx_dir))
+    meta = {'source': str(snapshot), 'pooling': mode, 'max_seq_length': _max_seq_length(snapshot, tokenizer)}
+    (onnx_dir / 'export.json').write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f'📦 ONNX 匯出完成：{fp32}（pooling={mode}）')
+
+    if not quantize:
+        return fp32
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8 = onnx_path(onnx_dir, quantized=True)
+    quantize_dynamic(str(fp32), str(int8), weight_type=QuantType.QInt8)
+    print(f'📦 int8 量化完成：{int8}')
+    return int8
+
+
+class OnnxEmbedder:
+    """onnxruntime 版 CKIP SBERT，`encode` 參數與回傳與 SentenceTransformer 相容（numpy）。"""
+
+    def __init__(self, onnx_dir: Path, quantized: bool = False, threads: int | None = None) -> None:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        onnx_dir = Path(onnx_dir)
+        meta = json.loads((onnx_dir / 'export.json').read_text(encoding='utf-8'))
+        self.tokenizer = AutoTokenizer.from_pretrained(str(onnx_dir))
+        self.max_seq_length: int = int(meta.get('max_seq_length', 512))
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads or int(os.getenv('EMBED_THREADS', '0')) or (os.cpu_count() or 1)
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session: ort.InferenceSession = ort.InferenceSession(
+            str(onnx_path(onnx_dir, quantized)), sess_options=opts, providers=['CPUExecutionProvider'])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, batch: Sequence[str]) -> np.ndarray:
+        enc = self.tokenizer(list(batch), padding=True, truncation=True,
+                             max_length=self.max_seq_length, return_tensors='np')
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+        return self.session.run(['sentence_embedding'], feeds)[0]
+
+    def encode(self, sentences: str | Sequence[str], batch_size: int = 32,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False,
+               normalize_embeddings: bool = False, **_: object) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # 依長度排序後分批，減少 padding（與 SentenceTransformer.encode 相同做法）
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        out: np.ndarray | None = None
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            embs = self._run([texts[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), embs.shape[1]), dtype=np.float32)
+            out[idx] = embs
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out[0] if single else out
+
+
+def check_agreement(reference, candidate, texts: Sequence[str]) -> Dict[str, float]:
+    """兩個 embedder 對同一批文字的逐句 cosine（min / mean）與各自耗時。"""
+    t0 = time.perf_counter()
+    a = reference.encode(list(texts), convert_to_numpy=True, show_progress_bar=False)
+    t1 = time.perf_counter()
+    b = candidate.encode(list(texts), convert_to_numpy=True, show_progress_bar=False)
+    t2 = time.perf_counter()
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cos = np.sum(a * b, axis=1)
+    return {'min_cos': float(cos.min()), 'mean_cos': float(cos.mean()),
+            'reference_s': t1 - t0, 'candidate_s': t2 - t1}
+
+
+_CHECK_TEXTS = [
+    '台積電 宣布 擴大投資',
+    '行政院長 出席 記者會',
+    '颱風 造成 中南部豪雨',
+    '央行 調升 政策利率半碼',
+    '衛福部 公布 最新疫苗接種統計',
+    '立法院 三讀通過 勞基法修正案',
+    '台北市政府 舉辦 跨年晚會',
+    '中華隊 贏得 世界棒球經典賽',
+]
+
+
+def main() -> None:
+    import argparse
+    import sys
+
+    from .embedder import resolve_snapshot
+
+    parser = argparse.ArgumentParser(description='Export CKIP SBERT to ONNX and check agreement')
+    parser.add_argument('--model', default='models/CKIP/models--ckiplab--bert-base-chinese')
+    parser.add_argument('--out', default=None, help='ONNX 輸出目錄，預設為 <model>/onnx')
+    parser.add_argument('--quantize', action='store_true', help='另產生 dynamic int8 版本')
+    parser.add_argument('--check', action='store_true', help='與 PyTorch 版本比較 cosine')
+    parser.add_argument('--min-cos', type=float, default=0.99, help='--check 的最低逐句 cosine')
+    args = parser.parse_args()
+
+    snapshot = resolve_snapshot(Path(args.model))
+    out = Path(args.out) if args.out else Path(args.model) / 'onnx'
+    export_onnx(snapshot, out, quantize=args.quantize)
+    if not args.check:
+        return
+
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(str(snapshot), device='cpu', trust_remote_code=True)
+    texts = _CHECK_TEXTS * 4
+    failed = False
+    for quantized in ((False, True) if args.quantize else (False,)):
+        res = check_agreement(reference, OnnxEmbedder(out, quantized=quantized), texts)
+        # int8 量化本身會有誤差，門檻放寬
+        threshold = args.min_cos - (0.02 if quantized else 0.0)
+        ok = res['min_cos'] >= threshold
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {'int8' if quantized else 'fp32'}: "
+              f"min_cos={res['min_cos']:.5f} mean_cos={res['mean_cos']:.5f} "
+              f"torch={res['reference_s'] * 1e3:.0f}ms onnx={res['candidate_s'] * 1e3:.0f}ms")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
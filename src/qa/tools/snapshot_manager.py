@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KG 快照熱更新（服務端）
+
+KG 快照原本以 lru_cache 在第一次檢索時載入、之後永不更新，換上新匯出的 KG 必須重啟所有行程。
+`SnapshotManager` 監看快照版本目錄（`kg_versions`）的 CURRENT 指標：
+
+  - 發現新版本時於背景執行緒載入（含實體索引），完成後以單一參考替換（原子），
+    載入期間與載入失敗時都繼續服務舊版本
+  - 請求以 `pin()` 固定版本：同一請求內的多次 `get()`（含複製 context 的背景執行緒）
+    都拿到同一份快照，進行中的請求在舊版本上完成
+  - 管理器不保留舊版本的參考；最後一個持有它的請求結束後，向量與敘述庫的 mmap 即釋放
+    （`status()["retired_alive"]` 可確認）
+  - 沒有 CURRENT 時退回原本的固定路徑（版本名稱為 None）；ETL orchestrator 與手動建置腳本
+    （embed_kg_incremental / embed_kg_data_csv）完成後都會發佈新版本
+  - 分片檢索（KG_SHARDS > 1）只在有呼叫端會用到時啟用（`get_manager(..., sharded=True)`）：
+    answerer 一律使用；verifier 只有 KG_FILTER_MODE=postfilter 會全表掃描，prefilter / hybrid
+    只對候選列計算相似度，不需要 norm 檔與 worker 行程
+
+提供：
+  - `SnapshotManager` : get / pin / refresh / watch / status
+  - `get_manager`     : 依路徑共用同一個管理器（verifier / answerer 在同一行程內共用一份快照）
+  - `managers`        : 目前所有管理器（/api/ready 回報版本）
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from .kg_versions import current_version, version_paths
+
+if TYPE_CHECKING:
+    from .kg_snapshot import KGSnapshot
+
+__all__ = ['SnapshotManager', 'get_manager', 'managers']
+
+RELOAD_SECONDS: float = float(os.getenv('KG_RELOAD_SECONDS', '10'))
+
+_REGISTRY: Dict[Tuple[str, ...], 'SnapshotManager'] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class SnapshotManager:
+    """
+    Args:
+        emb_path / csv_path / lines_dir: 沒有快照版本時使用的固定路徑
+        snapshots_dir: 快照版本目錄（含 CURRENT）
+        sharded: 載入時依 KG_SHARDS 建立 norm 檔與分片 worker；False 時一律單行程檢索
+    """
+
+    def __init__(self, emb_path: Path, csv_path: Path, lines_dir: Optional[Path], snapshots_dir: Path,
+                 sharded: bool = False) -> None:
+        self.emb_path = Path(emb_path)
+        self.csv_path = Path(csv_path)
+        self.lines_dir = Path(lines_dir) if lines_dir else None
+        self.snapshots_dir = Path(snapshots_dir)
+        self.sharded = sharded
+        self._active: Optional[KGSnapshot] = None
+        self._pinned: contextvars.ContextVar[Optional[KGSnapshot]] = contextvars.ContextVar(
+            f'kg_pinned_{id(self)}', default=None)
+        self._load_lock = threading.Lock()  # 同一時間只載入一個版本
+        self._retired: List[weakref.ref] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.loaded_at: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    # ── 載入 ──
+    def _load(self, version: Optional[str]) -> KGSnapshot:
+        from .kg_shards import SHARDS  # numpy / 索引模組延後載入：/api/ready 只需 managers()
+        from .kg_snapshot import load_snapshot
+
+        t0 = time.perf_counter()
+        shards = SHARDS if self.sharded else 1
+        if version is None:
+            snap = load_snapshot(self.emb_path, self.csv_path, self.lines_dir, shards=shards)
+        else:
+            vp = version_paths(self.snapshots_dir, version)
+            snap = load_snapshot(vp.emb, vp.table, vp.lines, table_path=vp.table, version=version, shards=shards)
+        _ = snap.index  # 實體索引與分片 worker 也在背景建好，換上後第一個請求不需等待
+        _ = snap.searcher
+        self.load_seconds = time.perf_counter() - t0
+        return snap
+
+    def _swap(self, snap: KGSnapshot) -> None:
+        old, self._active = self._active, snap  # 單一參考指派：讀取端看到舊或新，不會看到半套
+        self.loaded_at = time.time()
+        if old is not None:
+            self.reloads += 1
+            self._retired = [r for r in self._retired if r() is not None] + [weakref.ref(old)]
+            print(f'🔄 KG 快照切換：{old.version} → {snap.version}')
+
+    def current(self) -> KGSnapshot:
+        """目前版本；第一次呼叫時同步載入。"""
+        snap = self._active
+        if snap is not None:
+            return snap
+        with self._load_lock:
+            if self._active is None:
+                self._swap(self._load(current_version(self.snapshots_dir)))
+            return self._active
+
+    def get(self) -> KGSnapshot:
+        """請求內固定的版本（見 `pin`），否則為目前版本。"""
+        return self._pinned.get() or self.current()
+
+    @contextmanager
+    def pin(self) -> Iterator[KGSnapshot]:
+        """在此 context 內（含以 copy_context 延伸的執行緒）固定使用同一版本。"""
+        outer = self._pinned.get()
+        if outer is not None:
+            yield outer
+            return
+        token = self._pinned.set(self.current())
+        try:
+            yield self._pinned.get()
+        finally:
+            self._pinned.reset(token)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._active.version if self._active is not None else None
+
+    # ── 更新 ──
+    def refresh(self) -> bool:
+        """CURRENT 指向不同版本時載入並切換；回傳是否切換。已有載入進行中時直接回傳 False。"""
+        target = current_version(self.snapshots_dir)
+        if target is None or (self._active is not None and target == self._active.version):
+            return False
+        if not self._load_lock.acquire(blocking=False):
+            return False
+        try:
+            if self._active is not None and target == self._active.version:
+                return False
+            snap = self._load(target)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.last_error = f'{target}: {type(exc).__name__}: {exc}'
+            print(f'⚠️ KG 快照 {target} 載入失敗，繼續使用 {self.version}：{exc}')
+            return False
+        else:
+            self.last_error = None
+            self._swap(snap)
+            return True
+        finally:
+            self._load_lock.release()
+
+    def watch(self, interval: float = RELOAD_SECONDS) -> None:
+        """背景執行緒每 interval 秒檢查一次 CURRENT（只讀一個小檔案）；重複呼叫無作用。"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.last_error = f'{type(exc).__name__}: {exc}'
+
+        self._watcher = threading.Thread(target=loop, name='kg-snapshot-watch', daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def status(self) -> Dict[str, Any]:
+        snap = self._active
+        return {
+            'loaded': snap is not None,
+            'version': snap.version if snap is not None else None,
+            'rows': len(snap) if snap is not None else 0,
+            'loaded_at': self.loaded_at,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'reloads': self.reloads,
+            'latest': current_version(self.snapshots_dir),
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+            'retired_alive': sum(1 for r in self._retired if r() is not None),
+            'error': self.last_error,
+        }
+
+
+def get_manager(emb_path: Path, csv_path: Path, lines_dir: Optional[Path], snapshots_dir: Path,
+                sharded: bool = False) -> SnapshotManager:
+    """
+    相同路徑回傳同一個管理器。任一呼叫端要求 sharded 即啟用分片；
+    已載入的快照不重建，下一個版本起才有分片 worker（該快照的 searcher 為 None，退回單行程）。
+    """
+    key = tuple(str(Path(p).resolve()) if p else '' for p in (emb_path, csv_path, lines_dir, snapshots_dir))
+    with _REGISTRY_LOCK:
+        if key not in _REGISTRY:
+            _REGISTRY[key] = SnapshotManager(emb_path, csv_path, lines_dir, snapshots_dir, sharded=sharded)
+        manager = _REGISTRY[key]
+        manager.sharded = manager.sharded or sharded
+        return manager
+
+
+def managers() -> List[SnapshotManager]:
+    with _REGISTRY_LOCK:
+        return list(_REGISTRY.values())
@@ -6,10 +6,23 @@
 """
 集中管理超參數與正則表達式
 """
+import os
 import re
 
 SIM_TH: float = 0.8
 TOP_K: int = 100
 LLM_ROUNDS: int = 3
 DUP_TH: float = 0.8
+# KG 檢索來源：snapshot（CSV/npy 快照）或 graph（Neo4j 鄰域）
+KG_BACKEND: str = os.getenv('KG_BACKEND', 'snapshot')
+GRAPH_HOPS: int = int(os.getenv('KG_GRAPH_HOPS', '2'))
+# 實體過濾方式：prefilter（只對共享實體的列算相似度）、postfilter（全量 top-K 後過濾）
+# 或 hybrid（共享實體的列 + 字元 n-gram BM25 候選，涵蓋近似名稱，再以向量重排）；
+# 只有 postfilter 會全表掃描，KG_SHARDS > 1 的分片 worker 也只在此模式建立
+KG_FILTER_MODE: str = os.getenv('KG_FILTER_MODE', 'prefilter')
+LEXICAL_CANDIDATES: int = int(os.getenv('KG_LEXICAL_CANDIDATES', '2000'))  # hybrid 每個三元組的 BM25 候選數
+# 嵌入推論後端：torch（SentenceTransformer）、onnx 或 onnx-int8（onnxruntime，CPU 較快）
+EMBED_BACKEND: str = os.getenv('EMBED_BACKEND', 'torch')
+# 判斷請求 user 訊息（新聞 + KG 敘述）的 token 上限；<= 0 表示不裁切
+JUDGE_TOKEN_BUDGET: int = int(os.getenv('JUDGE_TOKEN_BUDGET', '6000'))
 ENTITY_RE = re.compile('^\\d+\\.\\s*(.+?)\\s*透過關係')
@@ -9,13 +9,14 @@
 from typing import List
 
 import numpy as np
-from sentence_transformers import util
 
 from .config import DUP_TH, ENTITY_RE
 from .embeddings import embed_text
 
 
 def deduplicate(lines: List[str]) -> List[str]:
+    from sentence_transformers import util
+
     groups = {}
     kept = []
     for line in lines:
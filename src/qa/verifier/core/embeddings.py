@@ -4,33 +4,25 @@
 # Source timestamp: 2025-07-04 07:57:48 UTC (1751615868)
 
 """
-CKIP SBERT 載入與文字向量化
+CKIP SBERT 文字向量化（模型由 qa.tools.embedder 註冊表載入並共用，第一次嵌入時才 import torch）
 """
-from functools import lru_cache
-from pathlib import Path
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
 
+from .config import EMBED_BACKEND
 from .paths import CKIP_ROOT
+from ...tools import embedder as registry
 
-
-def _resolve_snapshot(root: Path) -> Path:
-    if (root / 'config.json').is_file():
-        return root
-    for sub in (root / 'snapshots').iterdir():
-        if (sub / 'config.json').is_file():
-            return sub
-    else:
-        raise FileNotFoundError('CKIP Sentence-BERT snapshot not found')
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
-@lru_cache(maxsize=1)
 def get_embedder() -> SentenceTransformer:
-    model_path = _resolve_snapshot(CKIP_ROOT)
-    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    return SentenceTransformer(str(model_path), device=device, trust_remote_code=True)
+    """CKIP SBERT（經由共用註冊表，web 服務與 answerer 共用同一份權重）。"""
+    return registry.get_embedder(CKIP_ROOT, backend=EMBED_BACKEND)
 
 
 def embed_text(text: str) -> np.ndarray:
@@ -38,5 +30,10 @@ def embed_text(text: str) -> np.ndarray:
     return emb / np.linalg.norm(emb)
 
 
+def embed_texts(texts: list[str]) -> np.ndarray:
+    embs = get_embedder().encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    return embs / np.linalg.norm(embs, axis=1, keepdims=True)
+
+
 def embed_triple(tp: dict[str, str]) -> np.ndarray:
     return embed_text(f"{tp['head']} {tp['relation']} {tp['tail']}")
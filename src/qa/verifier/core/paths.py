@@ -53,6 +53,9 @@ PROJECT_ROOT: Path = _find_repo_root()
 CKIP_ROOT: Path = PROJECT_ROOT / 'models' / 'CKIP' / 'models--ckiplab--bert-base-chinese'
 KG_EMB_PATH: Path = PROJECT_ROOT / 'data' / 'processed' / 'knowledge-graph' / 'kg-triplet.emb.npy'
 KG_CSV_PATH: Path = PROJECT_ROOT / 'data' / 'raw' / 'knowledge-graph' / 'neo4j-kg-raw-graph.csv'
+KG_STORE_DIR: Path = PROJECT_ROOT / 'data' / 'processed' / 'knowledge-graph' / 'emb-store'
+KG_LINES_DIR: Path = PROJECT_ROOT / 'data' / 'processed' / 'knowledge-graph' / 'kg-lines'
+KG_SNAPSHOTS_DIR: Path = PROJECT_ROOT / 'data' / 'processed' / 'knowledge-graph' / 'snapshots'
 
 # 中介資料與結果目錄
 USER_INPUT_DIR: Path = PROJECT_ROOT / 'data' / 'interim' / 'verifier' / 'user-input'
@@ -68,8 +71,6 @@ JUDGE_PROMPT_PATH: Path = PROMPTS_DIR / 'judger-character.txt'
 OPENAI_API_KEY: str | None = os.getenv('GPT_API')
 MODEL_ID: str | None = os.getenv('GPT_MODEL')
 
-if not OPENAI_API_KEY:
-    raise RuntimeError('未設定環境變數 GPT_API (OPENAI_API_KEY)')
-
+# GPT_API 的檢查延後到建立 OpenAI client 時（llm/client.get_client）
 if not MODEL_ID:
     MODEL_ID = 'gpt-4o'  # 預設模型
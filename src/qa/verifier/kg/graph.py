@@ -0,0 +1,22 @@
+"""
+Neo4j 鄰域檢索 backend（KG_BACKEND=graph）
+"""
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..core.config import GRAPH_HOPS, SIM_TH, TOP_K
+from ..core.embeddings import embed_texts
+from ..core.paths import KG_STORE_DIR
+from ...tools.graph_retrieval import GraphRetriever, ensure_entity_index
+
+
+@lru_cache(maxsize=1)
+def get_retriever() -> GraphRetriever:
+    ensure_entity_index()  # 錨點查找走 index seek；建立失敗時不快取，下次呼叫重試
+    return GraphRetriever(KG_STORE_DIR, encode_fn=embed_texts, hops=GRAPH_HOPS)
+
+
+def graph_search(tp: dict, q_vec: np.ndarray) -> List[Tuple[dict, Dict[str, dict]]]:
+    return get_retriever().search(tp, q_vec, top_k=TOP_K, sim_th=SIM_TH)
@@ -4,16 +4,44 @@
 # Source timestamp: 2025-07-04 08:01:40 UTC (1751616100)
 
 """
-KG DataFrame / 向量載入
+KG DataFrame / 向量載入（延遲至第一次檢索或 warm-up）
+
+快照由 `SnapshotManager` 持有：processed 目錄發佈新版本時於背景載入並切換，
+單一請求以 `pin_kg()` 固定版本，進行中的請求不受切換影響。
+KG_SHARDS 的分片 worker 只在 KG_FILTER_MODE=postfilter 時建立：prefilter / hybrid 只對
+實體索引（與 n-gram）候選列計算相似度，不會走到 `kg.searcher`。
 """
-import numpy as np
-import pandas as pd
+from contextlib import contextmanager
+from typing import Iterator
+
+from ..core.config import KG_FILTER_MODE
+from ..core.paths import KG_EMB_PATH, KG_CSV_PATH, KG_LINES_DIR, KG_SNAPSHOTS_DIR
+from ...tools.kg_snapshot import KGSnapshot
+from ...tools.snapshot_manager import SnapshotManager, get_manager
+
+
+def kg_manager() -> SnapshotManager:
+    return get_manager(KG_EMB_PATH, KG_CSV_PATH, KG_LINES_DIR, KG_SNAPSHOTS_DIR,
+                       sharded=KG_FILTER_MODE == 'postfilter')
+
+
+def get_kg() -> KGSnapshot:
+    """目前請求固定的快照（未固定時為最新版本）。"""
+    return kg_manager().get()
+
+
+@contextmanager
+def pin_kg() -> Iterator[KGSnapshot]:
+    with kg_manager().pin() as snap:
+        yield snap
+
+
+# 相容舊的模組層級名稱（首次存取時才載入）
+_COMPAT = {'KG_DF': 'df', 'KG_VECS_NORM': 'vecs_norm', 'KG_INDEX': 'index', 'KG_LINES': 'lines',
+           'HP_COL': 'hp_col', 'RP_COL': 'rp_col', 'TP_COL': 'tp_col'}
 
-from ..core.paths import KG_EMB_PATH, KG_CSV_PATH
 
-KG_VECS = np.load(KG_EMB_PATH)
-KG_VECS_NORM = KG_VECS / np.linalg.norm(KG_VECS, axis=1, keepdims=True)
-KG_DF = pd.read_csv(KG_CSV_PATH)
-HP_COL = next((c for c in ['head_props'] if c in KG_DF.columns), None)
-RP_COL = next((c for c in ['rel_props'] if c in KG_DF.columns), None)
-TP_COL = next((c for c in ['tail_props'] if c in KG_DF.columns), None)
+def __getattr__(name: str):
+    if name in _COMPAT:
+        return getattr(get_kg(), _COMPAT[name])
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
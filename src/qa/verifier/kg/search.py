@@ -4,27 +4,61 @@
 # Source timestamp: 2025-07-04 08:02:18 UTC (1751616138)
 
 """
-cosine_search 與 row → detail 
+cosine_search、row → detail 與 row → 敘述句
 """
-import json
 from typing import List, Dict, Tuple
 
 import numpy as np
 
-from .loader import KG_DF, KG_VECS_NORM, HP_COL, RP_COL, TP_COL
-from ..core.config import SIM_TH, TOP_K
+from .loader import get_kg
+from ..core.config import KG_FILTER_MODE, LEXICAL_CANDIDATES, SIM_TH, TOP_K
+from ...tools import kg_nl as knl
+from ...tools.kg_table import decode_props
 
 
 def cosine_search(tp: dict, q_vec: np.ndarray) -> List[int]:
-    sims = KG_VECS_NORM @ q_vec
-    idx = sims.argsort()[-TOP_K:][::-1]
-    idx = idx[sims[idx] >= SIM_TH]
-    return [i for i in idx if KG_DF.at[i, 'head'] == tp['head'] or KG_DF.at[i, 'tail'] == tp['tail']]
+    kg = get_kg()
+    if KG_FILTER_MODE in ('prefilter', 'hybrid'):
+        # 只對 head 或 tail 相同的列計算相似度；hybrid 另加 n-gram BM25 候選（近似名稱、evidence 提及）
+        rows = kg.index.candidates(tp.get('head'), tp.get('tail'))
+        if KG_FILTER_MODE == 'hybrid' and kg.lexical is not None:
+            lexical, _ = kg.lexical.search([tp.get('head'), tp.get('tail')], LEXICAL_CANDIDATES)
+            rows = np.union1d(rows, lexical)
+        if not len(rows):
+            return []
+        sims = kg.vecs_norm[rows] @ q_vec
+        order = sims.argsort()[-TOP_K:][::-1]
+        order = order[sims[order] >= SIM_TH]
+        return rows[order].tolist()
+
+    if kg.searcher is not None:  # KG_SHARDS > 1：各分片 worker 掃描後以 heap 合併
+        idx, _ = kg.searcher.topk(q_vec, TOP_K, SIM_TH)
+    else:
+        sims = kg.vecs_norm @ q_vec
+        idx = sims.argsort()[-TOP_K:][::-1]
+        idx = idx[sims[idx] >= SIM_TH]
+    return idx[kg.index.matches(idx, tp.get('head'), tp.get('tail'))].tolist()
 
 
 def kg_row_to_detail(idx: int) -> Tuple[dict, Dict[str, dict]]:
-    row = KG_DF.iloc[idx]
+    kg = get_kg()
+    if kg.lines is not None:
+        return kg.lines.detail(idx)
+    row = kg.df.iloc[idx]
     tri = {'head': row['head'], 'relation': row['relation'], 'tail': row['tail']}
-    det = {'head': json.loads(row[HP_COL]) if HP_COL else {}, 'rel': json.loads(row[RP_COL]) if RP_COL else {},
-           'tail': json.loads(row[TP_COL]) if TP_COL else {}}
+    det = {'head': decode_props(row[kg.hp_col]) if kg.hp_col else {},
+           'rel': decode_props(row[kg.rp_col]) if kg.rp_col else {},
+           'tail': decode_props(row[kg.tp_col]) if kg.tp_col else {}}
     return (tri, det)
+
+
+def kg_row_lines(rows: List[int]) -> List[str]:
+    """命中列 → 編號 1 的敘述句；有預先計算的敘述庫時直接取用。"""
+    lines_store = get_kg().lines
+    if lines_store is not None:
+        return [knl.number_line(1, body) for body in lines_store.lines(rows)]
+    lines = []
+    for idx in rows:
+        tri, det = kg_row_to_detail(idx)
+        lines.extend(knl.build_block([tri], {tuple(tri.values()): det}).splitlines())
+    return lines
@@ -4,15 +4,17 @@
 # Source timestamp: 2025-07-04 08:02:25 UTC (1751616145)
 
 """
-OpenAI 初始化與共用 kwargs
+各階段 LLM 與共用 kwargs（後端路由見 src.common.llm_backends，連線池、限流與重試見 src.common.llm_client）
 """
 from typing import Dict, Any
 
-from openai import OpenAI
-
 from ..core.paths import OPENAI_API_KEY, MODEL_ID
+from ....common.llm_backends import StageLLM, for_stage
+
+
+def get_client(stage: str = 'judge') -> StageLLM:
+    """stage 為 extract 或 judge；openai 後端缺少 GPT_API 時拋出 RuntimeError。"""
+    return for_stage(stage, OPENAI_API_KEY)
+
 
-if not OPENAI_API_KEY:
-    raise RuntimeError('環境變數 GPT_API 尚未設定')
-client = OpenAI(api_key=OPENAI_API_KEY)
 GPT_KWARGS: Dict[str, Any] = {'model': MODEL_ID, 'temperature': 0.4, 'top_p': 0.9, 'max_tokens': 4096, 'timeout': 30}
@@ -6,34 +6,39 @@
 """
 _gpt_extract 包裝
 """
-import time
-from itertools import count
+from functools import lru_cache
+from typing import Callable, Optional
 
-from openai import OpenAIError, APITimeoutError
-
-from .client import client, GPT_KWARGS
+from .client import get_client, GPT_KWARGS
+from ....common.llm_client import LLMError
 from ..core.paths import EXTRACT_PROMPT_PATH
 
-EXTRACTION_PROMPT = EXTRACT_PROMPT_PATH.read_text(encoding='utf-8-sig')
-
-
-def extract_entities_relations(text: str) -> str:
-    backoff = 5
-    for _ in count():
-        try:
-            stream = client.chat.completions.create(stream=True, response_format={'type': 'json_object'},
-                                                    messages=[{'role': 'system', 'content': EXTRACTION_PROMPT},
-                                                              {'role': 'user', 'content': text}], **GPT_KWARGS)
-            chunks = []
-            for ch in stream:
-                delta = ch.choices[0].delta.content
-                if delta:
-                    print(delta, end='', flush=True)
-                    chunks.append(delta)
-            result = ''.join(chunks).strip()
-            return result
-        except (OpenAIError, APITimeoutError) as exc:
-            pass
-        print(f'[WARN] GPT 抽取失敗: {exc} -> {backoff}s retry')
-        time.sleep(backoff)
-        backoff = min(backoff * 2, 60)
+
+def _echo(delta: str) -> None:
+    print(delta, end='', flush=True)
+
+
+@lru_cache(maxsize=1)
+def _extraction_prompt() -> str:
+    return EXTRACT_PROMPT_PATH.read_text(encoding='utf-8-sig')
+
+
+def extract_entities_relations(text: str, on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """
+    串流抽取實體與關係，回傳完整 JSON 文字。
+    on_delta 會收到每段串流 delta（例如 `TripleStream`），於 LLM 背景執行緒呼叫，應保持輕量。
+    """
+    messages = [{'role': 'system', 'content': _extraction_prompt()}, {'role': 'user', 'content': text}]
+
+    def _delta(delta: str) -> None:
+        _echo(delta)
+        if on_delta:
+            on_delta(delta)
+
+    try:
+        return get_client('extract').chat(messages, stream=True, on_delta=_delta,
+                                 response_format={'type': 'json_object'}, **GPT_KWARGS)
+    except LLMError as exc:
+        # 單輪失敗回傳空字串，由呼叫端跳過該輪
+        print(f'[WARN] GPT 抽取失敗: {exc}')
+        return ''
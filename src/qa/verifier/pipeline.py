@@ -6,36 +6,45 @@
 執行方式：
   - 全量：python -m src.qa.verifier.pipeline
   - 單篇：python -m src.qa.verifier.pipeline <news_id.txt>
+  - 追蹤：加上 --trace trace.json 輸出各階段耗時；--profile cprofile|pyinstrument 產生效能分析
 """
 
 from __future__ import annotations
 
 import argparse
+import contextvars
 import gc
-import json
 import re
 import sys
 import time
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 
 import numpy as np
 from tqdm import tqdm
 
-from .core.config import LLM_ROUNDS
+from .core.config import JUDGE_TOKEN_BUDGET, KG_BACKEND, LLM_ROUNDS
 from .core.dedup import deduplicate
-from .core.embeddings import embed_text, embed_triple
+from .core.embeddings import embed_text, embed_texts, embed_triple, get_embedder
 from .core.paths import USER_INPUT_DIR, VEC_DIR, RES_DIR
-from .kg.search import cosine_search, kg_row_to_detail
+from .kg.graph import get_retriever, graph_search
+from .kg.loader import get_kg, pin_kg
+from .kg.search import cosine_search, kg_row_lines
+from .llm.client import get_client
 from .llm.extract import extract_entities_relations
 from .llm.judge import judge_news_kb
 from ..tools import data_utils as du
 from ..tools import kg_nl as knl
+from ..tools.context_builder import build_context, rank_by_similarity, report
+from ..tools.json_stream import TripleStream, parse_json
+from ...common import tracing
 
 
-def _pull_triples(text: str) -> List[du.Triple]:
+def _pull_triples(text: str, on_triple: Optional[Callable[[du.Triple], None]] = None) -> List[du.Triple]:
     """
     多輪 LLM 抽取三元組並去重合併。
-    回傳合併後的三元組列表。
+    串流期間每當一條 relation（及其兩端實體）完整出現就呼叫 on_triple，
+    下游可在模型仍在生成時開始嵌入與檢索；回傳合併後的三元組列表。
     """
     all_rounds: List[List[du.Triple]] = []
     last_error: Exception | None = None
@@ -43,7 +52,9 @@ def _pull_triples(text: str) -> List[du.Triple]:
     for i in range(LLM_ROUNDS):
         print(f'🔸 GPT 抽取 round {i + 1}')
         start = time.time()
-        raw = extract_entities_relations(text)
+        stream = TripleStream(on_triple)
+        with tracing.span(f'extract_round_{i + 1}'):
+            raw = extract_entities_relations(text, on_delta=stream)
         elapsed = time.time() - start
         print(f'  ↳ 完成，用時 {elapsed:.1f}s')
 
@@ -52,9 +63,12 @@ def _pull_triples(text: str) -> List[du.Triple]:
             continue
 
         try:
-            triples = du.json_to_triples(json.loads(raw.replace("`", "")))  # 移除 API 回傳中的所有反引號
+            # 串流已組出的三元組之外，再以整份文件補上（例如 relation 排在 entity 之前的輸出）
+            triples = du.merge_triples(stream.triples, du.json_to_triples(parse_json(raw)) or [])
             all_rounds.append(triples)
         except Exception as e:
+            if stream.triples:
+                all_rounds.append(stream.triples)
             last_error = e
             print(f'[WARN] JSON 解析失敗於 round {i + 1}: {e}')
 
@@ -66,7 +80,77 @@ def _pull_triples(text: str) -> List[du.Triple]:
     return du.merge_triples(*all_rounds)
 
 
-def _process_single(news_id: str, text: str) -> None:
+def _kg_lines(tp: du.Triple, q_vec: np.ndarray) -> List[str]:
+    """依 KG_BACKEND 取得命中敘述句（每條皆以 "1." 編號，輸出前再重編）。"""
+    if KG_BACKEND == 'graph':
+        with tracing.span('search'):
+            hits = graph_search(tp, q_vec)
+        lines: List[str] = []
+        with tracing.span('verbalize'):
+            for tri, det in hits:
+                lines.extend(knl.build_block([tri], {tuple(tri.values()): det}).splitlines())
+        return lines
+    # snapshot 模式才載入 CSV / npy（第一次呼叫時），graph 模式不需要整份快照
+    with tracing.span('load'):
+        get_kg()
+    with tracing.span('search'):
+        rows = cosine_search(tp, q_vec)
+    with tracing.span('verbalize'):
+        return kg_row_lines(rows)
+
+
+class _EarlySearch:
+    """
+    抽取串流中的三元組一出現就排入背景執行緒做嵌入與 KG 檢索（相同三元組只查一次）。
+    submit 於 LLM 背景執行緒呼叫，只負責排程；lines 依呼叫順序取回結果，未排程者當場補查。
+    """
+
+    def __init__(self) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kg-search')
+        self._jobs: Dict[tuple, Future] = {}
+
+    @staticmethod
+    def _search(tp: du.Triple) -> List[str]:
+        with tracing.span('embed'):
+            q_vec = embed_triple(tp)
+        return _kg_lines(tp, q_vec)
+
+    def submit(self, tp: du.Triple) -> None:
+        k = du.key(tp)
+        if k not in self._jobs:
+            # 沿用呼叫端 context，span 才會記到同一個 trace
+            self._jobs[k] = self._pool.submit(contextvars.copy_context().run, self._search, tp)
+
+    def lines(self, tp: du.Triple) -> List[str]:
+        self.submit(tp)
+        return self._jobs[du.key(tp)].result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def warmup() -> None:
+    """預先載入 embedder、KG（依 KG_BACKEND）與各階段 LLM client，避免第一個請求承擔初始化成本。"""
+    get_embedder()
+    if KG_BACKEND == 'graph':
+        get_retriever()
+    else:
+        get_kg()
+    get_client('extract')
+    get_client('judge')
+
+
+def _process_single(news_id: str, text: str, profile: str | None = None) -> None:
+    """以追蹤（與選用的效能分析）包裝單篇新聞處理；snapshot backend 下固定 KG 版本。"""
+    with tracing.profiled(f'verifier-{news_id}', profile), tracing.trace('verifier', news_id):
+        if KG_BACKEND == 'graph':
+            _verify(news_id, text)
+            return
+        with pin_kg():  # 整個請求使用同一版本的 KG 快照（熱更新時不會中途換版）
+            _verify(news_id, text)
+
+
+def _verify(news_id: str, text: str) -> None:
     """
     處理單篇新聞：
       1. 嵌入全文
@@ -83,27 +167,33 @@ def _process_single(news_id: str, text: str) -> None:
 
     # 全文嵌入
     vec_path = VEC_DIR / f'{news_id}.npy'
-    np.save(vec_path, embed_text(text))
-
-    # 三元組抽取
-    triples = _pull_triples(text)
-    if not triples:
-        sys.exit('❌ LLM 未抽取到任何三元組，流程終止')
-
-    # KG 比對
-    raw_lines: List[str] = []
-    for tp in tqdm(triples, desc='🔍 KG 比對'):
-        q_vec = embed_triple(tp)
-        for idx in cosine_search(tp, q_vec):
-            tri, det = kg_row_to_detail(idx)
-            block = knl.build_block([tri], {tuple(tri.values()): det})
-            raw_lines.extend(block.splitlines())
+    with tracing.span('embed'):
+        news_vec = embed_text(text)
+    np.save(vec_path, news_vec)
+
+    # 三元組抽取；串流中已完整的三元組立即開始 KG 比對
+    searcher = _EarlySearch()
+    try:
+        triples = _pull_triples(text, on_triple=searcher.submit)
+        if not triples:
+            sys.exit('❌ LLM 未抽取到任何三元組，流程終止')
+
+        # KG 比對（依合併後順序取回結果）
+        raw_lines: List[str] = []
+        for tp in tqdm(triples, desc='🔍 KG 比對'):
+            raw_lines.extend(searcher.lines(tp))
+    finally:
+        searcher.close()
+    tracing.count('triples', len(triples))
+    tracing.count('kg_hits', len(raw_lines))
 
     if not raw_lines:
         sys.exit('⚠️ 無 KG 命中')
 
     # 去重與重編號
-    kept = deduplicate(raw_lines)
+    with tracing.span('dedup'):
+        kept = deduplicate(raw_lines)
+    tracing.count('kg_lines_kept', len(kept))
     final = [re.sub(r'^\d+\.', f'[{i}]', ln, count=1) for i, ln in enumerate(kept, 1)]
 
     # 組合輸出（不加任何反引號圍欄）
@@ -113,13 +203,20 @@ def _process_single(news_id: str, text: str) -> None:
     # 寫入結果檔案
     kg_file = RES_DIR / f'news_kg_{news_id}'
     judge_file = RES_DIR / f'judge_result_{news_id}'
-    kg_file.write_text(f"{news_block}\n\n{kb_block}", encoding='utf-8')
-
-    # 事實判斷
-    judged_raw = judge_news_kb(f"{news_block}\n\n{kb_block}")
+    with tracing.span('write'):
+        kg_file.write_text(f"{news_block}\n\n{kb_block}", encoding='utf-8')
+
+    # 事實判斷：結果檔保留完整敘述，送出的 context 依 token 預算裁切（相似度低者先略過）
+    with tracing.span('context'):
+        judge_ctx = build_context('[原始新聞]', text, '[比對知識]', final, budget=JUDGE_TOKEN_BUDGET,
+                                  rank=lambda: rank_by_similarity(news_vec, embed_texts(final)))
+    report(judge_ctx)
+    with tracing.span('judge'):
+        judged_raw = judge_news_kb(judge_ctx.text)
     # 移除判斷結果中的所有反引號
     judged_clean = judged_raw.replace("`", "")
-    judge_file.write_text(judged_clean, encoding='utf-8')
+    with tracing.span('write'):
+        judge_file.write_text(judged_clean, encoding='utf-8')
 
     print(f'✅ 輸出：{kg_file.name}, {judge_file.name}')
 
@@ -131,18 +228,28 @@ def _parse_args() -> argparse.Namespace:
         nargs='?',
         help='新聞檔名（不含 .txt），留空則批次所有'
     )
+    p.add_argument('--trace', default=None, help='輸出 JSON trace 檔（各階段耗時、命中與 token 數）')
+    p.add_argument('--profile', choices=('cprofile', 'pyinstrument'), default=None,
+                   help='對每篇新聞做效能分析（預設讀取 FACTGRAPH_PROFILE）')
     return p.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
+    try:
+        _run(args)
+    finally:
+        if args.trace:
+            tracing.dump(args.trace)
+
 
+def _run(args: argparse.Namespace) -> None:
     if args.news_id:
         input_path = USER_INPUT_DIR / f'{args.news_id}'
         if not input_path.is_file():
             sys.exit(f'❌ 找不到檔案：{input_path}')
         text = input_path.read_text(encoding='utf-8-sig').strip()
-        _process_single(args.news_id, text)
+        _process_single(args.news_id, text, args.profile)
     else:
         processed = {
             p.stem.removeprefix('news_kg_')
@@ -153,7 +260,7 @@ def main() -> None:
             if nid in processed:
                 continue
             text = path.read_text(encoding='utf-8-sig').strip()
-            _process_single(nid, text)
+            _process_single(nid, text, args.profile)
 
     gc.collect()
 
@@ -1,10 +1,14 @@
 """
 共用依賴：
 - get_settings() 供路由透過 Depends 取得設定
-- get_verifier() 取得 verifier service（懶載入）
+- get_verifier() / get_answerer() 取得 pipeline 進入點（懶載入）
+- run_pipeline() 於 threadpool 中執行 pipeline，並把 sys.exit 轉為例外
 """
 from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
 
 from pydantic import BaseModel
 
@@ -22,7 +26,29 @@ def get_settings() -> Settings:  # FastAPI 會 cache Depends
     return Settings()
 
 
-# ‒‒ example service (lazy import) ‒‒
+# ‒‒ pipeline services (lazy import) ‒‒
 def get_verifier():
-    from qa.verifier.pipeline import _process_single  # 延後載入，避免啟動變慢
+    from src.qa.verifier.pipeline import _process_single  # 延後載入，避免啟動變慢
     return _process_single
+
+
+def get_answerer():
+    from src.qa.answerer.pipeline import answer
+    return answer
+
+
+class PipelineError(RuntimeError):
+    """pipeline 以 sys.exit 結束（無三元組、無 KG 命中等）。"""
+
+
+def _call(fn: Callable[..., Any], *args: Any) -> Any:
+    try:
+        return fn(*args)
+    except SystemExit as e:
+        # CLI 流程以 sys.exit 中止；在服務內不可讓 SystemExit 逸出 worker thread
+        raise PipelineError(str(e.code)) from None
+
+
+async def run_pipeline(fn: Callable[..., Any], *args: Any) -> Any:
+    """於 threadpool 執行 pipeline（共用 process 內已載入的模型，不阻塞事件迴圈）。"""
+    return await run_in_threadpool(_call, fn, *args)
@@ -1,26 +1,54 @@
 # src/web/init_model.py
+"""
+web 服務啟動時的模型預載：
+- ensure_ckip_model() 本地快照不存在時才由 Hugging Face 下載至 models/CKIP
+- load_ckip_model()   經由 qa.tools.embedder 註冊表載入並 warm-up，
+                      verifier / answerer 之後取得的是同一個實例
+- start_kg_watch()    預載 KG 快照並開始監看 snapshots/CURRENT（KG_BACKEND=graph 時不需要）
+"""
 import time
 
-from sentence_transformers import SentenceTransformer
+from src.qa.tools import embedder
+from src.qa.verifier.core.config import EMBED_BACKEND, KG_BACKEND
+from src.qa.verifier.core.paths import CKIP_ROOT
 
+MODEL_NAME = 'ckiplab/bert-base-chinese'
 
-def load_ckip_model():
-    model_name = 'ckiplab/bert-base-chinese'
-    model_cache_path = 'models/CKIP'
 
-    print(f"🚀 正在初始化 CKIP 模型：{model_name}")
+def ensure_ckip_model() -> None:
+    try:
+        embedder.resolve_snapshot(CKIP_ROOT)
+    except FileNotFoundError:
+        from huggingface_hub import snapshot_download
+
+        print(f"⬇️ 本地找不到模型快照，下載 {MODEL_NAME} 至 {CKIP_ROOT.parent}")
+        snapshot_download(MODEL_NAME, cache_dir=str(CKIP_ROOT.parent))
+
+
+def load_ckip_model():
+    print(f"🚀 正在初始化 CKIP 模型：{MODEL_NAME}（backend={EMBED_BACKEND}）")
     t0 = time.time()
 
     try:
-        model = SentenceTransformer(
-            model_name,
-            trust_remote_code=True,
-            cache_folder=model_cache_path
-        )
+        ensure_ckip_model()
+        model = embedder.warmup(CKIP_ROOT, backend=EMBED_BACKEND)
     except Exception as e:
         print("❌ 模型載入失敗：", e)
         raise
 
     elapsed = time.time() - t0
-    print(f"✅ 模型載入成功，耗時 {elapsed:.2f} 秒。")
+    print(f"✅ 模型就緒，耗時 {elapsed:.2f} 秒。")
     return model
+
+
+def start_kg_watch() -> None:
+    if KG_BACKEND == 'graph':
+        return
+    from src.qa.verifier.kg.loader import kg_manager  # 延後載入，避免啟動變慢
+
+    manager = kg_manager()
+    manager.watch()  # 先開始監看：預載失敗時，之後發佈的版本仍會被載入
+    try:
+        manager.current()
+    except Exception as e:
+        print("⚠️ KG 快照預載失敗（第一個請求時重試）：", e)
@@ -2,6 +2,7 @@
 #  $ uvicorn src.web.main:app --reload --host 0.0.0.0 --port 8080
 from __future__ import annotations
 
+import asyncio
 import uuid
 from pathlib import Path
 from typing import Literal
@@ -14,8 +15,8 @@ from firebase_admin import credentials, firestore
 from pydantic import BaseModel
 
 from .deps import get_settings
-from .init_model import load_ckip_model
-from .routers import health, verifier, answerer
+from .init_model import load_ckip_model, start_kg_watch
+from .routers import health, verifier, answerer, metrics
 
 # ── 確保本地目錄存在，避免檔案操作錯誤 ─────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent  # …/FactGraph/src/web
@@ -45,6 +46,7 @@ app.add_middleware(
 app.include_router(health.router, prefix="/api")
 app.include_router(verifier.router, prefix="/api")
 app.include_router(answerer.router, prefix="/api")
+app.include_router(metrics.router)
 
 # ── Firebase Admin SDK 初始化 (Admin SDK 不受安全規則限制) ─────────────────────────────
 cred = credentials.Certificate(str(KEY_PATH))
@@ -134,10 +136,22 @@ def get_task(job_id: str):
 
 
 # ── 啟動時 Pre-load CKIP 模型 ───────────────────────────────────────────────────────
+# 在背景執行緒載入並 warm-up，服務先開始接受連線；/api/ready 於完成前回傳 503。
+# 模型存放於 qa.tools.embedder 註冊表，verifier / answerer 於 process 內共用同一份權重。
+# 之後預載 KG 快照並監看新版本（熱更新，不需重啟服務）。
+def _warmup_model() -> None:
+    try:
+        load_ckip_model()
+        app.state.model_loaded = True
+        print("📦 模型載入完成。")
+    except Exception as e:
+        app.state.model_error = str(e)
+    start_kg_watch()
+
+
 @app.on_event("startup")
 async def startup_event():
     print("📦 預載 CKIP 模型…")
-    ckip_model = load_ckip_model()
-    app.state.ckip_model = ckip_model
-    app.state.model_loaded = True
-    print("📦 模型載入完成。")
+    app.state.model_loaded = False
+    app.state.model_error = None
+    app.state.warmup_task = asyncio.get_running_loop().run_in_executor(None, _warmup_model)
@@ -1,5 +1,9 @@
 # src/web/routers/health.py
 from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from src.qa.tools import embedder
+from src.qa.tools.snapshot_manager import managers
 
 router = APIRouter(tags=["health"])
 
@@ -19,9 +23,17 @@ async def test() -> dict[str, str]:
 
 
 @router.get("/ready", summary="就緒探針")
-async def ready(request: Request) -> dict[str, bool]:
+async def ready(request: Request) -> JSONResponse:
     """
-    檢查模型是否已經預載完成。
+    檢查模型是否已經預載並完成 warm-up；未就緒（或載入失敗）時回傳 503。
+    kg 欄位回報目前服務中的 KG 快照版本與熱更新狀態（不影響就緒判斷）。
     """
-    loaded = getattr(request.app.state, "model_loaded", False)
-    return {"model_loaded": loaded}
+    loaded = getattr(request.app.state, "model_loaded", False) and embedder.is_ready()
+    body = {"model_loaded": loaded, "models": embedder.loaded_models()}
+    kg = managers()
+    if kg:
+        body["kg"] = kg[0].status() if len(kg) == 1 else [m.status() for m in kg]
+    error = getattr(request.app.state, "model_error", None)
+    if error:
+        body["error"] = error
+    return JSONResponse(body, status_code=200 if loaded else 503)
@@ -0,0 +1,15 @@
+# src/web/routers/metrics.py
+from fastapi import APIRouter, Response
+
+from src.common.tracing import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", summary="Prometheus 指標")
+async def metrics() -> Response:
+    """
+    各 pipeline 階段耗時、命中數與 token 數（Prometheus 文字格式）。
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,15 +1,20 @@
-import subprocess
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 
+from ..deps import get_verifier, run_pipeline
+
 router = APIRouter(prefix="/verifier", tags=["verifier"])
 
 
 @router.post("/query")
-async def query_verifier(file: UploadFile = File(...), date: str = Form(...)):
+async def query_verifier(
+        file: UploadFile = File(...),
+        date: str = Form(...),
+        profile: str | None = Form(None),  # cprofile | pyinstrument，選用
+):
     # 驗證日期格式 (yyyy/mm/dd)
     try:
         news_date = datetime.strptime(date, "%Y/%m/%d").date()
@@ -44,17 +49,13 @@ async def query_verifier(file: UploadFile = File(...), date: str = Form(...)):
     input_path = interim_dir / f"{filename_base}.txt"
     input_path.write_text(merged, encoding="utf-8")
 
-    # 呼叫處理 pipeline
+    # 於 process 內呼叫處理 pipeline（共用啟動時載入的 embedder，trace 直接計入 /metrics）
+    if profile not in ("cprofile", "pyinstrument"):
+        profile = None
     try:
-        subprocess.run(
-            ["python", "-m", "src.qa.verifier.pipeline", input_path.name],
-            cwd=str(project_root),
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline 執行錯誤：{e.stderr}")
+        await run_pipeline(get_verifier(), input_path.name, merged.strip(), profile)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pipeline 執行錯誤：{e}")
 
     # 讀取處理後的結果檔案
     processed_dir = project_root / "data" / "processed" / "verifier"